@@ -1,31 +1,259 @@
-import threading
-from playsound import playsound
-import os
-import time
-
-from logger import system_logger
-
-last_played_time = 0
-COOLDOWN_SECONDS = 2 # Reduced for more urgent feeling
-
-def play_sound_thread():
-    global last_played_time
-    try:
-        sound_path = 'alert_sound.mp3'
-        if os.path.exists(sound_path):
-            system_logger.logger.info(f"Triggering audio alert: {sound_path}")
-            playsound(sound_path)
-        else:
-            system_logger.logger.error(f"Alert sound missing at {os.path.abspath(sound_path)}")
-    except Exception as e:
-        system_logger.logger.error(f"Audio Playback Error: {e}")
-
-def red_alert_sound():
-    global last_played_time
-    if time.time() - last_played_time < COOLDOWN_SECONDS:
-        return 
-        
-    last_played_time = time.time()
-    threading.Thread(target=play_sound_thread, daemon=True).start()
-
-
+import os
+import json
+import time
+import heapq
+import socket
+import itertools
+import threading
+import urllib.request
+from collections import deque
+from datetime import datetime
+from config import Config
+from logger import system_logger
+
+# Lower = more urgent
+PRIORITIES = {"WEAPON_DETECTED": 0, "SUSPECT_IDENTIFIED": 1, "HIGH_SUSPICION": 2}
+DEFAULT_PRIORITY = 3
+
+class Alert:
+    __slots__ = ("kind", "source", "camera", "priority", "details", "detected_at", "raised_at")
+
+    def __init__(self, kind, source=None, camera=None, details=None, detected_at=None):
+        self.kind = kind
+        self.source = source # Usually the track id
+        self.camera = camera
+        self.priority = PRIORITIES.get(kind, DEFAULT_PRIORITY)
+        self.details = details or {}
+        self.raised_at = time.time()
+        self.detected_at = detected_at or self.raised_at # e.g. the frame timestamp
+
+    def to_dict(self):
+        return {
+            "kind": self.kind, "source": self.source, "camera": self.camera, "priority": self.priority,
+            "details": self.details,
+            "detected_at": datetime.fromtimestamp(self.detected_at).isoformat(),
+            "raised_at": datetime.fromtimestamp(self.raised_at).isoformat(),
+        }
+
+    def to_json(self):
+        from logger import NpEncoder
+        return json.dumps(self.to_dict(), cls=NpEncoder)
+
+# --- Sinks: deliver(alert) runs on the sink's own worker thread ---
+class AudioSink:
+    """Siren, decoded once (pygame mixer; playsound fallback) and spaced by ALERT_AUDIO_COOLDOWN."""
+    name = "audio"
+
+    def __init__(self, path=None, cooldown=None):
+        self.path = path or Config.ALERT_SOUND_PATH
+        self.cooldown = cooldown if cooldown is not None else Config.ALERT_AUDIO_COOLDOWN
+        self._last_played = 0.0
+        self._sound = None
+        self._play_file = None
+
+        if not os.path.exists(self.path):
+            system_logger.logger.error(f"Alert sound missing at {os.path.abspath(self.path)}")
+            return
+        try:
+            import pygame
+            pygame.mixer.init()
+            self._sound = pygame.mixer.Sound(self.path)
+            return
+        except Exception as e:
+            system_logger.logger.warning(f"pygame audio unavailable ({e}), falling back to playsound")
+        try:
+            from playsound import playsound
+            self._play_file = playsound
+        except ImportError:
+            system_logger.logger.error("No audio backend (install pygame or playsound); audio alerts disabled")
+
+    def deliver(self, alert):
+        now = time.time()
+        if now - self._last_played < self.cooldown:
+            return
+        self._last_played = now
+        if self._sound is not None:
+            self._sound.play() # Returns immediately
+        elif self._play_file is not None:
+            self._play_file(self.path)
+
+class WebhookSink:
+    """POSTs each alert as JSON (e.g. to a local integration service)."""
+    name = "webhook"
+
+    def __init__(self, url=None, timeout=2.0):
+        self.url = url or Config.ALERT_WEBHOOK_URL
+        self.timeout = timeout
+
+    def deliver(self, alert):
+        request = urllib.request.Request(self.url, data=alert.to_json().encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class SocketSink:
+    """Sends each alert as one JSON datagram (UDP), e.g. to a local control-room client."""
+    name = "socket"
+
+    def __init__(self, address=None):
+        host, port = (address or Config.ALERT_SOCKET_ADDR)
+        self.address = (host, int(port))
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def deliver(self, alert):
+        self._sock.sendto(alert.to_json().encode(), self.address)
+
+class FileSpoolSink:
+    """Appends each alert as a JSON line to ALERT_SPOOL_DIR/alerts_YYYYMMDD.jsonl for other processes to pick up."""
+    name = "spool"
+
+    def __init__(self, directory=None):
+        self.directory = directory or Config.ALERT_SPOOL_DIR
+
+    def deliver(self, alert):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"alerts_{datetime.now().strftime('%Y%m%d')}.jsonl")
+        with open(path, "a") as f:
+            f.write(alert.to_json() + "\n")
+
+SINKS = {"audio": AudioSink, "webhook": WebhookSink, "socket": SocketSink, "spool": FileSpoolSink}
+
+class _SinkWorker:
+    """Own thread + priority queue per sink, so a slow webhook never delays the siren."""
+    def __init__(self, sink):
+        self.sink = sink
+        self.name = getattr(sink, "name", type(sink).__name__)
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.latencies_ms = deque(maxlen=256) # Detection -> delivered
+        self.counters = {"delivered": 0, "failed": 0, "dropped": 0}
+        self._thread = threading.Thread(target=self._run, name=f"alert-{self.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, alert):
+        with self._cond:
+            if len(self._heap) >= Config.ALERT_QUEUE_SIZE:
+                self.counters["dropped"] += 1
+                return
+            heapq.heappush(self._heap, (alert.priority, next(self._seq), alert))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopped:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, alert = heapq.heappop(self._heap)
+            try:
+                self.sink.deliver(alert)
+                self.counters["delivered"] += 1
+                self.latencies_ms.append((time.time() - alert.detected_at) * 1000)
+            except Exception as e:
+                self.counters["failed"] += 1
+                system_logger.logger.error(f"Alert sink '{self.name}' failed: {e}")
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        lat = sorted(self.latencies_ms)
+        return dict(self.counters, queued=len(self._heap),
+                    latency_ms_p50=round(lat[len(lat) // 2], 2) if lat else None,
+                    latency_ms_max=round(lat[-1], 2) if lat else None)
+
+class AlertDispatcher:
+    """One dispatcher per process: deduplicates, queues by priority and fans alerts out to Config.ALERT_SINKS."""
+    def __init__(self, sinks=None):
+        self._sink_objects = sinks # None = build from Config on start()
+        self.workers = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._last_raised = {} # {(camera, source, kind): time}
+        self._thread = None
+        self._stopped = False
+        self.counters = {"raised": 0, "deduplicated": 0, "dropped": 0, "dispatched": 0}
+
+    def start(self):
+        """Builds the sinks (audio is decoded here, once) and starts the dispatcher thread."""
+        with self._cond:
+            if self._thread is not None:
+                return self
+            sinks = self._sink_objects
+            if sinks is None:
+                sinks = []
+                for name in Config.ALERT_SINKS:
+                    try:
+                        sinks.append(SINKS[name]())
+                    except Exception as e:
+                        system_logger.logger.error(f"Alert sink '{name}' disabled: {e}")
+            self.workers = [_SinkWorker(sink) for sink in sinks]
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def raise_alert(self, kind, source=None, camera=None, details=None, detected_at=None):
+        """Queues an alert (O(1), never blocks). Returns False when it was deduplicated or dropped."""
+        now = time.time()
+        key = (camera, source, kind) # Dedup never mutes an unrelated track or alert type
+        with self._cond:
+            last = self._last_raised.get(key)
+            if last is not None and now - last < Config.ALERT_DEDUP_SECONDS:
+                self.counters["deduplicated"] += 1
+                return False
+            if len(self._heap) >= Config.ALERT_QUEUE_SIZE:
+                self.counters["dropped"] += 1
+                return False
+            self._last_raised[key] = now
+            if len(self._last_raised) > 4096:
+                self._last_raised = {k: t for k, t in self._last_raised.items() if now - t < Config.ALERT_DEDUP_SECONDS}
+
+            alert = Alert(kind, source, camera, details, detected_at)
+            heapq.heappush(self._heap, (alert.priority, next(self._seq), alert))
+            self.counters["raised"] += 1
+            self._cond.notify()
+
+        if self._thread is None:
+            self.start()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopped:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, alert = heapq.heappop(self._heap)
+            for worker in self.workers:
+                worker.submit(alert)
+            self.counters["dispatched"] += 1
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for worker in self.workers:
+            worker.stop()
+
+    def stats(self):
+        return dict(self.counters, queued=len(self._heap), sinks={w.name: w.stats() for w in self.workers})
+
+# Process-wide dispatcher (started by main at startup, or lazily on the first alert)
+dispatcher = AlertDispatcher()
+
+def raise_alert(kind, source=None, camera=None, details=None, detected_at=None):
+    return dispatcher.raise_alert(kind, source, camera, details, detected_at)
+
+def red_alert_sound():
+    """Legacy entry point: an untyped alert (deduplicated as one source)."""
+    return dispatcher.raise_alert("ALERT")
@@ -0,0 +1,172 @@
+import os
+import numpy as np
+from config import Config
+
+class IVFIndex:
+    """Inverted-file (IVF) approximate nearest-neighbour index over gallery rows (row ids only, no vector copies)."""
+    def __init__(self, nlist=None, nprobe=None):
+        self.nlist = nlist
+        self.nprobe = nprobe or Config.ANN_NPROBE # Lists scored per query; nprobe == nlist is an exact scan
+        self.centroids = None # (nlist, D), unit norm
+        self.assign = np.full(0, -1, dtype=np.int32) # row -> list (-1 = not indexed)
+        self._members = [] # list -> set(rows)
+        self._arrays = [] # list -> cached np.array of rows (None when stale)
+        self.trained_size = 0
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def __len__(self):
+        return int(np.count_nonzero(self.assign >= 0))
+
+    @staticmethod
+    def default_nlist(n):
+        return int(max(1, min(4096, round(np.sqrt(n) * 2))))
+
+    # --- Build ---
+    def train(self, matrix, rows=None, iterations=10, seed=0):
+        """Spherical k-means on a sample of the gallery, then indexes `rows` (default: all)."""
+        rows = np.arange(matrix.shape[0]) if rows is None else np.asarray(rows)
+        n = rows.shape[0]
+        if n == 0:
+            raise ValueError("Cannot train an IVF index on an empty gallery")
+        nlist = min(self.nlist or self.default_nlist(n), n)
+
+        rng = np.random.default_rng(seed)
+        sample = matrix[np.sort(rng.choice(rows, min(n, nlist * 64), replace=False))]
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty clusters with random sample points
+            sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.nlist = nlist
+        self.centroids = centroids
+        self.assign = np.full(0, -1, dtype=np.int32)
+        self._members = [set() for _ in range(nlist)]
+        self._arrays = [None] * nlist
+        self.add_batch(rows, matrix[rows])
+        self.trained_size = n
+
+    def needs_retrain(self, n):
+        """Lists get too long when the gallery has grown a lot since training."""
+        return not self.is_trained or n > max(4 * self.trained_size, 1000)
+
+    def copy(self):
+        """Independent list membership (centroids are shared: they never change after training)."""
+        index = IVFIndex(self.nlist, self.nprobe)
+        index.centroids = self.centroids
+        index.assign = self.assign.copy()
+        index._members = [set(members) for members in self._members]
+        index._arrays = list(self._arrays) # Cached arrays are replaced, never modified
+        index.trained_size = self.trained_size
+        return index
+
+    # --- Incremental updates ---
+    def add_batch(self, rows, vectors):
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return
+        labels = np.argmax(np.atleast_2d(vectors) @ self.centroids.T, axis=1)
+
+        top = int(rows.max()) + 1
+        if top > self.assign.shape[0]:
+            grown = np.full(max(top, self.assign.shape[0] * 2), -1, dtype=np.int32)
+            grown[:self.assign.shape[0]] = self.assign
+            self.assign = grown
+
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            self.remove(row)
+            self.assign[row] = label
+            self._members[label].add(row)
+            self._arrays[label] = None
+
+    def add(self, row, vector):
+        self.add_batch([row], vector)
+
+    def remove(self, row):
+        if row < self.assign.shape[0] and self.assign[row] >= 0:
+            label = self.assign[row]
+            self._members[label].discard(row)
+            self._arrays[label] = None
+            self.assign[row] = -1
+
+    def _list_rows(self, label):
+        if self._arrays[label] is None:
+            self._arrays[label] = np.fromiter(self._members[label], dtype=np.int64, count=len(self._members[label]))
+        return self._arrays[label]
+
+    # --- Query ---
+    def search(self, matrix, queries, k, nprobe=None):
+        """
+        :param matrix: gallery matrix (N, D), normalised
+        :param queries: (Q, D), normalised
+        :return: (scores, rows) (Q, k), best first. Missing slots are (-inf, -1).
+        """
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        q_count = queries.shape[0]
+        scores = np.full((q_count, k), -np.inf, dtype=np.float32)
+        rows = np.full((q_count, k), -1, dtype=np.int64)
+
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        for i in range(q_count):
+            candidates = np.concatenate([self._list_rows(label) for label in probes[i]])
+            if candidates.size == 0:
+                continue
+            sims = matrix[candidates] @ queries[i]
+            top = min(k, candidates.size)
+            if top < candidates.size:
+                keep = np.argpartition(-sims, top - 1)[:top]
+                candidates, sims = candidates[keep], sims[keep]
+            order = np.lexsort((candidates, -sims))[:top]
+            scores[i, :top] = sims[order]
+            rows[i, :top] = candidates[order]
+        return scores, rows
+
+    # --- Persistence ---
+    def save(self, path, names):
+        """Stores centroids plus each name's list, so rows can be re-mapped after a reload."""
+        indexed = np.nonzero(self.assign[:len(names)] >= 0)[0]
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path,
+                 centroids=self.centroids,
+                 names=np.array([names[r] for r in indexed], dtype=object),
+                 labels=self.assign[indexed],
+                 trained_size=self.trained_size,
+                 nprobe=self.nprobe)
+        os.replace(tmp_path, path) # Readers never see a half-written index
+
+    @classmethod
+    def load(cls, path, gallery):
+        """Rebuilds list membership for the current gallery rows (new names go to their nearest list)."""
+        data = np.load(path, allow_pickle=True)
+        index = cls(nlist=data["centroids"].shape[0], nprobe=int(data["nprobe"]))
+        index.centroids = data["centroids"].astype(np.float32)
+        index.trained_size = int(data["trained_size"])
+        index.assign = np.full(max(gallery.row_count, 1), -1, dtype=np.int32)
+        index._members = [set() for _ in range(index.nlist)]
+        index._arrays = [None] * index.nlist
+
+        known = dict(zip(data["names"].tolist(), data["labels"].tolist()))
+        missing = []
+        for row, name in enumerate(gallery.names):
+            if name is None: # Deleted row
+                continue
+            label = known.get(name)
+            if label is None:
+                missing.append(row)
+            else:
+                index.assign[row] = label
+                index._members[label].add(row)
+
+        if missing:
+            index.add_batch(missing, gallery.matrix[missing])
+        return index
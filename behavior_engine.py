@@ -1,80 +1,170 @@
-import numpy as np
-from config import Config
-
-class BehaviorEngine:
-    @staticmethod
-    def analyze(person):
-        """
-        Analyzes the person's history to detect anomalies.
-        Updates person.active_alerts and person.suspicion_score.
-        """
-        # 1. Loitering Detection
-        if person.role != "Staff": # Authorized personnel are allowed to stand/work
-            if BehaviorEngine.check_loitering(person):
-                person.add_suspicion(Config.SCORE_LOITERING, "Loitering")
-            else:
-                person.clear_alerts("Loitering")
-
-        # 2. Pacing Detection
-        if person.role != "Staff":
-            if BehaviorEngine.check_pacing(person):
-                person.add_suspicion(Config.SCORE_PACING, "Pacing")
-            else:
-                person.clear_alerts("Pacing")
-
-        # 3. Running/Panic Detection (High Velocity)
-        # (Simple velocity threshold check)
-        if person.velocity_history and np.mean(person.velocity_history) > 200: # Threshold depends on scene
-            person.movement_state = "Running"
-        elif person.velocity_history and np.mean(person.velocity_history) > 50:
-             person.movement_state = "Walking"
-        else:
-             person.movement_state = "Standing"
-
-
-    @staticmethod
-    def check_loitering(person):
-        """
-        Returns True if person has stayed within a small radius for > T seconds.
-        """
-        if person.age_on_camera < Config.LOITERING_TIME_SECONDS:
-            return False
-
-        # Get history points from the requisite time window
-        # Since history is a deque of (point, time), we look back
-        recent_points = [p[0] for p in person.location_history]
-        
-        if len(recent_points) < 20: 
-            return False
-
-        # Calculate standard deviation of positions
-        std_dev = np.std(recent_points, axis=0)
-        avg_spread = np.mean(std_dev)
-
-        # If spread is small but time is long -> Loitering
-        return avg_spread < Config.LOITERING_RADIUS_PITCH
-
-    @staticmethod
-    def check_pacing(person):
-        """
-        Returns True if person is moving back and forth repeatedly.
-        """
-        if len(person.location_history) < 50:
-            return False
-            
-        # Simplified pacing: Standard deviation in one axis is high, 
-        # but displacement (start vs end) is low.
-        
-        points = np.array([p[0] for p in person.location_history])
-        start_point = points[0]
-        end_point = points[-1]
-        
-        displacement = np.linalg.norm(end_point - start_point)
-        total_distance = np.sum(np.linalg.norm(np.diff(points, axis=0), axis=1))
-
-        if total_distance == 0: return False
-
-        ratio = displacement / total_distance
-        
-        # Low ratio means lots of movement but little progress (Pacing/Circling)
-        return ratio < 0.1 and total_distance > 500  # Ensure they actually moved significant amount
+import numpy as np
+from config import Config
+
+class TrackTable:
+    """
+    Struct-of-arrays mirror of the per-track behaviour statistics, owned by a
+    StateManager. One row (slot) per live track, one column per statistic;
+    BehaviorEngine.analyze_batch evaluates every track with column operations.
+    Rows are refreshed from the Person rings after each update (store).
+    """
+    (FIRST_SEEN, LAST_SEEN, COUNT, SUM_X, SUM_Y, SUM_XX, SUM_YY, PATH_LENGTH,
+     FIRST_X, FIRST_Y, LAST_X, LAST_Y, VEL_TOTAL, VEL_COUNT) = range(14)
+    WIDTH = 14
+
+    def __init__(self, capacity=64):
+        self.data = np.zeros((capacity, self.WIDTH), dtype=np.float64)
+        self.slots = {} # {track_id: row}
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def acquire(self, track_id):
+        if track_id in self.slots:
+            return self.slots[track_id]
+        if not self._free:
+            capacity = self.data.shape[0]
+            grown = np.zeros((capacity * 2, self.WIDTH), dtype=np.float64)
+            grown[:capacity] = self.data
+            self.data = grown
+            self._free = list(range(capacity * 2 - 1, capacity - 1, -1))
+        slot = self._free.pop()
+        self.slots[track_id] = slot
+        return slot
+
+    def release(self, track_id):
+        slot = self.slots.pop(track_id, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def store(self, slot, person):
+        h, v = person.history, person.velocities
+        fx, fy, _ = h.first
+        lx, ly, _ = h.last
+        self.data[slot] = (person.first_seen_time, person.last_seen_time, h.count,
+                           h.sum_x, h.sum_y, h.sum_xx, h.sum_yy, h.path_length,
+                           fx, fy, lx, ly, v.total, v.count)
+
+class BehaviorEngine:
+    @staticmethod
+    def analyze(person):
+        """
+        Analyzes the person's history to detect anomalies.
+        Updates person.active_alerts and person.suspicion_score.
+        """
+        # 1. Loitering Detection
+        if person.role != "Staff": # Authorized personnel are allowed to stand/work
+            if BehaviorEngine.check_loitering(person):
+                person.add_suspicion(Config.SCORE_LOITERING, "Loitering")
+            else:
+                person.clear_alerts("Loitering")
+
+        # 2. Pacing Detection
+        if person.role != "Staff":
+            if BehaviorEngine.check_pacing(person):
+                person.add_suspicion(Config.SCORE_PACING, "Pacing")
+            else:
+                person.clear_alerts("Pacing")
+
+        # 3. Running/Panic Detection (High Velocity)
+        # (Simple velocity threshold check)
+        speed = person.mean_velocity
+        if speed > Config.RUNNING_SPEED:
+            person.movement_state = "Running"
+        elif speed > Config.WALKING_SPEED:
+             person.movement_state = "Walking"
+        else:
+             person.movement_state = "Standing"
+
+
+    MOVEMENT_STATES = ("Standing", "Walking", "Running")
+
+    @staticmethod
+    def analyze_batch(table, slots, people):
+        """
+        Same as calling analyze(person) for each person, with the checks done as
+        column operations over the TrackTable rows `slots` (aligned with `people`).
+        Only applying the outcome (alerts, scores) is per person.
+        """
+        if not people:
+            return
+        T = TrackTable
+        d = table.data[np.asarray(slots, dtype=np.intp)]
+        n = d[:, T.COUNT]
+
+        # 1. Loitering: time on camera, enough samples, small spread
+        mean_x, mean_y = d[:, T.SUM_X] / n, d[:, T.SUM_Y] / n
+        std_x = np.sqrt(np.maximum(d[:, T.SUM_XX] / n - mean_x * mean_x, 0.0))
+        std_y = np.sqrt(np.maximum(d[:, T.SUM_YY] / n - mean_y * mean_y, 0.0))
+        loitering = ((d[:, T.LAST_SEEN] - d[:, T.FIRST_SEEN] >= Config.LOITERING_TIME_SECONDS)
+                     & (n >= Config.LOITERING_MIN_POINTS)
+                     & ((std_x + std_y) / 2 < Config.LOITERING_RADIUS_PITCH))
+
+        # 2. Pacing: long path, little displacement
+        dx, dy = d[:, T.LAST_X] - d[:, T.FIRST_X], d[:, T.LAST_Y] - d[:, T.FIRST_Y]
+        total = d[:, T.PATH_LENGTH]
+        moved = total > 0
+        ratio = np.divide(np.sqrt(dx * dx + dy * dy), total, out=np.ones_like(total), where=moved)
+        pacing = (n >= Config.PACING_MIN_POINTS) & moved & (ratio < 0.1) & (total > 500)
+
+        # 3. Running/Walking/Standing from the mean speed
+        vel_count = d[:, T.VEL_COUNT]
+        speed = np.divide(d[:, T.VEL_TOTAL], vel_count, out=np.zeros_like(vel_count), where=vel_count > 0)
+        movement = (speed > Config.WALKING_SPEED).astype(np.intp) + (speed > Config.RUNNING_SPEED)
+
+        states = BehaviorEngine.MOVEMENT_STATES
+        for person, loiter, pace, move in zip(people, loitering.tolist(), pacing.tolist(), movement.tolist()):
+            if person.role != "Staff":
+                if loiter:
+                    person.add_suspicion(Config.SCORE_LOITERING, "Loitering")
+                else:
+                    person.clear_alerts("Loitering")
+                if pace:
+                    person.add_suspicion(Config.SCORE_PACING, "Pacing")
+                else:
+                    person.clear_alerts("Pacing")
+            person.movement_state = states[move]
+
+    @staticmethod
+    def check_loitering(person):
+        """
+        Returns True if person has stayed within a small radius for > T seconds.
+        """
+        if person.age_on_camera < Config.LOITERING_TIME_SECONDS:
+            return False
+
+        # The history ring keeps running sums over the time window, so the
+        # spread is O(1) instead of a std over every stored point
+        history = person.history
+        if len(history) < Config.LOITERING_MIN_POINTS:
+            return False
+
+        # Calculate standard deviation of positions
+        std_x, std_y = history.std_xy()
+        avg_spread = (std_x + std_y) / 2
+
+        # If spread is small but time is long -> Loitering
+        return avg_spread < Config.LOITERING_RADIUS_PITCH
+
+    @staticmethod
+    def check_pacing(person):
+        """
+        Returns True if person is moving back and forth repeatedly.
+        """
+        history = person.history
+        if len(history) < Config.PACING_MIN_POINTS:
+            return False
+            
+        # Simplified pacing: Standard deviation in one axis is high, 
+        # but displacement (start vs end) is low.
+        # Path length is maintained incrementally by the ring.
+        displacement = history.displacement()
+        total_distance = history.path_length
+
+        if total_distance == 0: return False
+
+        ratio = displacement / total_distance
+        
+        # Low ratio means lots of movement but little progress (Pacing/Circling)
+        return ratio < 0.1 and total_distance > 500  # Ensure they actually moved significant amount
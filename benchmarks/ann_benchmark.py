@@ -0,0 +1,84 @@
+"""
+Exact scan vs IVF index on synthetic 512-d face embeddings.
+
+Usage (from the repo root):
+    python -m benchmarks.ann_benchmark --size 200000 --queries 200
+"""
+import time
+import json
+import argparse
+import numpy as np
+from gallery import FaceGallery
+from ann_index import IVFIndex
+
+def synthetic_gallery(size, dim, seed=0):
+    """Identities scattered loosely around a few hundred latent directions (real galleries are weakly clustered)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, size // 500), dim)).astype(np.float32)
+    emb = centers[rng.integers(0, centers.shape[0], size)] * 0.6 + rng.standard_normal((size, dim)).astype(np.float32)
+    return emb
+
+def synthetic_queries(gallery_emb, count, noise, seed=1):
+    """Re-captures of enrolled people: gallery embedding + capture noise."""
+    rng = np.random.default_rng(seed)
+    src = rng.integers(0, gallery_emb.shape[0], count)
+    return gallery_emb[src] + rng.standard_normal((count, gallery_emb.shape[1])).astype(np.float32) * noise
+
+def time_search(gallery, queries, k, **kwargs):
+    """Per-query latency (one query at a time, as in the live loop)."""
+    rows = []
+    t0 = time.perf_counter()
+    for q in queries:
+        rows.append(gallery.search(q, k, **kwargs)[1][0])
+    elapsed = time.perf_counter() - t0
+    return elapsed / len(queries) * 1000, np.array(rows)
+
+def recall(approx_rows, exact_rows, at):
+    hits = [len(set(a[:at]) & set(e[:at])) / at for a, e in zip(approx_rows, exact_rows)]
+    return float(np.mean(hits))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="Gallery identities")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.0, help="Query noise relative to identity spread")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    print(f"Building gallery: {args.size} x {args.dim}")
+    emb = synthetic_gallery(args.size, args.dim)
+    gallery = FaceGallery(dim=args.dim, capacity=args.size)
+    for i, vec in enumerate(emb):
+        gallery.add(f"id{i}", vec, "Suspect")
+    queries = synthetic_queries(emb, args.queries, args.noise)
+
+    exact_ms, exact_rows = time_search(gallery, queries, args.k, exact=True)
+
+    t0 = time.perf_counter()
+    index = IVFIndex()
+    index.train(gallery.matrix)
+    build_s = time.perf_counter() - t0
+    gallery.index = index
+
+    results = {"size": args.size, "dim": args.dim, "k": args.k, "nlist": index.nlist,
+               "build_seconds": round(build_s, 2), "exact_ms": round(exact_ms, 3), "ivf": []}
+    print(f"IVF: nlist={index.nlist}, trained in {build_s:.2f}s")
+    print(f"{'mode':<14}{'ms/query':>10}{'speedup':>10}{'recall@1':>10}{'recall@' + str(args.k):>11}")
+    print(f"{'exact':<14}{exact_ms:>10.3f}{1.0:>10.1f}{1.0:>10.3f}{1.0:>11.3f}")
+
+    for nprobe in args.nprobe:
+        ivf_ms, ivf_rows = time_search(gallery, queries, args.k, nprobe=nprobe)
+        row = {"nprobe": nprobe, "ms": round(ivf_ms, 3), "speedup": round(exact_ms / ivf_ms, 2),
+               "recall@1": recall(ivf_rows, exact_rows, 1), f"recall@{args.k}": recall(ivf_rows, exact_rows, args.k)}
+        results["ivf"].append(row)
+        print(f"{'ivf/' + str(nprobe):<14}{ivf_ms:>10.3f}{row['speedup']:>10.1f}{row['recall@1']:>10.3f}{row[f'recall@{args.k}']:>11.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
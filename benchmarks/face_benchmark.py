@@ -0,0 +1,92 @@
+"""
+CPU throughput of per-crop FaceAI.get_face vs batched FaceAI.get_faces.
+
+Each image stands in for one person crop. It is scaled to --crop-width (CCTV
+person boxes are small) and padded below to a person-like aspect ratio.
+
+Usage (from the repo root, needs the buffalo_l models):
+    python -m benchmarks.face_benchmark --images data/suspects --batch 1 3 6 --frames 30
+"""
+import os
+import time
+import json
+import argparse
+import cv2
+import numpy as np
+from face_ai import FaceAI
+
+def load_crops(folder, crop_width):
+    crops = []
+    for file in sorted(os.listdir(folder)):
+        if not file.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        img = cv2.imread(os.path.join(folder, file))
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        scale = crop_width / w
+        head = cv2.resize(img, (crop_width, max(1, int(h * scale))))
+        body = np.full((int(crop_width * 2.5), crop_width, 3), 90, dtype=np.uint8) # person box ~1:3
+        crops.append(np.vstack([head, body]))
+    return crops
+
+def bench(fn, frames):
+    """Returns (seconds, results of the last frame)."""
+    t0 = time.perf_counter()
+    for frame_crops in frames:
+        results = fn(frame_crops)
+    return time.perf_counter() - t0, results
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=os.path.join("data", "suspects"))
+    parser.add_argument("--crop-width", type=int, default=120)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 3, 6], help="Crops per frame")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--tile", type=int, help="Tile size for get_faces (default: Config.FACE_TILE_SIZE)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    crops = load_crops(args.images, args.crop_width)
+    if not crops:
+        raise SystemExit(f"No images found in {args.images}")
+
+    face_ai = FaceAI(providers=['CPUExecutionProvider'])
+    face_ai.initialize()
+    face_ai.get_faces(crops[:1]) # warm-up both paths
+    face_ai.get_face(crops[0])
+
+    results = []
+    print(f"{len(crops)} source crops, width {args.crop_width}px, CPU only")
+    print(f"{'crops/frame':>12}{'per-crop f/s':>14}{'batched f/s':>13}{'speedup':>9}{'agree':>8}")
+    for batch in args.batch:
+        frames = [[crops[(f * batch + i) % len(crops)] for i in range(batch)] for f in range(args.frames)]
+        total = batch * args.frames
+
+        single_s, single = bench(lambda fc: [face_ai.get_face(c) for c in fc], frames)
+        batched_s, batched = bench(lambda fc: face_ai.get_faces(fc, args.tile), frames)
+
+        # Same face found by both paths should give (nearly) the same embedding
+        sims = [cosine(a, b) for a, b in zip(single, batched) if a is not None and b is not None]
+        row = {
+            "crops_per_frame": batch,
+            "per_crop_faces_per_s": round(total / single_s, 1),
+            "batched_faces_per_s": round(total / batched_s, 1),
+            "speedup": round(single_s / batched_s, 2),
+            "mean_cosine_agreement": round(float(np.mean(sims)), 3) if sims else None,
+            "found_per_crop": sum(e is not None for e in single),
+            "found_batched": sum(e is not None for e in batched),
+        }
+        results.append(row)
+        agree = f"{row['mean_cosine_agreement']:.3f}" if sims else "n/a"
+        print(f"{batch:>12}{row['per_crop_faces_per_s']:>14}{row['batched_faces_per_s']:>13}{row['speedup']:>9}{agree:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+HUD.draw render time (ms per frame) against the number of people on screen.
+
+Synthetic scene: a noise frame and N Person tracks on a grid with mixed
+roles, suspicion levels and alerts, so every overlay branch is drawn.
+No models or camera needed.
+
+Usage (from the repo root):
+    python -m benchmarks.hud_benchmark --tracks 0 10 25 50 100 --frames 200
+"""
+import time
+import json
+import types
+import argparse
+import numpy as np
+from person import Person
+from hud_overlay import HUD
+
+def make_scene(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    cols = max(1, int(np.ceil(np.sqrt(count * width / height))))
+    cell_w, cell_h = width / cols, height / max(1, int(np.ceil(count / cols)))
+
+    tracks = {}
+    for i in range(count):
+        cx, cy = (i % cols + 0.5) * cell_w, (i // cols + 0.5) * cell_h
+        bw, bh = min(cell_w * 0.6, 120), min(cell_h * 0.8, 300)
+        person = Person(i, [cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2])
+        kind = i % 4
+        if kind == 1:
+            person.set_identity(f"staff_{i}", "Staff")
+        elif kind == 2:
+            person.add_suspicion(50, "Loitering")
+        elif kind == 3:
+            person.add_suspicion(30, "Pacing")
+        tracks[i] = person
+
+    state = types.SimpleNamespace(active_tracks=tracks, detected_weapons=[])
+    return frame, state, list(tracks)
+
+def bench(count, frames, width, height):
+    base, state, ids = make_scene(count, width, height)
+    HUD.draw(base.copy(), ids, state) # warm-up (also fills the status bar cache)
+
+    times = []
+    for _ in range(frames):
+        frame = base.copy()
+        t0 = time.perf_counter()
+        HUD.draw(frame, ids, state)
+        times.append((time.perf_counter() - t0) * 1000)
+    times = np.array(times)
+    return {
+        "tracks": count,
+        "mean_ms": round(float(times.mean()), 3),
+        "p50_ms": round(float(np.percentile(times, 50)), 3),
+        "p99_ms": round(float(np.percentile(times, 99)), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, nargs="+", default=[0, 10, 25, 50, 100])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{args.width}x{args.height}, {args.frames} frames per point")
+    print(f"{'tracks':>8}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for count in args.tracks:
+        row = bench(count, args.frames, args.width, args.height)
+        results.append(row)
+        print(f"{row['tracks']:>8}{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
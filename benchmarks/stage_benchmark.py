@@ -0,0 +1,334 @@
+"""
+Per-stage latency and memory of the analysis hot path, without any models.
+
+A synthetic scene (N people with a motion pattern, random weapon sightings,
+track churn) is replayed as fake tracker output shaped like
+results[0].boxes, and a synthetic watchlist of random embeddings stands in
+for the gallery. Timed stages:
+
+    update_tracks   StateManager.update_tracks, one call per frame
+    person_update   Person.update, one call per track per frame
+    analyze         BehaviorEngine.analyze, one call per live track
+    match_face      Database.match_face, one query
+    hud_draw        HUD.draw, one call per frame
+
+Each stage reports p50/p99/mean latency (us), then runs again under
+tracemalloc for peak traced memory and the blocks it leaves allocated.
+Audit logging and alert dispatch are stubbed out, so only CPU work is timed.
+
+Usage (from the repo root):
+    python -m benchmarks.stage_benchmark --tracks 50 --frames 600 --json bench_v1.json
+    python -m benchmarks.stage_benchmark --tracks 50 --json bench_v2.json --baseline bench_v1.json
+"""
+import sys
+import time
+import json
+import types
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+import cv2
+from config import Config
+from person import Person
+from behavior_engine import BehaviorEngine
+from state_manager import StateManager
+from gallery import FaceGallery
+from hud_overlay import HUD
+
+MOTIONS = ("walk", "run", "loiter", "pace", "mixed")
+SPEEDS = {"walk": 60.0, "run": 260.0, "loiter": 8.0, "pace": 90.0} # px/s
+
+class FakeTensor:
+    """Just enough of torch.Tensor for StateManager.update_tracks (.cpu().numpy())."""
+    def __init__(self, array):
+        self._array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._array
+
+def fake_results(boxes, ids, classes):
+    """[Results] with .boxes.xyxy / .id / .cls like ultralytics after model.track()."""
+    boxes_ns = types.SimpleNamespace(xyxy=FakeTensor(boxes),
+                                     id=FakeTensor(ids.astype(np.float32)) if len(ids) else None,
+                                     cls=FakeTensor(classes.astype(np.float32)))
+    return [types.SimpleNamespace(boxes=boxes_ns)]
+
+class QuietStateManager(StateManager):
+    """No audit log, alerts or archive I/O: only the state logic is measured."""
+    def _event(self, event_type, details):
+        pass
+
+    def _alert(self, kind, track_id, details, now):
+        pass
+
+    def _archive(self, person):
+        pass
+
+class SyntheticScene:
+    """
+    People moving in a width x height frame. Each step returns tracker-like
+    arrays (xyxy, ids, classes) for one frame at `fps`.
+
+    - motion: walk / run (straight, bouncing off edges), loiter (jitter around
+      a spot), pace (back and forth), mixed (all of them)
+    - weapon_rate: mean weapon detections per frame (Poisson)
+    - churn: fraction of people replaced by new track ids per second
+    """
+    def __init__(self, tracks, motion="mixed", weapon_rate=0.0, churn=0.02,
+                 width=1280, height=720, fps=30, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.width, self.height, self.dt = width, height, 1.0 / fps
+        self.weapon_rate, self.churn = weapon_rate, churn
+        self.t = 0.0
+        self.next_id = tracks + 1
+        kinds = list(SPEEDS) if motion == "mixed" else [motion]
+        self.kinds = np.array([kinds[i % len(kinds)] for i in range(tracks)])
+        self.ids = np.arange(1, tracks + 1)
+        self.size = np.column_stack([self.rng.uniform(40, 90, tracks), self.rng.uniform(120, 260, tracks)])
+        self.anchor = self.rng.uniform([100, 150], [width - 100, height - 150], (tracks, 2))
+        self.pos = self.anchor.copy()
+        angle = self.rng.uniform(0, 2 * np.pi, tracks)
+        speed = np.array([SPEEDS[k] for k in self.kinds])
+        self.vel = np.column_stack([np.cos(angle), np.sin(angle)]) * speed[:, None]
+        self.phase = self.rng.uniform(0, 2 * np.pi, tracks)
+
+    def step(self):
+        self.t += self.dt
+        n = len(self.ids)
+        walking = np.isin(self.kinds, ("walk", "run"))
+        self.pos[walking] += self.vel[walking] * self.dt
+        for axis, limit in ((0, self.width), (1, self.height)): # Bounce off the edges
+            out = walking & ((self.pos[:, axis] < 50) | (self.pos[:, axis] > limit - 50))
+            self.vel[out, axis] *= -1
+
+        loiter = self.kinds == "loiter"
+        self.pos[loiter] = self.anchor[loiter] + self.rng.normal(0, 6, (loiter.sum(), 2))
+        pace = self.kinds == "pace"
+        self.pos[pace, 0] = self.anchor[pace, 0] + 120 * np.sin(self.t * 0.75 + self.phase[pace])
+
+        # Churn: some people leave and new track ids appear at their spot
+        leaving = self.rng.random(n) < self.churn * self.dt
+        if leaving.any():
+            count = int(leaving.sum())
+            self.ids[leaving] = np.arange(self.next_id, self.next_id + count)
+            self.next_id += count
+
+        half = self.size / 2
+        boxes = np.hstack([self.pos - half, self.pos + half])
+        ids, classes = self.ids.copy(), np.zeros(n, dtype=int)
+
+        weapons = self.rng.poisson(self.weapon_rate) if self.weapon_rate > 0 else 0
+        if weapons and n:
+            holders = self.rng.integers(0, n, weapons)
+            centre = self.pos[holders] + [0, 20]
+            boxes = np.vstack([boxes, np.hstack([centre - 10, centre + 10])])
+            ids = np.concatenate([ids, 100000 + holders]) # Weapon tracks get their own ids
+            classes = np.concatenate([classes, self.rng.choice(Config.WEAPON_CLASSES, weapons)])
+        return boxes, ids, classes
+
+def synthetic_database(size, dim=512, seed=0):
+    """A Database object over a random watchlist (no files, no models)."""
+    from database import Database
+    rng = np.random.default_rng(seed)
+    matrix = FaceGallery.normalize(rng.standard_normal((size, dim)).astype(np.float32))
+    db = Database.__new__(Database) # Skip loading the on-disk store
+    metadata = {f"id{i}": {"role": "Suspect", "risk": "High"} for i in range(size)}
+    db._publish(FaceGallery.from_matrix(matrix, list(metadata), ["Suspect"] * size), metadata)
+    return db
+
+# --- Measurement ---
+def summarize(times_s):
+    us = np.asarray(times_s) * 1e6
+    return {"calls": int(len(us)),
+            "p50_us": round(float(np.percentile(us, 50)), 2),
+            "p99_us": round(float(np.percentile(us, 99)), 2),
+            "mean_us": round(float(us.mean()), 2)}
+
+def memory(run):
+    """Runs `run()` under tracemalloc: peak traced KiB above the start and net blocks/KiB left allocated."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    return {"peak_kib": round((peak - start_size) / 1024, 1),
+            "retained_blocks": int(sum(d.count_diff for d in diff)),
+            "retained_kib": round(sum(d.size_diff for d in diff) / 1024, 1)}
+
+def scene_frames(args, frames):
+    scene = SyntheticScene(args.tracks, args.motion, args.weapon_rate, args.churn,
+                           args.width, args.height, args.fps, args.seed)
+    return [(scene.t, fake_results(*scene.step())) for _ in range(frames)]
+
+def bench_update_tracks(args):
+    warm = scene_frames(args, args.warmup + args.frames)
+
+    def replay(record):
+        state = QuietStateManager()
+        for i, (t, results) in enumerate(warm):
+            t0 = time.perf_counter()
+            state.update_tracks(results, now=t)
+            if i >= args.warmup and record is not None:
+                record.append(time.perf_counter() - t0)
+        return state
+
+    times = []
+    state = replay(times)
+    return summarize(times), memory(lambda: replay(None)), state
+
+def bench_person_update(args):
+    scene = SyntheticScene(args.tracks, args.motion, 0.0, 0.0, args.width, args.height, args.fps, args.seed)
+    steps = [scene.step()[0] for _ in range(args.warmup + args.frames)]
+
+    def replay(record):
+        people = [Person(i, steps[0][i], 0.0) for i in range(args.tracks)]
+        for f, boxes in enumerate(steps):
+            now = f * scene.dt
+            for person, box in zip(people, boxes):
+                t0 = time.perf_counter()
+                person.update(box, now)
+                if f >= args.warmup and record is not None:
+                    record.append(time.perf_counter() - t0)
+
+    times = []
+    replay(times)
+    return summarize(times), memory(lambda: replay(None))
+
+def bench_analyze(args, state):
+    people = list(state.active_tracks.values())
+    if not people:
+        return summarize([0.0]), memory(lambda: None)
+
+    def replay(record):
+        for _ in range(max(1, args.frames // 10)):
+            for person in people:
+                t0 = time.perf_counter()
+                BehaviorEngine.analyze(person)
+                if record is not None:
+                    record.append(time.perf_counter() - t0)
+
+    times = []
+    replay(times)
+    return summarize(times), memory(lambda: replay(None))
+
+def bench_match_face(args):
+    db = synthetic_database(args.gallery)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = rng.standard_normal((args.queries, 512)).astype(np.float32)
+    for q in queries[:10]:
+        db.match_face(q, threshold=Config.FACE_MATCH_THRESHOLD)
+
+    def replay(record):
+        for q in queries:
+            t0 = time.perf_counter()
+            db.match_face(q, threshold=Config.FACE_MATCH_THRESHOLD)
+            if record is not None:
+                record.append(time.perf_counter() - t0)
+
+    times = []
+    replay(times)
+    return summarize(times), memory(lambda: replay(None))
+
+def bench_hud(args, state):
+    frame = np.random.default_rng(args.seed).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    ids = list(state.visible_ids)
+    HUD.draw(frame.copy(), ids, state) # Warm-up (fills the status bar cache)
+    canvases = [frame.copy() for _ in range(min(args.frames, 50))]
+
+    def replay(record):
+        for i in range(args.frames):
+            canvas = canvases[i % len(canvases)]
+            t0 = time.perf_counter()
+            HUD.draw(canvas, ids, state)
+            if record is not None:
+                record.append(time.perf_counter() - t0)
+
+    times = []
+    replay(times)
+    return summarize(times), memory(lambda: replay(None))
+
+def run(args):
+    timing, mem, state = bench_update_tracks(args)
+    stages = {"update_tracks": dict(timing, **mem)}
+    for name, (timing, mem) in (("person_update", bench_person_update(args)),
+                                ("analyze", bench_analyze(args, state)),
+                                ("match_face", bench_match_face(args)),
+                                ("hud_draw", bench_hud(args, state))):
+        stages[name] = dict(timing, **mem)
+
+    try:
+        import resource
+        peak_rss_mib = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) # KiB on Linux
+    except ImportError:
+        peak_rss_mib = None
+
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "opencv": cv2.__version__,
+                 "platform": platform.platform(), "machine": platform.machine(),
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "params": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")}},
+        "peak_rss_mib": peak_rss_mib,
+        "live_tracks": len(state.active_tracks),
+        "stages": stages,
+    }
+
+def compare(report, baseline):
+    """Prints the change of p50/p99/peak against an earlier report."""
+    print(f"\nvs baseline ({baseline['meta']['timestamp']}):")
+    for name, row in report["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("p50_us", "p99_us", "peak_kib"):
+            if old.get(key):
+                changes.append(f"{key} {100.0 * (row[key] - old[key]) / old[key]:+.1f}%")
+        print(f"{name:>14}  " + ", ".join(changes))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=50, help="People on screen")
+    parser.add_argument("--motion", choices=MOTIONS, default="mixed")
+    parser.add_argument("--weapon-rate", type=float, default=0.05, help="Mean weapon detections per frame")
+    parser.add_argument("--churn", type=float, default=0.02, help="Fraction of people replaced per second")
+    parser.add_argument("--gallery", type=int, default=10000, help="Watchlist identities for match_face")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=600, help="Timed frames per stage")
+    parser.add_argument("--warmup", type=int, default=300, help="Untimed frames first (fills the history)")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Earlier --json report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"{args.tracks} tracks ({args.motion}), gallery {args.gallery}, {args.frames} frames, "
+          f"{report['live_tracks']} live tracks at the end")
+    print(f"{'stage':>14}{'calls':>8}{'p50 us':>11}{'p99 us':>11}{'mean us':>11}{'peak KiB':>10}{'kept blk':>10}")
+    for name, row in report["stages"].items():
+        print(f"{name:>14}{row['calls']:>8}{row['p50_us']:>11}{row['p99_us']:>11}{row['mean_us']:>11}"
+              f"{row['peak_kib']:>10}{row['retained_blocks']:>10}")
+    print(f"peak RSS: {report['peak_rss_mib']} MiB")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
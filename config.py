@@ -1,64 +1,214 @@
-import os
-
-class Config:
-    # System Settings
-    SYSTEM_NAME = "AeroGuard Intelligence System"
-    VERSION = "2.0.0 (Airport-Grade)"
-    DEBUG_MODE = True
-
-    # Camera Settings
-    CAMERA_SOURCE = 0  # Change to RTSP URL for IP Camera
-    FRAME_WIDTH = 1280
-    FRAME_HEIGHT = 720
-    FPS = 30
-
-    # Detection & Tracking
-    # Detection & Tracking
-    YOLO_MODEL_PATH = "yolov8n.pt"
-    # Classes: 0=Person, 43=Knife, 76=Scissors. (Note: Standard COCO doesn't have 'gun' usually, but we check for it if user has custom model. 
-    # For standard YOLOv8n, we stick to Person(0), Knife(43), Scissors(76), Backpack(24), Handbag(26), Suitcase(28)
-    DETECT_CLASSES = [0, 43, 76] 
-    WEAPON_CLASSES = [43, 76] # IDs that trigger immediate red alert
-    
-    CONFIDENCE_THRESHOLD = 0.4
-    IOU_THRESHOLD = 0.5
-    TRACKER_ALGORITHM = "bytetrack" 
-
-    # Face Recognition
-    FACE_DB_PATH = os.path.join(os.getcwd(), "data", "suspects")
-    AUTHORIZED_DB_PATH = os.path.join(os.getcwd(), "data", "authorized")
-    FACE_MATCH_THRESHOLD = 0.55 # Balanced for speed and accuracy
-    
-    # OPTIMIZATION: Check frequently for new tracks, less frequently for known ones
-    FACE_CHECK_INTERVAL_FRAMES = 3 # Hyper-fast (every 3 frames)
-
-    # Behavior Analysis Thresholds
-    FPS_ESTIMATE = 30
-    LOITERING_TIME_SECONDS = 30  # Increased for realistic airport context
-    LOITERING_RADIUS_PITCH = 80 
-    PACING_REVERSALS_THRESHOLD = 4
-    SUSPICION_DECAY = 0.98 # Slower decay for more persistent tracking
-    MAX_HISTORY_POINTS = 500 
-    
-    # Suspicion Scoring Weights (Now strictly added once or time-scaled)
-    SCORE_LOITERING = 20
-    SCORE_PACING = 30
-    SCORE_WEAPON = 1000 # Instant Max Danger
-    SCORE_ABANDONED_OBJECT = 50
-
-    # Privacy
-    BLUR_FACES_DEFAULT = False 
-    SHOW_IDENTITY_IF_CLEARED = True 
-
-    # Paths
-    LOG_DIR = os.path.join(os.getcwd(), "logs")
-    SNAPSHOT_DIR = os.path.join(os.getcwd(), "snapshots")
-
-    @staticmethod
-    def setup_dirs():
-        os.makedirs(Config.FACE_DB_PATH, exist_ok=True)
-        os.makedirs(Config.AUTHORIZED_DB_PATH, exist_ok=True)
-        os.makedirs(Config.LOG_DIR, exist_ok=True)
-        os.makedirs(Config.SNAPSHOT_DIR, exist_ok=True)
-
-Config.setup_dirs()
+import os
+
+class Config:
+    # System Settings
+    SYSTEM_NAME = "AeroGuard Intelligence System"
+    VERSION = "2.0.0 (Airport-Grade)"
+    DEBUG_MODE = True
+
+    # Camera Settings
+    CAMERA_SOURCE = 0  # Change to RTSP URL for IP Camera
+    FRAME_WIDTH = 1280
+    FRAME_HEIGHT = 720
+    FPS = 30
+
+    # Pipeline
+    PIPELINE_MODE = "threaded" # "threaded" (staged, latest-frame) or "sequential" (original loop)
+    PIPELINE_QUEUE_SIZE = 2 # Max frames buffered between stages (oldest dropped when full)
+    PIPELINE_STATS_INTERVAL = 10 # Seconds between PIPELINE_STATS audit events
+
+    # Startup (startup.py): models, watchlist and camera load concurrently
+    STARTUP_PARALLEL = True # False: load one after another (same order, easier to debug)
+    STARTUP_WARMUP = True # One dummy inference per model so the first real frame is not slow
+
+    # Multi-Camera Orchestrator (orchestrator.py)
+    CAMERA_SOURCES = [CAMERA_SOURCE] # Files, RTSP URLs or device indexes
+    CAMERA_FPS_TARGET = 10 # Per-camera analysis rate
+    ORCH_WORKERS = os.cpu_count() or 4 # Scheduler threads shared by all cameras
+    ORCH_DETECTORS = 2 # Pooled YOLO instances
+    ORCH_FACE_WORKERS = 2 # Pooled face recognition threads
+
+    # Offline Batch Mode (offline.py): recorded video, segments in parallel processes
+    OFFLINE_SEGMENT_SECONDS = 300 # Source seconds per worker task
+    OFFLINE_OVERLAP_SECONDS = 2 # Warm-up before each segment; also where track ids are stitched
+    OFFLINE_BATCH = 16 # Frames per detector call
+    OFFLINE_WORKERS = max(1, (os.cpu_count() or 2) // 2) # Processes, each with its own models
+    OFFLINE_FACE_BUDGET_MS = 50 # Recognition time per frame (no live deadline offline)
+    OFFLINE_STITCH_IOU = 0.5 # Mean box IoU over the overlap to keep one id across segments
+
+    # Motion Gate (motion_gate.py): skip detection on still scenes, crop it to the moving parts
+    MOTION_GATE_ENABLED = True
+    MOTION_WIDTH = 160 # px; frames are compared at this width
+    MOTION_PIXEL_THRESHOLD = 25 # Gray-level change that counts as motion
+    MOTION_BG_ALPHA = 0.05 # Background adaptation rate (per frame)
+    MOTION_ON_FRACTION = 0.002 # Changed pixels that wake the detector (one frame suffices)
+    MOTION_OFF_FRACTION = 0.001 # Below this for MOTION_HOLD_SECONDS -> idle
+    MOTION_HOLD_SECONDS = 3.0
+    MOTION_REFRESH_SECONDS = 5.0 # Full detection at least this often, even when idle
+    MOTION_ROI_PADDING = 48 # px around the motion + track boxes
+    MOTION_ROI_MAX_FRACTION = 0.6 # Larger regions are detected full-frame
+
+    # Load Shedding (load_control.py): degrade step by step when frames fall behind
+    LOAD_CONTROL_ENABLED = True
+    LOAD_TARGET_MS = 1000 / FPS # End-to-end frame latency to hold
+    LOAD_HIGH = 1.15 # Above target x this -> next cheaper level
+    LOAD_LOW = 0.7 # Below target x this -> back towards full quality
+    LOAD_DOWN_HOLD_SECONDS = 1.0 # Sustained overload before degrading
+    LOAD_UP_HOLD_SECONDS = 5.0 # Sustained headroom before recovering (slower: avoids flapping)
+    LOAD_EWMA_ALPHA = 0.1
+    LOAD_LEVELS = [ # stride: detect every Nth frame (tracks coast in between)
+        {"stride": 1, "imgsz": 640, "face_budget_ms": 25},
+        {"stride": 1, "imgsz": 480, "face_budget_ms": 15},
+        {"stride": 2, "imgsz": 480, "face_budget_ms": 10},
+        {"stride": 2, "imgsz": 320, "face_budget_ms": 8},
+        {"stride": 3, "imgsz": 320, "face_budget_ms": 5},
+    ]
+
+    # Headless Mode & Preview (preview_server.py)
+    HEADLESS = False # No window, no overlay unless someone opens the preview
+    PREVIEW_ENABLED = False # Serve the MJPEG preview even with a window (always on when headless)
+    PREVIEW_HOST = "127.0.0.1" # Controls are loopback-only (and refuse browser requests) regardless of this
+    PREVIEW_PORT = 8080
+    PREVIEW_FPS = 5 # Render + encode rate of the preview worker
+    PREVIEW_JPEG_QUALITY = 70
+
+    # Stage Metrics (metrics.py): rolling latency percentiles + counters
+    METRICS_ENABLED = True
+    METRICS_WINDOW = 1024 # Samples kept per stage for p50/p95/p99
+    METRICS_EXPORT = False # Serve Prometheus text on METRICS_HOST:METRICS_PORT/metrics
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = 9108
+    METRICS_PREFIX = "aeroguard"
+    HUD_SHOW_METRICS = False # Stage timings in the HUD status bar
+    METRICS_HUD_STAGES = ["track", "faces"] # Stages shown there (p95)
+
+    # Detection & Tracking
+    # Detection & Tracking
+    YOLO_MODEL_PATH = "yolov8n.pt"
+    # Classes: 0=Person, 43=Knife, 76=Scissors. (Note: Standard COCO doesn't have 'gun' usually, but we check for it if user has custom model. 
+    # For standard YOLOv8n, we stick to Person(0), Knife(43), Scissors(76), Backpack(24), Handbag(26), Suitcase(28)
+    DETECT_CLASSES = [0, 43, 76] 
+    WEAPON_CLASSES = [43, 76] # IDs that trigger immediate red alert
+    
+    CONFIDENCE_THRESHOLD = 0.4
+    IOU_THRESHOLD = 0.5
+    TRACKER_ALGORITHM = "bytetrack" 
+
+    # Face Recognition
+    FACE_DB_PATH = os.path.join(os.getcwd(), "data", "suspects")
+    AUTHORIZED_DB_PATH = os.path.join(os.getcwd(), "data", "authorized")
+    EMBEDDING_STORE_DIR = os.path.join(os.getcwd(), "data", "gallery") # embeddings.f32 + manifest.json
+
+    # Enrollment (enrollment.py): new images in the folders above are embedded off the live path
+    ENROLL_REPORT_PATH = os.path.join(os.getcwd(), "data", "enrollment_report.json")
+    ENROLL_WORKERS = max(1, (os.cpu_count() or 2) - 1) # Processes for the standalone CLI
+    ENROLL_BACKGROUND_WORKERS = 1 # Processes while the live loop is running
+    ENROLL_BATCH_SIZE = 16 # Images per worker task
+    ENROLL_MULTI_FACE_RATIO = 0.5 # Reject if the 2nd face is at least this fraction of the largest
+
+    # Watchlist Hot Reload (watchlist.py): added / changed / removed files apply without a restart
+    WATCHLIST_WATCH = True # False: one enrollment pass at startup only
+    WATCHLIST_POLL_SECONDS = 2.0 # Folder scan interval (one stat per file, no reads)
+    WATCHLIST_SETTLE_SECONDS = 1.0 # Files modified more recently are still being copied: next poll
+    WATCHLIST_POOL_IDLE_SECONDS = 300 # Embedding workers are stopped after this long without changes
+    FACE_MATCH_THRESHOLD = 0.55 # Balanced for speed and accuracy
+    FACE_TILE_SIZE = 160 # Per-crop tile (px) for batched detection; small upper bodies need far less than 640
+
+    # Watchlist Index: "exact" scans every identity, "ivf" probes only the nearest clusters
+    FACE_INDEX_MODE = "exact"
+    FACE_INDEX_PATH = os.path.join(os.getcwd(), "data", "face_index.npz")
+    ANN_NPROBE = 8 # Clusters probed per query: higher = better recall, slower
+    ANN_MIN_GALLERY = 20000 # Below this size the exact scan is used even in "ivf" mode
+    
+    # Face-Check Scheduler (face_scheduler.py): new tracks first, known ones only when stale
+    FACE_BUDGET_MS = 25 # Recognition time allowed per frame
+    FACE_BUDGET_CARRY = 3 # Unused budget carries over for up to this many frames
+    FACE_INITIAL_COST_MS = 15 # Starting guess of recognition cost per crop (then measured)
+    FACE_MAX_PER_FRAME = 6 # Hard cap on crops per batch
+    FACE_RECHECK_SECONDS = 1.0 # Identified tracks are re-checked at most this often
+    FACE_MIN_CROP_WIDTH = 40 # px; narrower person boxes rarely yield a face
+    FACE_MIN_SHARPNESS = 15 # Laplacian variance of the head region below this = too blurry
+
+    # Identity Cache: each track fuses its face embeddings over time (Person.observe_face)
+    FACE_FUSION_MIN_SAMPLES = 2 # Fused samples before the normal threshold (and the cache) applies
+    FACE_SINGLE_FRAME_THRESHOLD = 0.65 # Stricter match threshold for a track's first sample
+    FACE_FUSION_MAX_WEIGHT = 10 # Cap on accumulated weight so the mean keeps adapting
+    FACE_FUSION_OUTLIER = 0.3 # A face this dissimilar to the aggregate restarts it (track id switch)
+    FACE_APPEARANCE_MIN_CORR = 0.8 # Appearance correlation above this = no drift, skip re-recognition
+    FACE_CACHE_MAX_AGE = 15 # Seconds; cached identities are re-verified at least this often
+
+    # Behavior Analysis Thresholds
+    FPS_ESTIMATE = 30
+    LOITERING_TIME_SECONDS = 30  # Increased for realistic airport context
+    LOITERING_RADIUS_PITCH = 80 
+    PACING_REVERSALS_THRESHOLD = 4
+    SUSPICION_DECAY = 0.98 # Slower decay for more persistent tracking
+    LOITERING_MIN_POINTS = 20
+    PACING_MIN_POINTS = 50
+    RUNNING_SPEED = 200 # px/s, mean over the velocity window. Threshold depends on scene
+    WALKING_SPEED = 50
+    BEHAVIOR_BATCH = True # Analyse all tracks of a frame at once (BehaviorEngine.analyze_batch)
+
+    # Track History (time-based, so it does not shrink when the FPS goes up)
+    HISTORY_SECONDS = 30 # Position window; must cover LOITERING_TIME_SECONDS
+    HISTORY_SAMPLE_SECONDS = 0.1 # One stored position per 100 ms
+    VELOCITY_WINDOW = 30 # Per-frame speeds averaged for Running/Walking/Standing
+
+    # Track Lifecycle: tentative -> active -> lost -> retired (archived summary)
+    TRACK_CONFIRM_HITS = 3 # Frames before a new id counts as a person (PERSON_ENTERED)
+    TRACK_LOST_SECONDS = 1.0 # Unseen this long = lost (kept, may come back)
+    TRACK_TTL_SECONDS = 10 # Lost this long = retired and archived
+    TRACK_ARCHIVE_DIR = os.path.join(os.getcwd(), "data", "tracks") # tracks_YYYYMMDD.jsonl
+    TRACK_ARCHIVE_BATCH = 50 # Summaries per append
+    TRACK_ARCHIVE_FLUSH_SECONDS = 30 # ...or at least this often
+    TRACK_PATH_SKETCH_POINTS = 16
+    
+    # Suspicion Scoring Weights (Now strictly added once or time-scaled)
+    SCORE_LOITERING = 20
+    SCORE_PACING = 30
+    SCORE_WEAPON = 1000 # Instant Max Danger
+    SCORE_ABANDONED_OBJECT = 50
+
+    # Alerts (alert.py): one dispatcher, per-(camera, track, type) dedup, concurrent sinks
+    ALERT_SINKS = ["audio", "spool"] # Any of "audio", "webhook", "socket", "spool"
+    ALERT_DEDUP_SECONDS = 10 # Same track + same alert type is raised at most this often
+    ALERT_QUEUE_SIZE = 1000 # Pending alerts per queue before new ones are dropped
+    ALERT_SOUND_PATH = "alert_sound.mp3"
+    ALERT_AUDIO_COOLDOWN = 2 # Seconds between siren plays
+    ALERT_WEBHOOK_URL = "http://127.0.0.1:8090/alerts"
+    ALERT_SOCKET_ADDR = ("127.0.0.1", 9099) # UDP, one JSON datagram per alert
+    ALERT_SPOOL_DIR = os.path.join(os.getcwd(), "data", "alerts") # alerts_YYYYMMDD.jsonl
+
+    # Evidence Clips (evidence.py): seconds before and after an alert, saved to SNAPSHOT_DIR
+    EVIDENCE_ENABLED = True
+    EVIDENCE_FPS = 10 # Frames buffered per second
+    EVIDENCE_WIDTH = 960 # Buffered frames are downscaled to this width
+    EVIDENCE_JPEG_QUALITY = 80
+    EVIDENCE_BUFFER_MB = 64 # Hard cap on buffered JPEG bytes per camera; oldest frames go first
+    EVIDENCE_PRE_SECONDS = 5 # Clip starts this long before the event
+    EVIDENCE_POST_SECONDS = 5 # ... and ends this long after it
+    EVIDENCE_COOLDOWN_SECONDS = 30 # Repeats of the same alert on the same track link to the first clip
+
+    # Privacy
+    BLUR_FACES_DEFAULT = False 
+    SHOW_IDENTITY_IF_CLEARED = True 
+
+    # Audit Logging (logger.py): written by a background thread
+    LOG_QUEUE_SIZE = 10000 # Pending records before LOG_DROP_POLICY applies
+    LOG_DROP_POLICY = "drop_newest" # "drop_newest", "drop_oldest" or "block" (never lose, may stall the loop)
+    LOG_BATCH_SIZE = 256 # Lines per write
+    LOG_FLUSH_SECONDS = 1.0 # Max delay before queued lines hit the file
+    LOG_COALESCE_SECONDS = 5 # Identical repeats of a track event within this window become one follow-up record (count/first_seen/last_seen of the repeats); 0 = off
+    EVENT_STORE_ENABLED = True # Also index events in SQLite for queries (event_store.py)
+    EVENT_STORE_PATH = os.path.join(os.getcwd(), "data", "events.db")
+
+    # Paths
+    LOG_DIR = os.path.join(os.getcwd(), "logs")
+    SNAPSHOT_DIR = os.path.join(os.getcwd(), "snapshots")
+
+    @staticmethod
+    def setup_dirs():
+        os.makedirs(Config.FACE_DB_PATH, exist_ok=True)
+        os.makedirs(Config.AUTHORIZED_DB_PATH, exist_ok=True)
+        os.makedirs(Config.LOG_DIR, exist_ok=True)
+        os.makedirs(Config.SNAPSHOT_DIR, exist_ok=True)
@@ -1,94 +1,213 @@
-import os
-import cv2
-import numpy as np
-import pickle
-from config import Config
-from logger import system_logger
-
-class Database:
-    def __init__(self):
-        self.suspects = {} # {name: embedding}
-        self.metadata = {} # {name: {role: "Suspect", notes: "..."}}
-        self.load_database()
-
-    def load_database(self):
-        """Loads all .npy embeddings and metadata from different categories."""
-        # Ensure directories exist
-        Config.setup_dirs()
-        
-        from face_ai import face_recognition
-        face_recognition.initialize()
-
-        categories = [
-            (Config.FACE_DB_PATH, "Suspect"),
-            (Config.AUTHORIZED_DB_PATH, "Staff")
-        ]
-
-        # 1. Auto-Ingest Images from both folders
-        for folder, role in categories:
-            for file in os.listdir(folder):
-                if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    name = os.path.splitext(file)[0]
-                    npy_path = os.path.join(folder, f"{name}.npy")
-                    
-                    if not os.path.exists(npy_path):
-                        system_logger.logger.info(f"Generating embedding for {role}: {file}...")
-                        img_path = os.path.join(folder, file)
-                        img = cv2.imread(img_path)
-                        if img is not None:
-                            emb = face_recognition.get_face(img)
-                            if emb is not None:
-                                self.add_person(name, emb, folder, role)
-                            else:
-                                system_logger.logger.warning(f"No face found in {file}")
-
-        # 2. Load Embeddings into memory
-        count = 0
-        for folder, role in categories:
-            for file in os.listdir(folder):
-                if file.endswith(".npy"):
-                    name = os.path.splitext(file)[0]
-                    embedding_path = os.path.join(folder, file)
-                    try:
-                        self.suspects[name] = np.load(embedding_path)
-                        self.metadata[name] = {"role": role, "risk": "High" if role == "Suspect" else "None"} 
-                        count += 1
-                    except Exception as e:
-                        system_logger.logger.error(f"Failed to load {name}: {e}")
-        
-        system_logger.logger.info(f"Database loaded with {count} individuals across all categories.")
-
-    def add_person(self, name, embedding, folder, role):
-        """Save embedding and update memory."""
-        path = os.path.join(folder, f"{name}.npy")
-        np.save(path, embedding)
-        self.suspects[name] = embedding
-        self.metadata[name] = {"role": role}
-        system_logger.log_event("ENTRY_ADDED", {"name": name, "role": role})
-
-    def match_face(self, target_embedding, threshold=0.5):
-        """
-        Compare target_embedding against all suspects.
-        Returns: (name, metadata, similarity_score) or (None, None, 0)
-        """
-        best_match = None
-        best_score = -1
-
-        target_norm = np.linalg.norm(target_embedding)
-
-        for name, db_emb in self.suspects.items():
-            db_norm = np.linalg.norm(db_emb)
-            # Cosine similarity
-            sim = np.dot(target_embedding, db_emb) / (target_norm * db_norm)
-            
-            if sim > best_score:
-                best_score = sim
-                best_match = name
-
-        if best_score > threshold:
-            return best_match, self.metadata.get(best_match, {}), best_score
-        
-        return None, None, 0
-
-# Singleton
-suspect_db = Database()
+import os
+import numpy as np
+import pickle
+import threading
+from config import Config
+from logger import system_logger
+from gallery import FaceGallery
+from embedding_store import EmbeddingStore
+
+class Database:
+    CATEGORIES = [
+        (Config.FACE_DB_PATH, "Suspect"),
+        (Config.AUTHORIZED_DB_PATH, "Staff")
+    ]
+
+    def __init__(self):
+        self.store = EmbeddingStore() # Single memmapped matrix + manifest on disk
+        # (FaceGallery, {name: {role: "Suspect", risk: "High"}}), published together; replaced, never modified in place
+        self._snapshot = (FaceGallery(), {})
+        self._write_lock = threading.RLock() # Serialises writers (enrollment, watchlist watcher); readers never lock
+        self.load_database()
+
+    @property
+    def gallery(self):
+        """Normalised matrix used for matching."""
+        return self._snapshot[0]
+
+    @property
+    def metadata(self):
+        return self._snapshot[1]
+
+    @property
+    def suspects(self):
+        """{name: embedding} (normalised rows of the shared gallery matrix, no copies)."""
+        gallery = self.gallery
+        return {name: gallery.matrix[row] for name, row in gallery.rows.items()}
+
+    def load_database(self):
+        """
+        Maps the consolidated embedding store. Zero-copy: every process that loads
+        the database shares the embeddings through the page cache.
+        New images in the watchlist folders are enrolled by enrollment.py.
+        """
+        # Ensure directories exist
+        Config.setup_dirs()
+
+        # 1. One-shot migration from the legacy per-person .npy layout
+        if not self.store.exists():
+            migrated = self.store.migrate_from_npy(self.CATEGORIES)
+            system_logger.logger.info(f"Migrated {migrated} .npy embeddings into {self.store.root}")
+
+        # 2. Map embeddings into the gallery
+        self._load_gallery()
+
+        system_logger.logger.info(f"Database loaded with {len(self.gallery)} individuals across all categories.")
+
+    def _publish(self, gallery, metadata):
+        """Atomic swap: readers take the snapshot once per call, so they never pair old and new state."""
+        self._snapshot = (gallery, metadata)
+
+    def _load_gallery(self):
+        """Rebuilds the gallery from the store manifest."""
+        self.store.reload()
+        gallery, metadata = FaceGallery.from_matrix(self.store.open_matrix(), [], []), {}
+        self._extend_gallery(gallery, metadata)
+        self._setup_index(gallery)
+        self._publish(gallery, metadata)
+
+    def _sync_gallery(self):
+        """Maps store rows appended since the gallery was built (by us or by another process)."""
+        if self.store.count < self.gallery.row_count:
+            # The store was compacted underneath us: row numbers changed
+            return self._load_gallery()
+        gallery, metadata = self._snapshot
+        gallery, metadata = gallery.copy(), dict(metadata)
+        self._extend_gallery(gallery, metadata)
+        if gallery.index is None or gallery.index.needs_retrain(len(gallery)):
+            self._setup_index(gallery)
+        else:
+            self._save_index(gallery)
+        self._publish(gallery, metadata)
+
+    def _extend_gallery(self, gallery, metadata):
+        names, roles = [], []
+        for entry in self.store.entries[gallery.row_count:]:
+            name, role, risk, _, deleted = entry
+            if deleted:
+                names.append(None)
+            else:
+                if name in gallery.rows:
+                    gallery.remove(name)
+                names.append(name)
+                metadata[name] = {"role": role, "risk": risk}
+            roles.append(role)
+        gallery.extend(self.store.open_matrix(), names, roles)
+
+    def _setup_index(self, gallery):
+        """Attaches the approximate IVF index when Config.FACE_INDEX_MODE == "ivf" (see ann_index.py), before publishing."""
+        if Config.FACE_INDEX_MODE != "ivf" or len(gallery) < Config.ANN_MIN_GALLERY:
+            gallery.index = None
+            return
+
+        from ann_index import IVFIndex
+        index = None
+        if os.path.exists(Config.FACE_INDEX_PATH):
+            try:
+                index = IVFIndex.load(Config.FACE_INDEX_PATH, gallery)
+            except Exception as e:
+                system_logger.logger.warning(f"Rebuilding face index, could not load {Config.FACE_INDEX_PATH}: {e}")
+
+        if index is None or index.needs_retrain(len(gallery)):
+            index = IVFIndex()
+            index.train(gallery.matrix, gallery.live_rows())
+            system_logger.logger.info(f"Trained IVF face index: {index.nlist} lists over {len(gallery)} identities")
+
+        gallery.index = index
+        self._save_index(gallery)
+
+    def _save_index(self, gallery):
+        if gallery.index is not None:
+            gallery.index.save(Config.FACE_INDEX_PATH, gallery.names)
+
+    def add_person(self, name, embedding, folder, role, source_hash=None):
+        """
+        Append the embedding to the store and map it into memory.
+        `folder` is kept for compatibility; the role decides the category.
+        """
+        self.add_people([(name, embedding, role, source_hash)])
+
+    def add_people(self, items):
+        """
+        Batch version of add_person: one atomic store append for all items.
+        :param items: [(name, embedding, role, source_hash), ...]
+        """
+        if not items:
+            return
+        with self._write_lock:
+            self.store.append([(name, emb, role, "High" if role == "Suspect" else "None", source_hash)
+                               for name, emb, role, source_hash in items])
+            self._sync_gallery()
+        for name, _, role, _ in items:
+            system_logger.log_event("ENTRY_ADDED", {"name": name, "role": role})
+
+    def remove_person(self, name):
+        """Delete an identity from the store and memory. Returns False if unknown."""
+        return bool(self.remove_people([name]))
+
+    def remove_people(self, names):
+        """Batch version of remove_person: one store write and one gallery swap. Returns the names removed."""
+        with self._write_lock:
+            names = [name for name in dict.fromkeys(names) if name in self.gallery.rows]
+            if not names:
+                return []
+            self.store.delete(names)
+            gallery, metadata = self._snapshot
+            gallery, metadata = gallery.copy(), dict(metadata)
+            roles = {}
+            for name in names:
+                gallery.remove(name)
+                roles[name] = metadata.pop(name, {}).get("role")
+            self._save_index(gallery)
+            self._publish(gallery, metadata)
+        for name in names:
+            system_logger.log_event("ENTRY_REMOVED", {"name": name, "role": roles[name]})
+        return names
+
+    def match_faces(self, target_embeddings, k=5, threshold=None):
+        """
+        Batched top-k search against the whole watchlist (one matrix product).
+        :param target_embeddings: (D,) or (Q, D)
+        :param threshold: if set, only candidates scoring above it are kept
+        Returns: one list per query of (name, role, similarity_score), best first.
+        """
+        return self._match(self.gallery, target_embeddings, k, threshold)
+
+    @staticmethod
+    def _match(gallery, target_embeddings, k, threshold):
+        scores, rows = gallery.search(target_embeddings, k)
+        matches = []
+        for q_scores, q_rows in zip(scores, rows):
+            hits = []
+            for score, row in zip(q_scores, q_rows):
+                if row < 0:
+                    break
+                if threshold is not None and not score > threshold:
+                    break
+                hits.append((gallery.names[row], gallery.roles[row], float(score)))
+            matches.append(hits)
+        return matches
+
+    def match_face(self, target_embedding, threshold=0.5):
+        """
+        Compare target_embedding against all suspects.
+        Returns: (name, metadata, similarity_score) or (None, None, 0)
+        """
+        gallery, metadata = self._snapshot
+        best = self._match(gallery, target_embedding, 1, threshold)[0]
+        if best:
+            name, _, score = best[0]
+            return name, metadata.get(name, {}), score
+
+        return None, None, 0
+
+# Singleton, built on first use rather than at import (see startup.py)
+_singleton_lock = threading.Lock()
+
+def __getattr__(name):
+    if name != "suspect_db":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _singleton_lock:
+        if "suspect_db" not in globals():
+            globals()["suspect_db"] = Database()
+    return globals()["suspect_db"]
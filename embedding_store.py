@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import numpy as np
+from config import Config
+
+try:
+    import fcntl
+except ImportError: # Windows: appends are serialised per process only
+    fcntl = None
+
+def image_hash(path, chunk_size=1 << 20):
+    """Content hash of a source image (SHA-1 hex), stable across renames."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class _WriterLock:
+    """Serialises writers across threads and (on POSIX) across processes."""
+    _thread_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+class EmbeddingStore:
+    """All watchlist embeddings in one memmapped file; the manifest is the commit point, deletes are tombstones."""
+    MATRIX_FILE = "embeddings.f32" # Raw (count, dim) float32 rows, L2-normalised
+    MANIFEST_FILE = "manifest.json" # {"dim", "count", "entries": [[name, role, risk, hash, deleted], ...]}
+    LOCK_FILE = ".lock"
+
+    # Manifest entry columns
+    NAME, ROLE, RISK, HASH, DELETED = range(5)
+
+    def __init__(self, root=None):
+        self.root = root or Config.EMBEDDING_STORE_DIR
+        self.matrix_path = os.path.join(self.root, self.MATRIX_FILE)
+        self.manifest_path = os.path.join(self.root, self.MANIFEST_FILE)
+        self.lock_path = os.path.join(self.root, self.LOCK_FILE)
+        self.dim = None
+        self.entries = []
+        self.reload()
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    @property
+    def count(self):
+        """Committed rows, tombstones included."""
+        return len(self.entries)
+
+    def __len__(self):
+        return sum(1 for e in self.entries if not e[self.DELETED])
+
+    def reload(self):
+        """Re-reads the manifest (picks up appends made by other processes)."""
+        if not self.exists():
+            self.dim, self.entries = None, []
+            return
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+        self.dim = manifest["dim"]
+        self.entries = manifest["entries"][:manifest["count"]]
+
+    def open_matrix(self):
+        """Read-only (count, dim) memmap of all committed rows. Zero-copy."""
+        if not self.entries:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+
+    def live(self):
+        """Yields (row, entry) for every non-deleted identity."""
+        for row, entry in enumerate(self.entries):
+            if not entry[self.DELETED]:
+                yield row, entry
+
+    def find(self, name):
+        """Row of the live entry for `name`, or None."""
+        for row in range(self.count - 1, -1, -1):
+            entry = self.entries[row]
+            if entry[self.NAME] == name and not entry[self.DELETED]:
+                return row
+        return None
+
+    def hashes(self):
+        """Source-image hashes of live entries: {hash: name}."""
+        return {e[self.HASH]: e[self.NAME] for _, e in self.live() if e[self.HASH]}
+
+    # --- Writes ---
+    def append(self, items):
+        """
+        Atomically appends identities (a live entry with the same name is tombstoned).
+        :param items: iterable of (name, embedding, role, risk, image_hash)
+        :return: list of new row numbers
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        os.makedirs(self.root, exist_ok=True)
+        with _WriterLock(self.lock_path):
+            self.reload()
+
+            vectors = np.stack([np.asarray(item[1], dtype=np.float32).ravel() for item in items])
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {vectors.shape[1]} does not match store dim {self.dim}")
+
+            # 1. Rows first (anything past the committed count is a torn write: overwrite it)
+            committed_bytes = self.count * self.dim * 4
+            mode = "r+b" if os.path.exists(self.matrix_path) else "w+b"
+            with open(self.matrix_path, mode) as f:
+                f.seek(committed_bytes)
+                f.write(vectors.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 2. Then the manifest (commit point)
+            by_name = {e[self.NAME]: row for row, e in self.live()}
+            entries = [list(e) for e in self.entries]
+            new_rows = []
+            for name, _, role, risk, source_hash in items:
+                old_row = by_name.get(name)
+                if old_row is not None:
+                    entries[old_row][self.DELETED] = True
+                by_name[name] = len(entries)
+                new_rows.append(len(entries))
+                entries.append([name, role, risk, source_hash, False])
+
+            self._write_manifest(entries)
+            self.entries = entries
+        return new_rows
+
+    def delete(self, names):
+        """Tombstones identities by name. Returns the rows that were deleted."""
+        names = set(names)
+        with _WriterLock(self.lock_path):
+            self.reload()
+            entries = [list(e) for e in self.entries]
+            deleted = []
+            for row, entry in enumerate(entries):
+                if entry[self.NAME] in names and not entry[self.DELETED]:
+                    entry[self.DELETED] = True
+                    deleted.append(row)
+            if deleted:
+                self._write_manifest(entries)
+                self.entries = entries
+        return deleted
+
+    def compact(self):
+        """Rewrites both files without tombstones (open memmaps keep the old file until reopened)."""
+        with _WriterLock(self.lock_path):
+            self.reload()
+            live = list(self.live())
+            if len(live) == self.count:
+                return 0
+
+            matrix = self.open_matrix()
+            rows = [row for row, _ in live]
+            tmp_matrix = f"{self.matrix_path}.tmp"
+            with open(tmp_matrix, "wb") as f:
+                f.write(np.ascontiguousarray(matrix[rows]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            del matrix
+            os.replace(tmp_matrix, self.matrix_path)
+
+            removed = self.count - len(live)
+            entries = [list(e) for _, e in live]
+            self._write_manifest(entries)
+            self.entries = entries
+        return removed
+
+    def _write_manifest(self, entries):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "dim": self.dim, "count": len(entries), "entries": entries},
+                      f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    # --- Migration ---
+    def migrate_from_npy(self, categories):
+        """
+        One-shot import of the legacy <folder>/<name>.npy layout (files are left in place).
+        :param categories: [(folder, role), ...]
+        """
+        items = []
+        for folder, role in categories:
+            if not os.path.isdir(folder):
+                continue
+            files = os.listdir(folder)
+            images = {os.path.splitext(f)[0]: f for f in files if f.lower().endswith(('.jpg', '.jpeg', '.png'))}
+            for file in files:
+                if not file.endswith(".npy"):
+                    continue
+                name = os.path.splitext(file)[0]
+                source_hash = image_hash(os.path.join(folder, images[name])) if name in images else None
+                risk = "High" if role == "Suspect" else "None"
+                items.append((name, np.load(os.path.join(folder, file)), role, risk, source_hash))
+
+        self.append(items)
+        if not self.exists():
+            # Nothing to import: still record that the migration ran
+            os.makedirs(self.root, exist_ok=True)
+            with _WriterLock(self.lock_path):
+                self._write_manifest([])
+        return len(items)
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidated watchlist embedding store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="Import data/suspects and data/authorized .npy files")
+    sub.add_parser("compact", help="Drop deleted rows from disk")
+    sub.add_parser("info", help="Print store statistics")
+    args = parser.parse_args()
+
+    store = EmbeddingStore()
+    if args.command == "migrate":
+        if store.exists():
+            print(f"Store already exists at {store.root} ({len(store)} identities)")
+            return 1
+        count = store.migrate_from_npy([(Config.FACE_DB_PATH, "Suspect"), (Config.AUTHORIZED_DB_PATH, "Staff")])
+        print(f"Migrated {count} identities into {store.root}")
+    elif args.command == "compact":
+        print(f"Removed {store.compact()} deleted rows")
+    else:
+        print(json.dumps({"root": store.root, "dim": store.dim, "rows": store.count, "live": len(store)}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
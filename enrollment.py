@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config import Config
+from logger import system_logger
+from embedding_store import image_hash
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# --- Worker process side ---
+def _init_worker():
+    """Loads the face model once per worker process."""
+    from face_ai import face_recognition
+    face_recognition.initialize()
+
+def _embed_batch(paths):
+    """
+    Decodes and embeds a batch of images inside a worker process.
+    Returns [(path, status, embedding_or_None, face_count), ...].
+    """
+    import cv2
+    from face_ai import face_recognition
+
+    results = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            results.append((path, "unreadable", None, 0))
+            continue
+
+        faces = face_recognition.scan_frame(img)
+        if not faces:
+            results.append((path, "no_face", None, 0))
+            continue
+
+        faces = sorted(faces, key=lambda x: (x.bbox[2]-x.bbox[0]) * (x.bbox[3]-x.bbox[1]), reverse=True)
+        if len(faces) > 1:
+            area = lambda f: (f.bbox[2]-f.bbox[0]) * (f.bbox[3]-f.bbox[1])
+            # Small background faces are fine; two comparable faces are ambiguous
+            if area(faces[1]) >= Config.ENROLL_MULTI_FACE_RATIO * area(faces[0]):
+                results.append((path, "multiple_faces", None, len(faces)))
+                continue
+
+        results.append((path, "ok", faces[0].embedding, len(faces)))
+    return results
+
+# --- Parent side ---
+class EnrollmentReport:
+    """
+    Per-image outcome keyed by content hash, persisted as JSON.
+    Images that failed are not retried until their content changes.
+    """
+    def __init__(self, path=None):
+        self.path = path or Config.ENROLL_REPORT_PATH
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                system_logger.logger.warning(f"Ignoring unreadable enrollment report {self.path}: {e}")
+
+    def record(self, source_hash, path, name, role, status, faces=0):
+        self.entries[source_hash] = {
+            "path": path, "name": name, "role": role, "status": status,
+            "faces": faces, "time": datetime.now().isoformat(),
+        }
+
+    def failed(self, source_hash):
+        entry = self.entries.get(source_hash)
+        return entry is not None and entry["status"] != "ok"
+
+    def failures(self):
+        return {h: e for h, e in self.entries.items() if e["status"] != "ok"}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+class EnrollmentPipeline:
+    """Bulk enrollment of the watchlist folders: hash, skip or reuse known content, embed the rest on a process pool."""
+    def __init__(self, db, workers=None, batch_size=None, retry_failed=False, pool=None):
+        self.db = db
+        self.workers = workers or Config.ENROLL_WORKERS
+        self.batch_size = batch_size or Config.ENROLL_BATCH_SIZE
+        self.retry_failed = retry_failed
+        self.pool = pool # Long-lived embedding pool (see make_pool); None = one pool per run
+        self.report = EnrollmentReport()
+        self.stats = {"scanned": 0, "skipped": 0, "reused": 0, "embedded": 0, "failed": 0}
+
+    def scan(self, files=None):
+        """
+        Returns (to_embed {hash: [(path, name, role), ...]}, reuse [(name, role, hash, row)]).
+        :param files: [(path, role), ...] to look at only these (added / changed) images; default: every watchlist image
+        """
+        store = self.db.store
+        store.reload()
+        enrolled_hashes = {}
+        for row, entry in store.live():
+            if entry[store.HASH]:
+                enrolled_hashes[entry[store.HASH]] = row
+        enrolled_names = {entry[store.NAME]: (entry[store.HASH], entry[store.ROLE]) for _, entry in store.live()}
+
+        if files is None:
+            files = [(os.path.join(folder, file), role) for folder, role in self.db.CATEGORIES
+                     for file in sorted(os.listdir(folder)) if file.lower().endswith(IMAGE_EXTENSIONS)]
+            # A legacy entry without a hash only counts as enrolled on a full scan; a changed file is re-embedded
+            known = (None,)
+        else:
+            known = ()
+
+        to_embed, reuse = {}, []
+        for path, role in files:
+            self.stats["scanned"] += 1
+            name = os.path.splitext(os.path.basename(path))[0]
+            try:
+                source_hash = image_hash(path)
+            except OSError:
+                continue # Removed again before we got to it
+
+            # Already enrolled from this exact content, in this role (moved between folders = re-enrolled)
+            enrolled_hash, enrolled_role = enrolled_names.get(name, (None, None))
+            if enrolled_role == role and (enrolled_hash == source_hash or enrolled_hash in known):
+                self.stats["skipped"] += 1
+            elif not self.retry_failed and self.report.failed(source_hash):
+                self.stats["skipped"] += 1
+            elif source_hash in enrolled_hashes:
+                reuse.append((name, role, source_hash, enrolled_hashes[source_hash]))
+            else:
+                to_embed.setdefault(source_hash, []).append((path, name, role))
+        return to_embed, reuse
+
+    def run(self, files=None):
+        """Scan, reuse, embed and commit; failures go to the enrollment report. Returns the stats."""
+        t0 = time.time()
+        to_embed, reuse = self.scan(files)
+
+        # Renamed / duplicated content: copy the stored vector, no model call
+        if reuse:
+            matrix = self.db.store.open_matrix()
+            self.db.add_people([(name, matrix[row], role, h) for name, role, h, row in reuse])
+            self.stats["reused"] += len(reuse)
+
+        if to_embed:
+            self._embed_all(to_embed)
+
+        self.report.save()
+        self.stats["seconds"] = round(time.time() - t0, 2)
+        system_logger.log_event("ENROLLMENT_COMPLETE", dict(self.stats))
+        return self.stats
+
+    def _embed_all(self, to_embed):
+        # One representative path per unique content hash
+        by_path = {targets[0][0]: (h, targets) for h, targets in to_embed.items()}
+        paths = list(by_path)
+        batches = [paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)]
+        system_logger.logger.info(f"Enrolling {len(paths)} images in {len(batches)} batches on {self.workers} workers")
+
+        pool = self.pool or make_pool(self.workers)
+        try:
+            for results in pool.map(_embed_batch, batches):
+                items = []
+                for path, status, embedding, faces in results:
+                    source_hash, targets = by_path[path]
+                    for target_path, name, role in targets:
+                        self.report.record(source_hash, target_path, name, role, status, faces)
+                        if status == "ok":
+                            items.append((name, embedding, role, source_hash))
+                        else:
+                            system_logger.logger.warning(f"Enrollment failed for {target_path}: {status}")
+
+                    if status == "ok":
+                        self.stats["embedded"] += 1
+                    else:
+                        self.stats["failed"] += 1
+
+                # Commit per batch: entries become matchable while the rest is still embedding
+                self.db.add_people(items)
+                self.report.save()
+        finally:
+            if self.pool is None:
+                pool.shutdown()
+
+def make_pool(workers):
+    """Embedding process pool; each worker loads the face model once."""
+    ctx = multiprocessing.get_context("spawn") # Never fork a process holding model sessions
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker)
+
+def start_background(db, workers=None):
+    """Runs one enrollment pass on a daemon thread (embedding happens in worker processes)."""
+    def _run():
+        try:
+            EnrollmentPipeline(db, workers=workers or Config.ENROLL_BACKGROUND_WORKERS).run()
+        except Exception as e:
+            system_logger.logger.error(f"Background enrollment failed: {e}")
+
+    thread = threading.Thread(target=_run, name="enrollment", daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll watchlist images from data/suspects and data/authorized")
+    parser.add_argument("--workers", type=int, help="Embedding processes (default: Config.ENROLL_WORKERS)")
+    parser.add_argument("--batch-size", type=int, help="Images per worker task (default: Config.ENROLL_BATCH_SIZE)")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry images that previously failed")
+    parser.add_argument("--failures", action="store_true", help="Only print the failure report")
+    args = parser.parse_args()
+
+    if args.failures:
+        print(json.dumps(EnrollmentReport().failures(), indent=2))
+        return 0
+
+    from database import suspect_db
+    stats = EnrollmentPipeline(suspect_db, args.workers, args.batch_size, args.retry_failed).run()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Indexed audit event store (SQLite, WAL mode).
+
+Usage:
+    python event_store.py --event IDENTIFIED --track 42 --since 14:00 --until 14:05
+    python event_store.py --event WEAPON_DETECTED --day yesterday
+    python event_store.py --name john_doe --limit 20
+    python event_store.py --import-logs        # backfill from logs/audit_*.log
+"""
+import os
+import sys
+import glob
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,            -- ISO-8601 local time, sorts chronologically
+    event TEXT NOT NULL,
+    track_id INTEGER,
+    name TEXT,
+    camera TEXT,
+    count INTEGER NOT NULL DEFAULT 1, -- > 1 for coalesced records
+    details TEXT NOT NULL        -- JSON
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_event_ts ON events (event, ts);
+CREATE INDEX IF NOT EXISTS events_track_ts ON events (track_id, ts);
+CREATE INDEX IF NOT EXISTS events_name_ts ON events (name, ts);
+"""
+
+class EventStore:
+    """Audit events indexed by time, type, track and name; batches arrive on the logger's writer thread."""
+    def __init__(self, path=None):
+        self.path = path or Config.EVENT_STORE_PATH
+        self._conn = None # Writer connection, created on first insert
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL") # Readers never block the writer
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    @staticmethod
+    def _row(payload):
+        from logger import NpEncoder
+        details = payload.get("details")
+        if not isinstance(details, dict):
+            details = {"value": details}
+        track_id = details.get("track_id")
+        camera = details.get("camera")
+        return (payload["timestamp"], payload["event"],
+                int(track_id) if track_id is not None else None,
+                details.get("name"),
+                str(camera) if camera is not None else None,
+                int(details.get("count", 1)),
+                json.dumps(details, cls=NpEncoder))
+
+    def insert(self, payloads):
+        """Inserts a batch of log payloads ({timestamp, event, details}) in one transaction."""
+        if not payloads:
+            return
+        rows = [self._row(p) for p in payloads]
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO events (ts, event, track_id, name, camera, count, details) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows)
+
+    def query(self, event=None, track_id=None, name=None, camera=None, since=None, until=None, limit=1000):
+        """
+        Events matching every given filter, oldest first.
+        :param since/until: datetime or ISO string; the range is [since, until)
+        :return: [{"timestamp", "event", "details"}, ...]
+        """
+        clauses, params = [], []
+        for column, value in (("event", event), ("track_id", track_id), ("name", name), ("camera", camera)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value) if column == "camera" else value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until.isoformat() if isinstance(until, datetime) else until)
+
+        sql = "SELECT ts, event, details FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts, id LIMIT ?"
+        params.append(int(limit))
+
+        if not os.path.exists(self.path):
+            return []
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True) # Own read connection
+        try:
+            return [{"timestamp": ts, "event": ev, "details": json.loads(details)}
+                    for ts, ev, details in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def import_logs(self, pattern=None):
+        """Backfills from audit log files (lines '... - LEVEL - {json}'). Returns the number of events."""
+        pattern = pattern or os.path.join(Config.LOG_DIR, "audit_*.log")
+        total = 0
+        for path in sorted(glob.glob(pattern)):
+            batch = []
+            with open(path, "r", errors="replace") as f:
+                for line in f:
+                    start = line.find("{")
+                    if start < 0:
+                        continue
+                    try:
+                        payload = json.loads(line[start:])
+                    except ValueError:
+                        continue
+                    if isinstance(payload, dict) and "event" in payload and "timestamp" in payload:
+                        batch.append(payload)
+            self.insert(batch)
+            total += len(batch)
+        return total
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def parse_time(value, day):
+    """ISO datetime, or HH:MM[:SS] on `day`."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.combine(day, datetime.strptime(value, "%H:%M:%S" if value.count(":") == 2 else "%H:%M").time())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--event", help="Event type, e.g. IDENTIFIED")
+    parser.add_argument("--track", type=int, help="Track id")
+    parser.add_argument("--name", help="Identity name")
+    parser.add_argument("--camera", help="Camera id")
+    parser.add_argument("--day", help="today, yesterday or YYYY-MM-DD (whole day, or the day for --since/--until times)")
+    parser.add_argument("--since", help="ISO datetime or HH:MM")
+    parser.add_argument("--until", help="ISO datetime or HH:MM (exclusive)")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--db", help=f"Store path (default: {Config.EVENT_STORE_PATH})")
+    parser.add_argument("--import-logs", action="store_true", help="Backfill from the audit log files first")
+    args = parser.parse_args()
+
+    store = EventStore(args.db)
+    if args.import_logs:
+        count = store.import_logs()
+        store.close()
+        print(f"Imported {count} events into {store.path}", file=sys.stderr)
+
+    day = datetime.now().date()
+    if args.day == "yesterday":
+        day -= timedelta(days=1)
+    elif args.day and args.day != "today":
+        day = datetime.strptime(args.day, "%Y-%m-%d").date()
+
+    since = parse_time(args.since, day) if args.since else None
+    until = parse_time(args.until, day) if args.until else None
+    if args.day and since is None and until is None:
+        since = datetime.combine(day, datetime.min.time())
+        until = since + timedelta(days=1)
+
+    for event in store.query(args.event, args.track, args.name, args.camera, since, until, args.limit):
+        print(json.dumps(event))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
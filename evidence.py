@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+import cv2
+import numpy as np
+from config import Config
+from logger import system_logger
+
+class EvidenceRecorder:
+    """Pre/post-event clips for alerts: a byte-capped JPEG ring per camera, encoded and written off the frame loop."""
+    def __init__(self, camera_id=None, width=None, fps=None, buffer_mb=None):
+        self.camera_id = camera_id
+        self.width = width or Config.EVIDENCE_WIDTH
+        self.interval = 1.0 / (fps or Config.EVIDENCE_FPS)
+        self.cap_bytes = int((buffer_mb or Config.EVIDENCE_BUFFER_MB) * 1024 * 1024)
+        self.scale = 1.0 # Frame -> buffered size, for drawing boxes on keyframes
+
+        self._ring = deque() # (t, jpeg bytes), oldest first
+        self._ring_bytes = 0
+        self._ring_lock = threading.Lock()
+        self._inbox = queue.Queue(maxsize=2) # Downscaled frames waiting for the encoder
+        self._jobs = [] # Clips waiting for their post-event frames
+        self._jobs_cond = threading.Condition()
+        self._recent = {} # {(kind, track_id): (t, clip path)} to link repeats to one clip
+        self._last_push = 0.0
+        self._stop = threading.Event()
+        self._threads = []
+        self.counters = {"buffered": 0, "dropped": 0, "evicted": 0, "clips": 0, "failed": 0}
+
+    # --- Frame loop side ---
+    def push(self, frame, now=None):
+        """Offers a frame (sampled at EVIDENCE_FPS). Never blocks: drops when the encoder is behind."""
+        now = now if now is not None else time.time()
+        if now - self._last_push < self.interval:
+            return
+        self._last_push = now
+        h, w = frame.shape[:2]
+        self.scale = min(1.0, self.width / w)
+        # The copy also protects the buffer from overlays drawn on `frame` later
+        small = cv2.resize(frame, (int(w * self.scale), int(h * self.scale)), interpolation=cv2.INTER_LINEAR) \
+            if self.scale < 1.0 else frame.copy()
+        try:
+            self._inbox.put_nowait((now, small))
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def trigger(self, kind, track_id=None, box=None, label=None, now=None):
+        """Schedules a clip around `now` and returns its .avi path; repeats within EVIDENCE_COOLDOWN_SECONDS share it."""
+        now = now if now is not None else time.time()
+        key = (kind, track_id)
+        recent = self._recent.get(key)
+        if recent is not None and now - recent[0] < Config.EVIDENCE_COOLDOWN_SECONDS:
+            return recent[1]
+
+        stamp = datetime.fromtimestamp(now)
+        folder = os.path.join(Config.SNAPSHOT_DIR, stamp.strftime("%Y%m%d"))
+        name = f"{stamp.strftime('%H%M%S_%f')[:-3]}_{kind}" + (f"_t{int(track_id)}" if track_id is not None else "")
+        if self.camera_id is not None:
+            name += f"_{self.camera_id}"
+        base = os.path.join(folder, name) # <base>.avi clip, <base>_key.jpg event frame, <base>.json metadata
+        self._recent[key] = (now, base + ".avi")
+        if len(self._recent) > 1024:
+            self._recent = {k: v for k, v in self._recent.items() if now - v[0] < Config.EVIDENCE_COOLDOWN_SECONDS}
+
+        job = {"kind": kind, "track_id": track_id, "label": label, "t": now, "base": base,
+               "box": [float(v) for v in box] if box is not None else None}
+        with self._jobs_cond:
+            self._jobs.append(job)
+            self._jobs_cond.notify()
+        return base + ".avi"
+
+    # --- Encoder thread ---
+    def _encode_loop(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, Config.EVIDENCE_JPEG_QUALITY]
+        while not self._stop.is_set():
+            try:
+                t, frame = self._inbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            ok, buf = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            data = buf.tobytes()
+            with self._ring_lock:
+                self._ring.append((t, data))
+                self._ring_bytes += len(data)
+                # Hard memory cap first, then nothing older than any clip could need
+                horizon = t - Config.EVIDENCE_PRE_SECONDS - Config.EVIDENCE_POST_SECONDS - 1.0
+                while self._ring and (self._ring_bytes > self.cap_bytes or self._ring[0][0] < horizon):
+                    _, old = self._ring.popleft()
+                    self._ring_bytes -= len(old)
+                    self.counters["evicted"] += 1
+                self.counters["buffered"] += 1
+            with self._jobs_cond:
+                self._jobs_cond.notify() # A clip may now have its post-event frames
+
+    # --- Writer thread ---
+    def _write_loop(self):
+        while True:
+            with self._jobs_cond:
+                while not self._ready_job() and not self._stop.is_set():
+                    self._jobs_cond.wait(0.5)
+                job = self._ready_job()
+                if job is None:
+                    if self._stop.is_set():
+                        return
+                    continue
+                self._jobs.remove(job)
+            try:
+                self._write(job)
+            except Exception as e:
+                self.counters["failed"] += 1
+                system_logger.logger.error(f"Evidence clip {job['base']} failed: {e}")
+
+    def _ready_job(self):
+        """The first job whose post-event window is buffered (or overdue, or shutting down)."""
+        with self._ring_lock:
+            newest = self._ring[-1][0] if self._ring else 0.0
+        now = time.time()
+        for job in self._jobs:
+            until = job["t"] + Config.EVIDENCE_POST_SECONDS
+            if newest >= until or now > until + 2.0 or self._stop.is_set():
+                return job
+        return None
+
+    def _write(self, job):
+        start, until = job["t"] - Config.EVIDENCE_PRE_SECONDS, job["t"] + Config.EVIDENCE_POST_SECONDS
+        with self._ring_lock:
+            frames = [(t, data) for t, data in self._ring if start <= t <= until]
+        if not frames:
+            system_logger.logger.warning(f"No buffered frames for evidence clip {job['base']}")
+            return
+
+        os.makedirs(os.path.dirname(job["base"]), exist_ok=True)
+        images = [cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) for _, data in frames]
+        h, w = images[0].shape[:2]
+        writer = cv2.VideoWriter(job["base"] + ".avi", cv2.VideoWriter_fourcc(*"MJPG"), 1.0 / self.interval, (w, h))
+        for image in images:
+            writer.write(image)
+        writer.release()
+
+        # Keyframe: the buffered frame closest to the event, annotated
+        index = min(range(len(frames)), key=lambda i: abs(frames[i][0] - job["t"]))
+        key = images[index]
+        if job["box"] is not None:
+            x1, y1, x2, y2 = [int(v * self.scale) for v in job["box"]]
+            cv2.rectangle(key, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        caption = f"{job['kind']} {job['label'] or ''} {datetime.fromtimestamp(job['t']).strftime('%Y-%m-%d %H:%M:%S')}"
+        cv2.putText(key, caption, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        cv2.imwrite(job["base"] + "_key.jpg", key)
+
+        meta = {"kind": job["kind"], "track_id": job["track_id"], "camera": self.camera_id, "label": job["label"],
+                "event_time": datetime.fromtimestamp(job["t"]).isoformat(),
+                "start": datetime.fromtimestamp(frames[0][0]).isoformat(),
+                "end": datetime.fromtimestamp(frames[-1][0]).isoformat(),
+                "frames": len(frames), "box": job["box"],
+                "clip": job["base"] + ".avi", "keyframe": job["base"] + "_key.jpg"}
+        with open(job["base"] + ".json", "w") as f:
+            json.dump(meta, f, indent=2)
+        self.counters["clips"] += 1
+        system_logger.log_event("EVIDENCE_SAVED", {k: meta[k] for k in ("kind", "track_id", "camera", "clip", "keyframe", "frames")})
+
+    # --- Lifecycle ---
+    def start(self):
+        for name, target in (("encode", self._encode_loop), ("write", self._write_loop)):
+            thread = threading.Thread(target=target, name=f"evidence-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Writes the pending clips with what is buffered, then stops."""
+        self._stop.set()
+        with self._jobs_cond:
+            self._jobs_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=10)
+
+    def stats(self):
+        with self._ring_lock:
+            return dict(self.counters, frames=len(self._ring), buffer_kib=self._ring_bytes // 1024,
+                        pending_clips=len(self._jobs))
+
+# One recorder per camera (None = the single-camera main loop)
+_recorders = {}
+
+def start(camera_id=None):
+    """Creates, registers and starts the recorder for camera_id (None when disabled)."""
+    if not Config.EVIDENCE_ENABLED:
+        return None
+    if camera_id not in _recorders:
+        _recorders[camera_id] = EvidenceRecorder(camera_id).start()
+    return _recorders[camera_id]
+
+def recorder(camera_id=None):
+    return _recorders.get(camera_id)
+
+def stop_all():
+    for rec in list(_recorders.values()):
+        rec.stop()
+    _recorders.clear()
@@ -1,48 +1,124 @@
-import cv2
-import numpy as np
-import insightface
-from config import Config
-from logger import system_logger
-
-class FaceAI:
-    def __init__(self):
-        self.model = None
-        self.is_ready = False
-
-    def initialize(self):
-        """Lazy load the model to speed up startup until needed."""
-        if self.is_ready: return
-
-        try:
-            # ctx_id=0 for GPU, -1 for CPU. usage depends on env.
-            # safe fallback to CPU if GPU fails would be nice, but insightface handles ctx_id
-            ctx = 0 if cv2.cuda.getCudaEnabledDeviceCount() > 0 else -1
-            self.model = insightface.app.FaceAnalysis(name="buffalo_l", providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
-            self.model.prepare(ctx_id=ctx, det_size=(640, 640))
-            self.is_ready = True
-            system_logger.logger.info(f"FaceAI Model initialized on ctx={ctx}")
-        except Exception as e:
-            system_logger.logger.error(f"Failed to init FaceAI: {e}")
-
-    def get_face(self, frame_crop):
-        """
-        Returns the embedding of the largest face in the crop.
-        """
-        if not self.is_ready: self.initialize()
-        
-        faces = self.model.get(frame_crop)
-        if not faces:
-            return None
-        
-        # Return the largest face (center main subject)
-        faces = sorted(faces, key=lambda x: (x.bbox[2]-x.bbox[0]) * (x.bbox[3]-x.bbox[1]), reverse=True)
-        return faces[0].embedding
-
-    def scan_frame(self, frame):
-        """
-        Returns all faces in a frame (for full scan).
-        """
-        if not self.is_ready: self.initialize()
-        return self.model.get(frame)
-
-face_recognition = FaceAI()
+import cv2
+import numpy as np
+from config import Config
+from logger import system_logger
+
+class FaceAI:
+    def __init__(self, providers=None):
+        self.model = None
+        self.is_ready = False
+        self.providers = providers or ['CUDAExecutionProvider', 'CPUExecutionProvider']
+
+    def initialize(self):
+        """Lazy load the model to speed up startup until needed."""
+        if self.is_ready: return
+
+        try:
+            # ctx_id=0 for GPU, -1 for CPU. usage depends on env.
+            # safe fallback to CPU if GPU fails would be nice, but insightface handles ctx_id
+            import insightface # Deferred: importing it (onnxruntime) is a large part of startup
+            ctx = 0 if cv2.cuda.getCudaEnabledDeviceCount() > 0 else -1
+            self.model = insightface.app.FaceAnalysis(name="buffalo_l", providers=self.providers)
+            self.model.prepare(ctx_id=ctx, det_size=(640, 640))
+            self.is_ready = True
+            system_logger.logger.info(f"FaceAI Model initialized on ctx={ctx}")
+        except Exception as e:
+            system_logger.logger.error(f"Failed to init FaceAI: {e}")
+
+    def warm_up(self):
+        """One pass of the detector (at the get_faces tile size) and the recognizer, so the first real call is not slow."""
+        if not self.is_ready: return
+        self.get_faces([np.zeros((2 * Config.FACE_TILE_SIZE, Config.FACE_TILE_SIZE, 3), dtype=np.uint8)])
+        recognizer = self.model.models.get('recognition')
+        if recognizer is not None:
+            size = recognizer.input_size[0]
+            recognizer.get_feat([np.zeros((size, size, 3), dtype=np.uint8)])
+
+    def get_face(self, frame_crop):
+        """
+        Returns the embedding of the largest face in the crop.
+        """
+        if not self.is_ready: self.initialize()
+        
+        faces = self.model.get(frame_crop)
+        if not faces:
+            return None
+        
+        # Return the largest face (center main subject)
+        faces = sorted(faces, key=lambda x: (x.bbox[2]-x.bbox[0]) * (x.bbox[3]-x.bbox[1]), reverse=True)
+        return faces[0].embedding
+
+    def scan_frame(self, frame):
+        """
+        Returns all faces in a frame (for full scan).
+        """
+        if not self.is_ready: self.initialize()
+        return self.model.get(frame)
+
+    def get_faces(self, crops, det_size=None):
+        """
+        Batched get_face: one detector pass over a canvas of tiled upper bodies, one recognition batch.
+        Returns one embedding (or None) per crop, in order.
+        """
+        if not self.is_ready: self.initialize()
+        if not crops:
+            return []
+
+        detector = self.model.models.get('detection')
+        recognizer = self.model.models.get('recognition')
+        if detector is None or recognizer is None:
+            return [self.get_face(crop) for crop in crops]
+
+        tile = max(32, int(det_size or Config.FACE_TILE_SIZE) // 32 * 32) # Detector strides need multiples of 32
+        cols = int(np.ceil(np.sqrt(len(crops))))
+        rows = int(np.ceil(len(crops) / cols))
+        canvas = np.zeros((rows * tile, cols * tile, 3), dtype=np.uint8)
+
+        # 1. Tile the upper bodies (faces are in the top part of a person box)
+        placements = [] # (x_off, y_off, scale) per crop
+        for i, crop in enumerate(crops):
+            upper = self._upper_body(crop)
+            h, w = upper.shape[:2]
+            scale = min(tile / w, tile / h)
+            tw, th = max(1, int(w * scale)), max(1, int(h * scale))
+            x_off, y_off = (i % cols) * tile, (i // cols) * tile
+            canvas[y_off:y_off + th, x_off:x_off + tw] = cv2.resize(upper, (tw, th))
+            placements.append((x_off, y_off, scale))
+
+        # 2. One detector pass over the canvas
+        bboxes, kpss = detector.detect(canvas, input_size=(canvas.shape[1], canvas.shape[0]), max_num=0, metric='default')
+        if bboxes is None or kpss is None or bboxes.shape[0] == 0:
+            return [None] * len(crops)
+
+        # Largest face per tile (same rule as get_face)
+        best = {}
+        for bbox, kps in zip(bboxes, kpss):
+            cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+            i = int(cy // tile) * cols + int(cx // tile)
+            if i >= len(crops):
+                continue
+            area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+            if i not in best or area > best[i][0]:
+                best[i] = (area, kps)
+
+        # 3. Align at full crop resolution, then ONE recognition batch
+        from insightface.utils import face_align
+        order, aligned = [], []
+        for i, (_, kps) in sorted(best.items()):
+            x_off, y_off, scale = placements[i]
+            crop_kps = (kps - np.array([x_off, y_off], dtype=np.float32)) / scale
+            aligned.append(face_align.norm_crop(crops[i], landmark=crop_kps, image_size=recognizer.input_size[0]))
+            order.append(i)
+
+        embeddings = [None] * len(crops)
+        for i, emb in zip(order, recognizer.get_feat(aligned)):
+            embeddings[i] = emb.flatten()
+        return embeddings
+
+    @staticmethod
+    def _upper_body(crop):
+        """Top of a person crop, at most 1.25x as tall as it is wide (head and shoulders)."""
+        h, w = crop.shape[:2]
+        return crop[:min(h, max(1, int(w * 1.25)))]
+
+face_recognition = FaceAI()
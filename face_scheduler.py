@@ -0,0 +1,143 @@
+import time
+import threading
+import cv2
+import numpy as np
+from config import Config
+
+class FaceCheckScheduler:
+    """Decides which tracks get a face check this frame, by value and crop quality, within a time budget."""
+    def __init__(self, budget_ms=None):
+        self.budget_ms = budget_ms if budget_ms is not None else Config.FACE_BUDGET_MS
+        self.tokens_ms = self.budget_ms
+        self.crop_cost_ms = Config.FACE_INITIAL_COST_MS # EWMA of recognition time per crop
+        self._lock = threading.Lock() # record() may run on a face worker thread
+        self.counters = {
+            "frames": 0, "considered": 0, "selected": 0,
+            "skipped_recent": 0, "skipped_cached": 0, "skipped_too_small": 0, "skipped_blurry": 0,
+            "skipped_bad_aspect": 0, "skipped_budget": 0,
+            "checks_timed": 0, "spent_ms": 0.0,
+        }
+
+    # --- Scoring ---
+    @staticmethod
+    def value(person, now):
+        """How much a fresh face check is worth for this track (0 = not needed)."""
+        since_check = now - person.last_face_check_time
+        if person.is_identified and since_check < Config.FACE_RECHECK_SECONDS:
+            return 0.0
+
+        value = 0.0 if person.is_identified else 3.0
+        rising = person.suspicion_score - person.suspicion_at_face_check
+        if rising > 0:
+            value += min(rising / 20.0, 2.0)
+        if now - person.first_seen_time < 5.0:
+            value += 1.0
+        return value + min(since_check / 10.0, 1.0)
+
+    @staticmethod
+    def appearance(frame, bbox):
+        """8x16 zero-mean grayscale thumbnail of the box: a cheap appearance signature."""
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = map(int, bbox)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        thumb = cv2.resize(cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY), (8, 16), interpolation=cv2.INTER_AREA)
+        thumb = thumb.astype(np.float32).ravel()
+        thumb -= thumb.mean()
+        norm = np.linalg.norm(thumb)
+        return thumb / norm if norm > 0 else thumb
+
+    @classmethod
+    def cached(cls, frame, person, now):
+        """True while an identified track's fused identity can be trusted without a new check."""
+        if (person.face_samples < Config.FACE_FUSION_MIN_SAMPLES or person.appearance is None
+                or now - person.last_face_check_time > Config.FACE_CACHE_MAX_AGE):
+            return False
+        current = cls.appearance(frame, person.bbox)
+        return current is not None and float(np.dot(current, person.appearance)) >= Config.FACE_APPEARANCE_MIN_CORR
+
+    @staticmethod
+    def quality(frame, bbox):
+        """
+        Cheap 0..1 estimate that the crop will produce a usable face.
+        Returns (quality, reason) where reason explains a 0.
+        """
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = map(int, bbox)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+        bw, bh = x2 - x1, y2 - y1
+        if bw < Config.FACE_MIN_CROP_WIDTH or bh <= 0:
+            return 0.0, "too_small"
+
+        # People are taller than wide; wide boxes are usually partial or merged
+        aspect = bh / bw
+        aspect_q = 1.0 if aspect >= 1.0 else max(0.0, aspect - 0.4) / 0.6
+
+        # Sharpness of the head region on a tiny grayscale copy
+        head = frame[y1:y1 + min(bh, bw), x1:x2]
+        small = cv2.resize(head, (32, 32), interpolation=cv2.INTER_AREA)
+        sharpness = cv2.Laplacian(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+        if sharpness < Config.FACE_MIN_SHARPNESS:
+            return 0.0, "blurry"
+
+        size_q = min(1.0, bw / (4 * Config.FACE_MIN_CROP_WIDTH))
+        sharp_q = min(1.0, sharpness / (4 * Config.FACE_MIN_SHARPNESS))
+        quality = size_q * sharp_q * aspect_q
+        return quality, (None if quality > 0 else "bad_aspect")
+
+    # --- Selection ---
+    def select(self, frame, people, now=None):
+        """Returns the people to check this frame and stamps their last_face_check_time."""
+        now = now if now is not None else time.time()
+        self.counters["frames"] += 1
+        with self._lock: # Token bucket: refilled per frame, charged with measured time (record)
+            self.tokens_ms = min(self.tokens_ms + self.budget_ms, self.budget_ms * Config.FACE_BUDGET_CARRY)
+
+        ranked = []
+        for person in people:
+            self.counters["considered"] += 1
+            value = self.value(person, now)
+            if value <= 0:
+                self.counters["skipped_recent"] += 1
+                continue
+            if person.is_identified and self.cached(frame, person, now):
+                self.counters["skipped_cached"] += 1
+                continue
+            quality, reason = self.quality(frame, person.bbox)
+            if quality <= 0:
+                self.counters[f"skipped_{reason}"] += 1
+                continue
+            ranked.append((value * (0.5 + 0.5 * quality), quality, person))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        with self._lock:
+            affordable = min(int(self.tokens_ms // max(self.crop_cost_ms, 1e-3)), Config.FACE_MAX_PER_FRAME)
+
+        selected = []
+        for _, quality, person in ranked[:affordable]:
+            person.last_face_check_time = now
+            person.suspicion_at_face_check = person.suspicion_score
+            person.face_check_quality = quality
+            selected.append(person)
+
+        self.counters["skipped_budget"] += len(ranked) - len(selected)
+        self.counters["selected"] += len(selected)
+        return selected
+
+    def record(self, crops, elapsed_ms):
+        """Charges the measured recognition time and updates the per-crop cost estimate."""
+        if crops <= 0:
+            return
+        with self._lock:
+            self.tokens_ms -= elapsed_ms
+            self.crop_cost_ms = 0.8 * self.crop_cost_ms + 0.2 * (elapsed_ms / crops)
+        self.counters["checks_timed"] += crops
+        self.counters["spent_ms"] += elapsed_ms
+
+    def stats(self):
+        return dict(self.counters,
+                    spent_ms=round(self.counters["spent_ms"], 1),
+                    crop_cost_ms=round(self.crop_cost_ms, 2),
+                    budget_ms=self.budget_ms,
+                    tokens_ms=round(self.tokens_ms, 1))
@@ -0,0 +1,182 @@
+import numpy as np
+
+class FaceGallery:
+    """Watchlist embeddings as one L2-normalised float32 matrix (row i = names[i]); deleted rows are tombstoned."""
+    def __init__(self, dim=None, capacity=64):
+        self.index = None # Optional ann_index.IVFIndex, kept in sync on add/remove
+        self.dim = dim
+        self.names = [] # Per row; None = deleted
+        self.roles = []
+        self.rows = {} # {name: row} for live rows
+        self._capacity = capacity
+        self._matrix = None if dim is None else np.zeros((capacity, dim), dtype=np.float32) # Owned, or an external memmap
+        self._owned = True # False while wrapping an external (read-only) matrix
+        self._valid = None # Bool mask per row, only allocated once something is deleted
+
+    @classmethod
+    def from_matrix(cls, matrix, names, roles):
+        """Wraps an already-normalised matrix without copying it (names[i] None = deleted row)."""
+        gallery = cls(dim=matrix.shape[1] if matrix.ndim == 2 and matrix.shape[1] else None)
+        gallery._matrix = matrix
+        gallery._owned = False
+        gallery._append_rows(names, roles)
+        return gallery
+
+    def copy(self):
+        """Copy-on-write: bookkeeping and index are duplicated, the matrix is shared read-only."""
+        gallery = FaceGallery(self.dim, self._capacity)
+        gallery._matrix = self._matrix
+        gallery._owned = False
+        gallery.names = list(self.names)
+        gallery.roles = list(self.roles)
+        gallery.rows = dict(self.rows)
+        gallery._valid = None if self._valid is None else self._valid.copy()
+        gallery.index = None if self.index is None else self.index.copy()
+        return gallery
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def row_count(self):
+        """Rows in the matrix, deleted ones included."""
+        return len(self.names)
+
+    @property
+    def matrix(self):
+        """(rows, D) view of the matrix, deleted rows included."""
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:len(self.names)]
+
+    def live_rows(self):
+        if self._valid is None:
+            return np.arange(len(self.names))
+        return np.nonzero(self._valid[:len(self.names)])[0]
+
+    @staticmethod
+    def normalize(embeddings):
+        """Row-wise L2 normalisation. Zero vectors stay zero (they never match)."""
+        emb = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(emb, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return emb / norms
+
+    def _append_rows(self, names, roles):
+        for name, role in zip(names, roles):
+            row = len(self.names)
+            self.names.append(name)
+            self.roles.append(role)
+            if name is None:
+                self._mark_deleted(row)
+            else:
+                self.rows[name] = row
+        if self._valid is not None:
+            self._grow_valid(len(self.names)) # The mask must cover every row once it exists
+
+    def _grow_valid(self, rows):
+        if self._valid is None or self._valid.shape[0] < rows:
+            valid = np.ones(max(rows, 2 * len(self.names), 64), dtype=bool)
+            if self._valid is not None:
+                valid[:self._valid.shape[0]] = self._valid
+            self._valid = valid
+
+    def _mark_deleted(self, row):
+        self._grow_valid(row + 1)
+        self._valid[row] = False
+
+    def extend(self, matrix, names, roles):
+        """The external matrix grew (e.g. EmbeddingStore.append): registers the new rows, no copy."""
+        first = len(self.names)
+        self._matrix = matrix
+        self._owned = False
+        if self.dim is None and matrix.ndim == 2:
+            self.dim = matrix.shape[1]
+        self._append_rows(names, roles)
+
+        if self.index is not None:
+            new_rows = [r for r in range(first, len(self.names)) if self.names[r] is not None]
+            self.index.add_batch(new_rows, self._matrix[new_rows])
+
+    def add(self, name, embedding, role):
+        """Insert or replace one identity. Amortised O(D): the matrix grows by doubling."""
+        vec = self.normalize(embedding)[0]
+
+        if self._matrix is None:
+            self.dim = vec.shape[0]
+            self._matrix = np.zeros((self._capacity, self.dim), dtype=np.float32)
+        elif vec.shape[0] != self.dim:
+            raise ValueError(f"Embedding for {name} has dim {vec.shape[0]}, gallery expects {self.dim}")
+
+        if not self._owned:
+            # Copy-on-write: take a private, growable copy of the external matrix
+            rows = len(self.names)
+            owned = np.zeros((max(rows * 2, self._capacity), self.dim), dtype=np.float32)
+            owned[:rows] = self._matrix[:rows]
+            self._matrix = owned
+            self._owned = True
+
+        # Re-enrolment keeps the row (and therefore the original tie-break order)
+        if name in self.rows:
+            row = self.rows[name]
+            self._matrix[row] = vec
+            self.roles[row] = role
+            if self.index is not None:
+                self.index.add(row, vec)
+            return row
+
+        row = len(self.names)
+        if row == self._matrix.shape[0]:
+            grown = np.zeros((row * 2, self.dim), dtype=np.float32)
+            grown[:row] = self._matrix[:row]
+            self._matrix = grown
+
+        self._matrix[row] = vec
+        self._append_rows([name], [role])
+        if self.index is not None:
+            self.index.add(row, vec)
+        return row
+
+    def remove(self, name):
+        """Tombstones one identity: its row stays in the matrix but never matches."""
+        row = self.rows.pop(name)
+        self.names[row] = None
+        self._mark_deleted(row)
+        if self.index is not None:
+            self.index.remove(row)
+        return row
+
+    def search(self, queries, k=5, exact=False, nprobe=None):
+        """
+        Top-k cosine search (approximate index unless `exact`).
+        Returns (scores, rows), (Q, k) best first; equal scores keep the lower row first, missing slots are row -1.
+        """
+        q = self.normalize(queries)
+        n = len(self.names)
+        k = min(int(k), len(self.rows))
+        if k <= 0:
+            return np.zeros((q.shape[0], 0), dtype=np.float32), np.zeros((q.shape[0], 0), dtype=int)
+
+        if self.index is not None and not exact:
+            return self.index.search(self.matrix, q, k, nprobe)
+
+        sims = q @ self.matrix.T # (Q, N)
+        if self._valid is not None:
+            sims[:, ~self._valid[:n]] = -np.inf
+
+        if k == 1:
+            # argmax returns the first maximum: identical to the old strict '>' scan
+            rows = np.argmax(sims, axis=1)[:, None]
+            return np.take_along_axis(sims, rows, axis=1), rows
+
+        if k < n:
+            candidates = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(n), sims.shape)
+
+        cand_scores = np.take_along_axis(sims, candidates, axis=1)
+        # Sort by score desc, then row asc (lexsort: last key is primary)
+        order = np.lexsort((candidates, -cand_scores), axis=1)
+        rows = np.take_along_axis(candidates, order, axis=1)[:, :k]
+        scores = np.take_along_axis(cand_scores, order, axis=1)[:, :k]
+        return scores, rows
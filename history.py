@@ -0,0 +1,141 @@
+import math
+import numpy as np
+
+class PointRing:
+    """Fixed-capacity ring of (x, y, t) points with running sums, so behaviour checks are O(1)."""
+    __slots__ = ("capacity", "_x", "_y", "_t", "_seg", "_start", "count",
+                 "sum_x", "sum_y", "sum_xx", "sum_yy", "path_length", "_evictions")
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._x = np.zeros(self.capacity, dtype=np.float64)
+        self._y = np.zeros(self.capacity, dtype=np.float64)
+        self._t = np.zeros(self.capacity, dtype=np.float64)
+        self._seg = np.zeros(self.capacity, dtype=np.float64) # Distance from the previous point
+        self._start = 0
+        self.count = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_yy = 0.0 # Exact: centroids are integer pixels
+        self.path_length = 0.0
+        self._evictions = 0 # path_length is re-summed once per `capacity` evictions to cancel drift
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, i):
+        return (self._start + i) % self.capacity
+
+    def push(self, x, y, t):
+        if self.count == self.capacity:
+            self.pop_oldest()
+
+        seg = 0.0
+        if self.count:
+            last = self._index(self.count - 1)
+            seg = math.hypot(x - self._x[last], y - self._y[last])
+
+        i = self._index(self.count)
+        self._x[i], self._y[i], self._t[i], self._seg[i] = x, y, t, seg
+        self.count += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_yy += y * y
+        if self.count > 1:
+            self.path_length += seg
+
+    def pop_oldest(self):
+        i = self._start
+        x, y = self._x[i], self._y[i]
+        self.sum_x -= x
+        self.sum_y -= y
+        self.sum_xx -= x * x
+        self.sum_yy -= y * y
+
+        self._start = self._index(1)
+        self.count -= 1
+        if self.count:
+            # The new oldest point no longer has a predecessor
+            self.path_length -= self._seg[self._start]
+            self._seg[self._start] = 0.0
+
+        self._evictions += 1
+        if self._evictions >= self.capacity:
+            self._evictions = 0
+            idx = (self._start + np.arange(1, self.count)) % self.capacity
+            self.path_length = float(self._seg[idx].sum())
+
+    def expire(self, before_t):
+        """Drops points older than before_t (time-based window)."""
+        while self.count and self._t[self._start] < before_t:
+            self.pop_oldest()
+
+    @property
+    def first(self):
+        return self._x[self._start], self._y[self._start], self._t[self._start]
+
+    @property
+    def last(self):
+        i = self._index(self.count - 1)
+        return self._x[i], self._y[i], self._t[i]
+
+    @property
+    def span(self):
+        """Seconds covered by the ring."""
+        return self.last[2] - self.first[2] if self.count else 0.0
+
+    def std_xy(self):
+        """Population std per axis (same as np.std(points, axis=0))."""
+        n = self.count
+        mx, my = self.sum_x / n, self.sum_y / n
+        return (math.sqrt(max(self.sum_xx / n - mx * mx, 0.0)),
+                math.sqrt(max(self.sum_yy / n - my * my, 0.0)))
+
+    def displacement(self):
+        fx, fy, _ = self.first
+        lx, ly, _ = self.last
+        dx, dy = lx - fx, ly - fy
+        return math.sqrt(dx * dx + dy * dy) # Same float ops as the vectorized batch path
+
+    def points(self):
+        """Chronological (n, 3) copy of x, y, t (for drawing/export, not the hot path)."""
+        idx = self._index(np.arange(self.count))
+        return np.stack([self._x[idx], self._y[idx], self._t[idx]], axis=1)
+
+class ValueRing:
+    """Fixed-capacity ring of floats with an O(1) running mean."""
+    __slots__ = ("capacity", "_values", "_next", "count", "total", "_pushes")
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._values = np.zeros(self.capacity, dtype=np.float64)
+        self._next = 0
+        self.count = 0
+        self.total = 0.0
+        self._pushes = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, value):
+        if self.count == self.capacity:
+            self.total -= self._values[self._next]
+        else:
+            self.count += 1
+        self._values[self._next] = value
+        self.total += value
+        self._next = (self._next + 1) % self.capacity
+
+        self._pushes += 1
+        if self._pushes >= self.capacity: # Re-sum to cancel rounding drift
+            self._pushes = 0
+            self.total = float(self._values[:self.count].sum())
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def values(self):
+        """Chronological copy of the stored values."""
+        if self.count < self.capacity:
+            return self._values[:self.count].copy()
+        return np.roll(self._values, -self._next)
@@ -0,0 +1,79 @@
+import time
+from config import Config
+from logger import system_logger
+
+class LoadController:
+    """Steps down Config.LOAD_LEVELS (detection stride, detector imgsz, face budget) when frames run over target."""
+    def __init__(self, face_scheduler=None, target_ms=None, levels=None, enabled=None):
+        self.face_scheduler = face_scheduler
+        self.target_ms = target_ms or Config.LOAD_TARGET_MS
+        self.levels = levels or Config.LOAD_LEVELS
+        self.enabled = Config.LOAD_CONTROL_ENABLED if enabled is None else enabled
+        self.level = 0
+        self.latency_ms = None # EWMA
+        self._over_since = None
+        self._under_since = None
+        self.adjustments = 0
+        if self.enabled:
+            self._apply()
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def stride(self):
+        return self.settings["stride"]
+
+    @property
+    def imgsz(self):
+        return self.settings["imgsz"]
+
+    @property
+    def face_budget_ms(self):
+        return self.settings["face_budget_ms"]
+
+    def should_detect(self, frame_index):
+        """True when this frame gets a full detection pass."""
+        return frame_index % self.stride == 0
+
+    def observe(self, latency_ms, now=None):
+        """Feeds one frame's end-to-end latency. Returns True when the level changed."""
+        if not self.enabled:
+            return False
+        now = now if now is not None else time.time()
+        alpha = Config.LOAD_EWMA_ALPHA
+        self.latency_ms = latency_ms if self.latency_ms is None else (1 - alpha) * self.latency_ms + alpha * latency_ms
+
+        # Hysteresis: separate thresholds, and a longer hold to recover than to degrade
+        if self.latency_ms > self.target_ms * Config.LOAD_HIGH:
+            self._under_since = None
+            self._over_since = self._over_since or now
+            if now - self._over_since >= Config.LOAD_DOWN_HOLD_SECONDS and self.level < len(self.levels) - 1:
+                return self._set_level(self.level + 1, now, "overloaded")
+        elif self.latency_ms < self.target_ms * Config.LOAD_LOW:
+            self._over_since = None
+            self._under_since = self._under_since or now
+            if now - self._under_since >= Config.LOAD_UP_HOLD_SECONDS and self.level > 0:
+                return self._set_level(self.level - 1, now, "recovered")
+        else:
+            self._over_since = self._under_since = None
+        return False
+
+    def _set_level(self, level, now, reason):
+        previous = self.level
+        self.level = level
+        self._over_since = self._under_since = None
+        self.adjustments += 1
+        self._apply()
+        system_logger.log_event("LOAD_ADJUSTED", dict(self.settings, reason=reason, level=level, previous_level=previous,
+                                                      latency_ms=round(self.latency_ms, 1), target_ms=round(self.target_ms, 1)))
+        return True
+
+    def _apply(self):
+        if self.face_scheduler is not None:
+            self.face_scheduler.budget_ms = self.face_budget_ms
+
+    def stats(self):
+        return dict(self.settings, level=self.level, adjustments=self.adjustments, target_ms=round(self.target_ms, 1),
+                    latency_ms=round(self.latency_ms, 1) if self.latency_ms is not None else None)
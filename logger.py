@@ -1,56 +1,259 @@
-import logging
-import json
-import os
-from datetime import datetime
-from config import Config
-
-class AuditLogger:
-    def __init__(self):
-        self.log_file = os.path.join(Config.LOG_DIR, f"audit_{datetime.now().strftime('%Y%m%d')}.log")
-        
-        # Setup standard logger
-        self.logger = logging.getLogger("AeroGuard")
-        self.logger.setLevel(logging.INFO)
-        
-        # File handler
-        fh = logging.FileHandler(self.log_file)
-        fh.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(fh)
-        
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-        self.logger.addHandler(ch)
-
-    def log_event(self, event_type, details):
-        """
-        Log a structured security event.
-        :param event_type: str (e.g., "SUSPICION_ALERT", "SYSTEM_START", "ACCESS_DENIED")
-        :param details: dict (contextual info)
-        """
-        # Custom encoder to handle Numpy/YOLO types like int64
-        class NpEncoder(json.JSONEncoder):
-            def default(self, obj):
-                import numpy as np
-                if isinstance(obj, (np.integer, np.int64)):
-                    return int(obj)
-                if isinstance(obj, np.floating):
-                    return float(obj)
-                if isinstance(obj, np.ndarray):
-                    return obj.tolist()
-                return super(NpEncoder, self).default(obj)
-
-        payload = {
-            "timestamp": datetime.now().isoformat(),
-            "event": event_type,
-            "details": details
-        }
-        self.logger.info(json.dumps(payload, cls=NpEncoder))
-
-    def log_tracking(self, track_id, location, suspicion_score):
-        """High-frequency tracking log (optional, use sparingly)"""
-        # self.logger.debug(f"Track {track_id} at {location} | Score: {suspicion_score}")
-        pass
-
-# Singleton instance
-system_logger = AuditLogger()
+import logging
+import json
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from config import Config
+
+class NpEncoder(json.JSONEncoder):
+    """Handles Numpy/YOLO types like int64 in event details."""
+    def default(self, obj):
+        import numpy as np
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return super(NpEncoder, self).default(obj)
+
+class _QueueHandler(logging.Handler):
+    """Hands stdlib log records to the AuditLogger writer instead of writing inline."""
+    def __init__(self, audit_logger):
+        super().__init__()
+        self.audit_logger = audit_logger
+
+    def emit(self, record):
+        self.audit_logger._enqueue(("record", record))
+
+class AuditLogger:
+    """Audit trail: logs/audit_YYYYMMDD.log (+ console), written in batches by a background thread."""
+    def __init__(self):
+        self.log_file = None
+        self.dropped = 0
+        self._reported_drops = 0
+        self._queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        self._coalescing = {} # {(event, details json): [last payload, repeats, first repeat ts, deadline]}
+        self._sinks = [] # Extra consumers of written event payloads (see add_sink)
+        self._file = None
+        self._file_date = None
+        self._stopped = threading.Event()
+        self._io_lock = threading.RLock() # Writer thread vs. late writes during shutdown
+
+        self._file_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        self._console_format = logging.Formatter('%(levelname)s: %(message)s')
+
+        # Setup standard logger: everything goes through the writer queue
+        self.logger = logging.getLogger("AeroGuard")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(_QueueHandler(self))
+
+        # Indexed copy of every event for audit queries (event_store.py)
+        self.event_store = None
+        if Config.EVENT_STORE_ENABLED:
+            from event_store import EventStore
+            self.event_store = EventStore()
+            self.add_sink(self.event_store.insert)
+
+        self._writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # --- Producer side (frame loop) ---
+    def _enqueue(self, item):
+        if self._stopped.is_set():
+            self._write_now(item) # Late messages during shutdown
+            return
+        policy = Config.LOG_DROP_POLICY
+        if policy == "block":
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            if policy == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                    self._queue.put_nowait(item)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def log_event(self, event_type, details):
+        """
+        Log a structured security event.
+        :param event_type: str (e.g., "SUSPICION_ALERT", "SYSTEM_START", "ACCESS_DENIED")
+        :param details: dict (contextual info)
+        """
+        payload = {
+            "timestamp": datetime.now().isoformat(),
+            "event": event_type,
+            "details": details
+        }
+        self._enqueue(("event", payload))
+
+    def log_tracking(self, track_id, location, suspicion_score):
+        """High-frequency tracking log (optional, use sparingly)"""
+        # self.logger.debug(f"Track {track_id} at {location} | Score: {suspicion_score}")
+        pass
+
+    def add_sink(self, sink):
+        """
+        Registers sink(payloads) to receive every written event batch on the
+        writer thread (after coalescing), e.g. an indexed store.
+        """
+        self._sinks.append(sink)
+
+    # --- Writer thread ---
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._drain(time.time() + Config.LOG_FLUSH_SECONDS)
+            self._write_batch(batch)
+        while not self._queue.empty(): # Whatever arrived before close()
+            self._write_batch(self._drain(0))
+        self._flush_coalesced(force=True)
+
+    def _drain(self, deadline):
+        """Collects up to LOG_BATCH_SIZE items, waiting at most until deadline."""
+        batch = []
+        while len(batch) < Config.LOG_BATCH_SIZE:
+            timeout = deadline - time.time()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None: # close() wake-up
+                break
+            batch.append(item)
+        return batch
+
+    def _coalesce(self, payload, now):
+        """
+        Returns the payload to write now, or None when it was folded into an open window.
+        Grouping key: the event plus its full details (not just (event, track_id)), so only identical
+        repeats fold. The first event is written at once; repeats within LOG_COALESCE_SECONDS become one
+        follow-up record describing the suppressed repeats only: count of them, first_seen/last_seen of them.
+        """
+        details = payload["details"]
+        if Config.LOG_COALESCE_SECONDS <= 0 or not isinstance(details, dict) or "track_id" not in details:
+            return payload
+        # The whole payload is the key: only identical repeats fold (IDENTIFIED as A, then as B, stays two records)
+        key = (payload["event"], json.dumps(details, sort_keys=True, cls=NpEncoder))
+        entry = self._coalescing.get(key)
+        if entry is None:
+            self._coalescing[key] = [payload, 0, None, now + Config.LOG_COALESCE_SECONDS]
+            return payload
+        if entry[1] == 0:
+            entry[2] = payload["timestamp"] # First suppressed repeat
+        entry[0] = payload
+        entry[1] += 1
+        return None
+
+    def _flush_coalesced(self, force=False):
+        """Closes expired windows; those that absorbed repeats produce one summary record."""
+        with self._io_lock:
+            self._flush_expired(force)
+
+    def _flush_expired(self, force):
+        now = time.time()
+        summaries = []
+        for key, (payload, count, first_ts, deadline) in list(self._coalescing.items()):
+            if not force and deadline > now:
+                continue
+            del self._coalescing[key]
+            if count:
+                details = dict(payload["details"], count=count, first_seen=first_ts, last_seen=payload["timestamp"])
+                summaries.append({"timestamp": payload["timestamp"], "event": payload["event"],
+                                  "details": details, "coalesced": True})
+        if summaries:
+            self._write_lines([("INFO", json.dumps(s, cls=NpEncoder), None) for s in summaries], summaries)
+
+    def _write_batch(self, batch):
+        with self._io_lock:
+            self._write_items(batch)
+            self._flush_expired(False)
+
+    def _write_items(self, batch):
+        now = time.time()
+        lines, events = [], []
+        for kind, item in batch:
+            if kind == "record":
+                lines.append((item.levelname, None, item))
+                continue
+            payload = self._coalesce(item, now)
+            if payload is not None:
+                lines.append(("INFO", json.dumps(payload, cls=NpEncoder), None))
+                events.append(payload)
+
+        if self.dropped != self._reported_drops:
+            drop = {"timestamp": datetime.now().isoformat(), "event": "LOG_DROPPED",
+                    "details": {"dropped": self.dropped - self._reported_drops, "policy": Config.LOG_DROP_POLICY}}
+            self._reported_drops = self.dropped
+            lines.append(("WARNING", json.dumps(drop), None))
+            events.append(drop)
+
+        if lines:
+            self._write_lines(lines, events)
+
+    def _write_lines(self, lines, events):
+        file_text, console_text = [], []
+        for levelname, message, record in lines:
+            if record is None:
+                record = logging.makeLogRecord({"levelname": levelname, "msg": message, "name": self.logger.name})
+            file_text.append(self._file_format.format(record))
+            console_text.append(self._console_format.format(record))
+
+        try:
+            self._current_file().write("\n".join(file_text) + "\n")
+            self._file.flush()
+        except OSError as e:
+            print(f"Audit log write failed: {e}", file=sys.stderr)
+        sys.stderr.write("\n".join(console_text) + "\n")
+
+        for sink in self._sinks:
+            try:
+                sink(events)
+            except Exception as e:
+                print(f"Audit log sink failed: {e}", file=sys.stderr)
+
+    def _current_file(self):
+        """Daily rollover: reopens when the date changes."""
+        today = datetime.now().strftime('%Y%m%d')
+        if today != self._file_date:
+            if self._file is not None:
+                self._file.close()
+            os.makedirs(Config.LOG_DIR, exist_ok=True)
+            self.log_file = os.path.join(Config.LOG_DIR, f"audit_{today}.log")
+            self._file = open(self.log_file, "a")
+            self._file_date = today
+        return self._file
+
+    def _write_now(self, item):
+        with self._io_lock:
+            self._write_items([item])
+            self._flush_expired(True)
+
+    def close(self):
+        """Drains the queue and closes the file (also runs at interpreter exit)."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._writer.join(timeout=5)
+        if self.event_store is not None:
+            self.event_store.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_date = None
+
+# Singleton instance
+system_logger = AuditLogger()
@@ -1,113 +1,370 @@
-import cv2
-import time
-from ultralytics import YOLO
-from config import Config
-from logger import system_logger
-from state_manager import StateManager
-from hud_overlay import HUD
-from database import suspect_db
-from face_ai import face_recognition
-
-def main():
-    print(f"Starting {Config.SYSTEM_NAME}...")
-    system_logger.log_event("SYSTEM_START", {"version": Config.VERSION})
-
-    # 1. Initialize Models
-    print("Loading Detection Model...")
-    model = YOLO(Config.YOLO_MODEL_PATH)
-    
-    print("Loading Face Recognition...")
-    face_recognition.initialize() 
-
-    # 2. Initialize Camera
-    cap = cv2.VideoCapture(Config.CAMERA_SOURCE)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, Config.FRAME_WIDTH)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, Config.FRAME_HEIGHT)
-
-    if not cap.isOpened():
-        print("Error: Could not open video source.")
-        return
-
-    # 3. State Managers
-    state_manager = StateManager()
-
-    print("System Online. Press 'ESC' to exit.")
-
-    frame_count = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame_count += 1
-        
-        # A. TRACKING (Detection + ID)
-        results = model.track(frame, persist=True, verbose=False, classes=Config.DETECT_CLASSES)
-
-        # B. UPDATE STATE (Logic)
-        current_active_ids = []
-        if results[0].boxes.id is not None:
-            state_manager.update_tracks(results)
-            current_active_ids = [tid for tid in state_manager.active_tracks if tid in results[0].boxes.id.cpu().numpy()]
-
-        # C. BEHAVIOR & IDENTITY REFINEMENT
-        faces_checked = 0
-        MAX_FACES_PER_FRAME = 3 # Increased sensing speed
-        
-        active_people = [state_manager.active_tracks[tid] for tid in current_active_ids]
-        active_people.sort(key=lambda p: p.last_face_check_time)
-
-        for person in active_people:
-            tid = person.track_id
-            should_check = False
-            
-            if not person.is_identified:
-                should_check = True
-            elif (frame_count % Config.FACE_CHECK_INTERVAL_FRAMES == 0) and faces_checked < MAX_FACES_PER_FRAME:
-                if (time.time() - person.last_face_check_time) > 1.0: 
-                     should_check = True
-
-            if should_check and faces_checked < MAX_FACES_PER_FRAME:
-                faces_checked += 1
-                person.last_face_check_time = time.time()
-                
-                x1, y1, x2, y2 = map(int, person.bbox)
-                h, w = frame.shape[:2]
-                x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
-                
-                face_crop = frame[y1:y2, x1:x2]
-                if face_crop.size > 0:
-                    emb = face_recognition.get_face(face_crop)
-                    if emb is not None:
-                        name, meta, score = suspect_db.match_face(emb, Config.FACE_MATCH_THRESHOLD)
-                        if name:
-                            role = meta.get("role", "Unknown")
-                            person.set_identity(name, role, score)
-                            system_logger.log_event("IDENTIFIED", {"track_id": int(tid), "name": name, "role": role})
-                            
-                            # CEO FIX: Trigger alert sound IMMEDIATELY for suspects
-                            if role == "Suspect":
-                                import alert
-                                alert.red_alert_sound()
-
-        # D. VISUALIZATION (Overlay)
-        HUD.draw(frame, current_active_ids, state_manager)
-
-        # Show Output
-        cv2.imshow(Config.SYSTEM_NAME, frame)
-
-        # Controls
-        key = cv2.waitKey(1) & 0xFF
-        if key == 27: # ESC
-            break
-        elif key == ord('r'): # Reset
-            state_manager = StateManager()
-            print("System Reset")
-
-    # Cleanup
-    cap.release()
-    cv2.destroyAllWindows()
-    system_logger.log_event("SYSTEM_SHUTDOWN", {})
-    print("System Shutdown.")
-
-if __name__ == "__main__":
-    main()
+import cv2
+import time
+import numpy as np
+import argparse
+import threading
+from contextlib import nullcontext
+from config import Config
+import startup
+from logger import system_logger
+from state_manager import StateManager
+from hud_overlay import HUD
+import database
+from face_ai import face_recognition
+from pipeline import Pipeline
+from face_scheduler import FaceCheckScheduler
+from preview_server import PreviewServer
+from metrics import metrics, MetricsServer
+from load_control import LoadController
+from motion_gate import GatedTracker
+import watchlist
+import evidence
+import alert
+
+def detect(frame, model, load, gated=None, state_manager=None, lock=None):
+    """
+    A. TRACKING (Detection + ID). With the motion gate, returns (xyxy, ids, classes)
+    from the GatedTracker, or None when the scene is still and detection was skipped;
+    otherwise model.track results.
+    :param lock: the track state lock, held only while the visible boxes are copied
+    """
+    with metrics.timer("track"):
+        if gated is None:
+            return model.track(frame, persist=True, verbose=False, classes=Config.DETECT_CLASSES, imgsz=load.imgsz)
+        with lock or nullcontext():
+            boxes = [state_manager.active_tracks[tid].bbox for tid in state_manager.visible_ids]
+        return gated.track(frame, load.imgsz, boxes)
+
+def update_state(results, state_manager):
+    """B. UPDATE STATE (Logic). Returns the track ids visible in this frame."""
+    with metrics.timer("update_tracks"):
+        if isinstance(results, tuple): # Arrays from the GatedTracker
+            state_manager.update_from_arrays(*results)
+        elif results is not None:
+            state_manager.update_tracks(results)
+        else: # Still scene: tracks stay where they are, behaviour keeps being sampled
+            state_manager.hold()
+    metrics.gauge("active_tracks", len(state_manager.active_tracks))
+    return list(state_manager.visible_ids)
+
+def coast_state(state_manager, now=None):
+    """B'. Frame skipped by the load controller: visible tracks move on their last velocity."""
+    with metrics.timer("propagate"):
+        state_manager.propagate(now)
+    metrics.inc("frames_propagated")
+    return list(state_manager.visible_ids)
+
+def recognize_people(frame, people, lock=None):
+    """
+    Batched face recognition for the people selected this frame
+    (one detector pass + one recognition batch) and applies watchlist matches.
+    Returns the accepted matches as [(person, name, role, score)].
+    :param lock: held while the Person objects are updated (inference runs outside it)
+    """
+    h, w = frame.shape[:2]
+    crops, owners = [], []
+    for person in people:
+        x1, y1, x2, y2 = map(int, person.bbox)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+        face_crop = frame[y1:y2, x1:x2]
+        if face_crop.size > 0:
+            crops.append(face_crop)
+            owners.append(person)
+
+    with metrics.timer("get_faces"):
+        embeddings = face_recognition.get_faces(crops)
+    found = [(p, emb) for p, emb in zip(owners, embeddings) if emb is not None]
+    if not found:
+        return []
+
+    with lock or nullcontext():
+        # Match each track's FUSED embedding, not the single-frame one
+        for person, emb in found:
+            person.observe_face(emb, person.face_check_quality)
+            person.appearance = FaceCheckScheduler.appearance(frame, person.bbox)
+
+        queries = np.stack([person.face_embedding for person, _ in found])
+        with metrics.timer("match_face"):
+            matches = database.suspect_db.match_faces(queries, k=1, threshold=Config.FACE_MATCH_THRESHOLD)
+        accepted = []
+        for (person, _), hits in zip(found, matches):
+            if hits:
+                name, role, score = hits[0]
+                # A lone frame must clear a stricter bar; fused evidence uses the normal one
+                if person.face_samples < Config.FACE_FUSION_MIN_SAMPLES and score <= Config.FACE_SINGLE_FRAME_THRESHOLD:
+                    continue
+                person.set_identity(name, role, score)
+                accepted.append((person, name, role, score))
+    return accepted
+
+def identify_people(frame, people, camera_id=None, lock=None):
+    """recognize_people + audit event and alert for every match."""
+    for person, name, role, score in recognize_people(frame, people, lock):
+        details = {"track_id": int(person.track_id), "name": name, "role": role}
+        if camera_id is not None:
+            details["camera"] = camera_id
+        recorder = evidence.recorder(camera_id)
+        if role == "Suspect" and recorder is not None:
+            details["clip"] = recorder.trigger("IDENTIFIED", person.track_id, person.bbox, name)
+        system_logger.log_event("IDENTIFIED", details)
+
+        # CEO FIX: Trigger alert sound IMMEDIATELY for suspects
+        if role == "Suspect":
+            alert.raise_alert("SUSPECT_IDENTIFIED", int(person.track_id), camera_id,
+                              {"name": name, "score": round(float(score), 3), "clip": details.get("clip")})
+
+def check_faces(frame, selected, face_scheduler, camera_id=None, lock=None):
+    """
+    C. Identifies the tracks the scheduler picked and charges the time to its budget.
+    :param lock: the track state lock, when called outside it (face worker threads)
+    """
+    if not selected:
+        return
+    t0 = time.perf_counter()
+    identify_people(frame, selected, camera_id, lock)
+    elapsed = time.perf_counter() - t0
+    with lock or nullcontext():
+        face_scheduler.record(len(selected), elapsed * 1000)
+    metrics.observe("faces", elapsed)
+    metrics.inc("faces_checked", len(selected))
+
+def handle_key(key):
+    """Maps a cv2.waitKey code to a control action ("quit", "reset" or None)."""
+    key = key & 0xFF
+    if key == 27: # ESC
+        return "quit"
+    elif key == ord('r'): # Reset
+        return "reset"
+    return None
+
+def present(frame, active_ids, state_manager, preview=None, headless=False, lock=None):
+    """
+    D. VISUALIZATION + controls. With a window the overlay is drawn here;
+    headless, drawing is left to the preview worker (only while someone watches).
+    Returns the requested control action ("quit", "reset" or None).
+    """
+    action = None
+    if not headless:
+        with metrics.timer("hud_draw"):
+            if lock is not None:
+                with lock:
+                    HUD.draw(frame, active_ids, state_manager)
+            else:
+                HUD.draw(frame, active_ids, state_manager)
+        with metrics.timer("display"):
+            cv2.imshow(Config.SYSTEM_NAME, frame)
+            action = handle_key(cv2.waitKey(1))
+        if preview is not None:
+            preview.submit(frame) # Already drawn
+    elif preview is not None:
+        preview.submit(frame, active_ids, state_manager, lock)
+
+    if preview is not None:
+        action = action or preview.poll_action()
+    return action
+
+def run_sequential(cap, model, preview=None, headless=False):
+    """Original single-threaded loop: every stage runs back to back per frame."""
+    state_manager = StateManager()
+    face_scheduler = FaceCheckScheduler()
+    load = LoadController(face_scheduler)
+    gated = GatedTracker(model) if Config.MOTION_GATE_ENABLED else None
+    state_lock = threading.Lock() # Only contended by the preview worker
+    recorder = evidence.recorder()
+    last_stats_time = time.time()
+
+    frame_count = 0
+    while True:
+        with metrics.timer("capture"):
+            ret, frame = cap.read()
+        if not ret:
+            break
+        frame_count += 1
+        t_frame = time.perf_counter() # Processing only: waiting for the camera is not load
+        if recorder is not None:
+            recorder.push(frame) # Before the HUD draws on it
+
+        # A. TRACKING (Detection + ID), every load.stride frames
+        detected = load.should_detect(frame_count)
+        if detected:
+            results = detect(frame, model, load, gated, state_manager, state_lock)
+
+        with state_lock:
+            # B. UPDATE STATE (Logic)
+            current_active_ids = update_state(results, state_manager) if detected else coast_state(state_manager)
+
+            # C. BEHAVIOR & IDENTITY REFINEMENT (time-budgeted)
+            people = [state_manager.active_tracks[tid] for tid in current_active_ids]
+            with metrics.timer("face_select"):
+                selected = face_scheduler.select(frame, people)
+            check_faces(frame, selected, face_scheduler)
+
+        # D. VISUALIZATION (Overlay) + Controls
+        action = present(frame, current_active_ids, state_manager, preview, headless, state_lock)
+        frame_seconds = time.perf_counter() - t_frame
+        startup.timeline.first_frame()
+        metrics.observe("frame", frame_seconds)
+        metrics.inc("frames")
+        load.observe(frame_seconds * 1000)
+        metrics.gauge("load_level", load.level)
+        if action == "quit":
+            break
+        elif action == "reset":
+            with state_lock:
+                state_manager.close()
+                state_manager = StateManager()
+            print("System Reset")
+
+        if time.time() - last_stats_time > Config.PIPELINE_STATS_INTERVAL:
+            last_stats_time = time.time()
+            system_logger.log_event("FACE_SCHEDULER_STATS", dict(face_scheduler.stats(), load=load.stats()))
+
+    state_manager.close()
+
+def run_threaded(cap, model, preview=None, headless=False):
+    """
+    Staged pipeline: capture / track / identity run on their own threads,
+    render stays here on the main thread. See pipeline.py.
+    """
+    session = {"state_manager": StateManager()}
+    face_scheduler = FaceCheckScheduler()
+    load = LoadController(face_scheduler)
+    gated = GatedTracker(model) if Config.MOTION_GATE_ENABLED else None
+    state_lock = threading.Lock() # Guards active_tracks between track, identity and render
+    recorder = evidence.recorder()
+
+    def track_stage(packet):
+        if recorder is not None:
+            recorder.push(packet.frame, packet.captured_at) # Before the HUD draws on it
+        # Model inference stays outside the lock so the preview can render meanwhile
+        if load.should_detect(packet.index):
+            packet.results = detect(packet.frame, model, load, gated, session["state_manager"], state_lock)
+            with state_lock:
+                packet.active_ids = update_state(packet.results, session["state_manager"])
+        else:
+            with state_lock:
+                packet.active_ids = coast_state(session["state_manager"], packet.captured_at)
+        return packet
+
+    def identity_stage(packet):
+        with state_lock:
+            # Ids are from the track step; a reset since then leaves a new, empty manager
+            tracks = session["state_manager"].active_tracks
+            people = [tracks[tid] for tid in packet.active_ids if tid in tracks]
+            with metrics.timer("face_select"):
+                selected = face_scheduler.select(packet.frame, people)
+        check_faces(packet.frame, selected, face_scheduler, lock=state_lock)
+        return packet
+
+    pipeline = Pipeline(cap, track_stage, identity_stage)
+    metrics.add_collector(lambda: {"frames_dropped": sum(q.dropped for q in pipeline.queues.values())})
+    pipeline.start()
+    last_stats_time = time.time()
+
+    try:
+        for packet in pipeline.frames():
+            action = present(packet.frame, packet.active_ids, session["state_manager"], preview, headless, state_lock)
+            latency = time.time() - packet.captured_at # Capture -> displayed
+            startup.timeline.first_frame()
+            metrics.observe("frame", latency)
+            metrics.inc("frames")
+            # End to end, so queueing between stages counts too (each stage alone may still look fast)
+            load.observe(latency * 1000)
+            metrics.gauge("load_level", load.level)
+            if action == "quit":
+                break
+            elif action == "reset":
+                with state_lock:
+                    session["state_manager"].close()
+                    session["state_manager"] = StateManager()
+                print("System Reset")
+
+            if time.time() - last_stats_time > Config.PIPELINE_STATS_INTERVAL:
+                last_stats_time = time.time()
+                system_logger.log_event("PIPELINE_STATS", dict(pipeline.stats(), face_scheduler=face_scheduler.stats(),
+                                                               load=load.stats()))
+    finally:
+        pipeline.stop()
+        session["state_manager"].close()
+        system_logger.log_event("PIPELINE_STATS", dict(pipeline.stats(), face_scheduler=face_scheduler.stats(),
+                                                       load=load.stats()))
+
+def main():
+    parser = argparse.ArgumentParser(description=Config.SYSTEM_NAME)
+    parser.add_argument("--mode", choices=["threaded", "sequential"], default=Config.PIPELINE_MODE,
+                        help="threaded: staged capture/track/identity/render pipeline; sequential: original loop")
+    parser.add_argument("--headless", action="store_true", default=Config.HEADLESS,
+                        help="No window; live view and controls via the preview server")
+    parser.add_argument("--preview-port", type=int,
+                        help=f"Serve the MJPEG preview on this port (default {Config.PREVIEW_PORT} when headless)")
+    parser.add_argument("--metrics-port", type=int,
+                        help=f"Serve Prometheus metrics on this port (default {Config.METRICS_PORT} if METRICS_EXPORT)")
+    args = parser.parse_args()
+
+    print(f"Starting {Config.SYSTEM_NAME}...")
+    system_logger.log_event("SYSTEM_START", {"version": Config.VERSION, "mode": args.mode})
+
+    # 1. Models, watchlist and camera, loaded concurrently and warmed up
+    print("Loading models, watchlist and camera...")
+    Config.setup_dirs()
+    loaded = startup.load_all()
+    model, cap = loaded["detector"], loaded["camera"]
+
+    # 2. Camera (checked before any worker thread is started)
+    if not cap.isOpened():
+        print("Error: Could not open video source.")
+        return
+
+    # Alert sinks (the siren is decoded here, once)
+    alert.dispatcher.start()
+    metrics.add_collector(lambda: {"alerts_fired": alert.dispatcher.counters["raised"]})
+
+    # Pre-/post-event clips for alerts, saved under SNAPSHOT_DIR
+    if evidence.start() is not None:
+        metrics.add_collector(lambda: {"evidence_clips": evidence.recorder().counters["clips"]})
+
+    # Watchlist changes (added / changed / removed images) are applied in the background while the system runs
+    watcher = watchlist.start(database.suspect_db)
+
+    preview = None
+    if args.headless or args.preview_port is not None or Config.PREVIEW_ENABLED:
+        preview = PreviewServer(port=args.preview_port).start()
+        print(f"Preview: http://{preview.host}:{preview.port}/ (POST /control/quit or /control/reset)")
+
+    metrics_server = None
+    if args.metrics_port is not None or Config.METRICS_EXPORT:
+        metrics_server = MetricsServer(port=args.metrics_port).start()
+        print(f"Metrics: http://{metrics_server.host}:{metrics_server.port}/metrics")
+
+    print(f"System Online ({args.mode}{', headless' if args.headless else ''}). Press 'ESC' to exit.")
+
+    # 3. Main Loop
+    try:
+        if args.mode == "sequential":
+            run_sequential(cap, model, preview, args.headless)
+        else:
+            run_threaded(cap, model, preview, args.headless)
+    finally:
+        if preview is not None:
+            preview.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
+
+    # Cleanup
+    cap.release()
+    if not args.headless:
+        cv2.destroyAllWindows()
+    if watcher is not None:
+        watcher.stop()
+    alert.dispatcher.stop()
+    system_logger.log_event("ALERT_STATS", alert.dispatcher.stats())
+    if evidence.recorder() is not None:
+        system_logger.log_event("EVIDENCE_STATS", evidence.recorder().stats())
+    evidence.stop_all()
+    system_logger.log_event("STAGE_METRICS", metrics.snapshot())
+    system_logger.log_event("SYSTEM_SHUTDOWN", {})
+    print("System Shutdown.")
+
+if __name__ == "__main__":
+    main()
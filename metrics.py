@@ -0,0 +1,204 @@
+import time
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+from config import Config
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class _Window:
+    """Last `size` durations (seconds) of one stage, plus lifetime count and sum."""
+    __slots__ = ("samples", "size", "count", "total")
+
+    def __init__(self, size):
+        self.samples = np.zeros(size)
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % self.size] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self):
+        filled = self.samples[:min(self.count, self.size)]
+        if not len(filled):
+            return [0.0] * len(QUANTILES)
+        return list(np.quantile(filled, QUANTILES))
+
+class _Timer:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class Metrics:
+    """Per-stage timings, counters and gauges; recording is O(1), percentiles are computed on read."""
+    def __init__(self, window=None, enabled=None):
+        self.enabled = Config.METRICS_ENABLED if enabled is None else enabled
+        self.window = window or Config.METRICS_WINDOW
+        self.stages = {} # {name: _Window}, in first-seen order (= loop order)
+        self.counters = {}
+        self.gauges = {}
+        self._collectors = [] # fn() -> {name: count}, read at export time
+        self._lock = threading.Lock()
+        self._status = (None, "")
+        self._fps_mark = (time.time(), 0) # (time, frames) at the last status refresh
+
+    # --- Recording (hot path) ---
+    def timer(self, name):
+        """Context manager timing one run of stage `name`."""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            window = self.stages.get(name)
+            if window is None:
+                window = self.stages[name] = _Window(self.window)
+            window.add(seconds)
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def add_collector(self, fn):
+        """fn() -> {name: number}; cumulative counts owned elsewhere (e.g. queue drops), polled on export."""
+        self._collectors.append(fn)
+
+    # --- Reading ---
+    def _read(self):
+        """(stage windows as (name, quantiles in s, count, sum), counters, gauges)."""
+        with self._lock:
+            windows = [(name, w.quantiles(), w.count, w.total) for name, w in self.stages.items()]
+            counters = dict(self.counters)
+        gauges = dict(self.gauges)
+        for fn in self._collectors:
+            try:
+                counters.update(fn())
+            except Exception:
+                pass # A finished pipeline etc. must not break the export
+        return windows, counters, gauges
+
+    def snapshot(self):
+        """{"stages": {name: {p50_ms, p95_ms, p99_ms, count, sum_s}}, "counters", "gauges"}."""
+        windows, counters, gauges = self._read()
+        stages = {}
+        for name, (p50, p95, p99), count, total in windows:
+            stages[name] = {"p50_ms": round(p50 * 1000, 3), "p95_ms": round(p95 * 1000, 3),
+                            "p99_ms": round(p99 * 1000, 3), "count": count, "sum_s": round(total, 3)}
+        return {"stages": stages, "counters": counters, "gauges": gauges}
+
+    def status_text(self):
+        """Short line for the HUD status bar, recomputed at most once per second."""
+        second = int(time.time())
+        if self._status[0] != second:
+            snap = self.snapshot()
+            now, frames = time.time(), snap["counters"].get("frames", 0)
+            mark_time, mark_frames = self._fps_mark
+            self._fps_mark = (now, frames)
+            parts = []
+            if now > mark_time and frames > mark_frames:
+                parts.append(f"{(frames - mark_frames) / (now - mark_time):.1f} FPS")
+            for name in Config.METRICS_HUD_STAGES:
+                stage = snap["stages"].get(name)
+                if stage:
+                    parts.append(f"{name} p95 {stage['p95_ms']:.0f}ms")
+            if "active_tracks" in snap["gauges"]:
+                parts.append(f"tracks {snap['gauges']['active_tracks']}")
+            self._status = (second, " | ".join(parts))
+        return self._status[1]
+
+    def prometheus(self):
+        """Everything in Prometheus text exposition format."""
+        windows, counters, gauges = self._read()
+        prefix = Config.METRICS_PREFIX
+        lines = [f"# HELP {prefix}_stage_seconds Stage duration over the last {self.window} runs",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for name, values, count, total in windows:
+            for q, value in zip(QUANTILES, values):
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q}"}} {value:.9g}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total:.9g}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+        for name, value in counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in gauges.items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """GET /metrics (Prometheus text) and GET /metrics.json on a local port."""
+    def __init__(self, registry=None, host=None, port=None):
+        self.registry = registry or metrics
+        self.host = host or Config.METRICS_HOST
+        self.port = port if port is not None else Config.METRICS_PORT
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = registry.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(registry.snapshot()).encode(), "application/json"
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+# Process-wide registry
+metrics = Metrics()
@@ -0,0 +1,127 @@
+import time
+import cv2
+import numpy as np
+from config import Config
+from logger import system_logger
+from metrics import metrics
+
+class MotionGate:
+    """Cheap scene-change test in front of the detector (small blurred grayscale vs. a running-average background)."""
+    def __init__(self):
+        self.background = None # float32, small grayscale
+        self.scale = 1.0
+        self.active = False
+        self.changed_fraction = 0.0
+        self._quiet_since = None
+        self._last_detect = 0.0
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        self.scale = w / Config.MOTION_WIDTH
+        small = cv2.resize(frame, (Config.MOTION_WIDTH, max(1, int(round(h / self.scale)))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def regions(self, frame):
+        """Updates the background and returns the changed regions as full-frame [x1, y1, x2, y2] boxes."""
+        gray = self._prepare(frame)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.changed_fraction = 1.0 # First frame: everything is new
+            return [[0, 0, frame.shape[1], frame.shape[0]]]
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        mask = cv2.threshold(diff, Config.MOTION_PIXEL_THRESHOLD, 255, cv2.THRESH_BINARY)[1]
+        cv2.accumulateWeighted(gray, self.background, Config.MOTION_BG_ALPHA)
+        self.changed_fraction = cv2.countNonZero(mask) / mask.size
+        if self.changed_fraction == 0:
+            return []
+
+        mask = cv2.dilate(mask, None, iterations=2) # Merge the parts of one moving body
+        contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            boxes.append([x * self.scale, y * self.scale, (x + w) * self.scale, (y + h) * self.scale])
+        return boxes
+
+    def check(self, frame, track_boxes=(), now=None):
+        """
+        Decides how to detect on this frame.
+        Returns (detect, roi): detect=False skips the detector; roi=None is the full frame.
+        """
+        now = now if now is not None else time.time()
+        boxes = self.regions(frame)
+
+        # Hysteresis: one frame wakes the gate, idling needs MOTION_HOLD_SECONDS under the lower threshold
+        if self.changed_fraction >= Config.MOTION_ON_FRACTION:
+            self._quiet_since = None
+            if not self.active:
+                self.active = True
+                system_logger.log_event("MOTION_GATE", {"state": "active", "changed": round(self.changed_fraction, 4)})
+        elif self.active and self.changed_fraction < Config.MOTION_OFF_FRACTION:
+            self._quiet_since = self._quiet_since or now
+            if now - self._quiet_since >= Config.MOTION_HOLD_SECONDS:
+                self.active = False
+                system_logger.log_event("MOTION_GATE", {"state": "idle"})
+
+        if not self.active:
+            if now - self._last_detect < Config.MOTION_REFRESH_SECONDS:
+                return False, None
+            self._last_detect = now
+            return True, None # Periodic full check, even on a still scene
+        self._last_detect = now
+
+        # Detect where things change plus where people already are (so still ones stay tracked)
+        boxes = boxes + [list(b) for b in track_boxes]
+        if not boxes:
+            return True, None
+        h, w = frame.shape[:2]
+        pad = Config.MOTION_ROI_PADDING
+        x1 = max(0, int(min(b[0] for b in boxes)) - pad)
+        y1 = max(0, int(min(b[1] for b in boxes)) - pad)
+        x2 = min(w, int(max(b[2] for b in boxes)) + pad)
+        y2 = min(h, int(max(b[3] for b in boxes)) + pad)
+        if x2 <= x1 or y2 <= y1 or (x2 - x1) * (y2 - y1) > Config.MOTION_ROI_MAX_FRACTION * w * h:
+            return True, None
+        return True, [x1, y1, x2, y2]
+
+class GatedTracker:
+    """Detection + ByteTrack behind a MotionGate, in place of model.track (ROI crops are shifted back before tracking)."""
+    def __init__(self, model, gate=None, frame_rate=None):
+        from tracking import StreamTracker
+        self.model = model
+        self.gate = gate or MotionGate()
+        self.tracker = StreamTracker(frame_rate)
+
+    def track(self, frame, imgsz=640, track_boxes=()):
+        """Returns (xyxy, track_ids, classes), or None when the gate skipped this frame."""
+        from tracking import TRACK_DETECTION_CONF
+        with metrics.timer("motion_gate"):
+            detect, roi = self.gate.check(frame, track_boxes)
+        if not detect:
+            metrics.inc("frames_static")
+            return None
+
+        x1, y1 = 0, 0
+        image = frame
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            image = frame[y1:y2, x1:x2]
+            # A crop smaller than imgsz would only be upscaled: run it at (about) its own size
+            imgsz = min(imgsz, max(64, -(-max(x2 - x1, y2 - y1) // 32) * 32))
+            metrics.inc("detections_roi")
+        else:
+            metrics.inc("detections_full")
+
+        results = self.model.predict(image, verbose=False, classes=Config.DETECT_CLASSES, imgsz=imgsz,
+                                     conf=TRACK_DETECTION_CONF, iou=Config.IOU_THRESHOLD)
+        boxes = results[0].boxes.cpu().numpy()
+        if roi is not None:
+            from ultralytics.engine.results import Boxes
+            data = boxes.data.copy()
+            data[:, [0, 2]] += x1
+            data[:, [1, 3]] += y1
+            boxes = Boxes(data, frame.shape[:2])
+        return self.tracker.update(boxes, frame)
@@ -0,0 +1,372 @@
+"""
+Offline batch analysis of recorded video, in parallel time segments (source timestamps).
+Output: one JSON line per event, ordered by source time.
+
+Usage:
+    python offline.py clip1.mp4 clip2.mp4 --out results.jsonl --workers 4
+    python offline.py cam3_0800.mp4 --start 2024-05-01T08:00:00 --no-faces
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import cv2
+from config import Config
+from logger import system_logger, NpEncoder
+from state_manager import StateManager
+
+# Per-process models (set by _init_worker)
+_model = None
+_faces = False
+
+class OfflineStateManager(StateManager):
+    """
+    StateManager that records instead of logging/alerting live.
+    Events before `record_from` (segment warm-up) are dropped; repeats of an
+    event within LOG_COALESCE_SECONDS of source time are counted
+    on the first record (identical details only), and alerts follow ALERT_DEDUP_SECONDS, as live.
+    """
+    def __init__(self, record_from=0.0):
+        super().__init__()
+        self.record_from = record_from
+        self.frame_index = 0
+        self.now = 0.0
+        self.records = []
+        self.summaries = []
+        self._open = {} # {(event, details json): record} coalescing windows
+        self._last_alert = {} # {(kind, track_id): t}
+
+    def _record(self, event, details):
+        if self.now < self.record_from:
+            return
+        key = (event, json.dumps(details, sort_keys=True, cls=NpEncoder)) # Identical repeats only, as live
+        previous = self._open.get(key)
+        if previous is not None and self.now - previous["t"] < Config.LOG_COALESCE_SECONDS:
+            previous["details"]["count"] = previous["details"].get("count", 1) + 1
+            previous["details"]["last_t"] = round(self.now, 3)
+            return
+        record = {"frame": self.frame_index, "t": round(self.now, 3), "event": event, "details": details}
+        self._open[key] = record
+        self.records.append(record)
+
+    def _event(self, event_type, details):
+        self._record(event_type, details)
+
+    def _alert(self, kind, track_id, details, now):
+        if now < self.record_from:
+            return
+        key = (kind, track_id)
+        last = self._last_alert.get(key)
+        if last is not None and now - last < Config.ALERT_DEDUP_SECONDS:
+            return
+        self._last_alert[key] = now
+        self._record("ALERT", dict(details, kind=kind, track_id=track_id))
+
+    def _archive(self, person):
+        if person.last_seen_time < self.record_from:
+            return # Left during the warm-up: the previous segment has it
+        summary = self.archive.summarize(person)
+        del summary["camera"]
+        summary["first_t"] = round(person.first_seen_time, 3)
+        summary["last_t"] = round(person.last_seen_time, 3)
+        summary.pop("first_seen")
+        summary.pop("last_seen")
+        self.summaries.append(summary)
+
+    def close(self):
+        for person in list(self.active_tracks.values()):
+            self._retire(person)
+        self.visible_ids = []
+
+def _init_worker(faces, threads):
+    """Loads the models once per worker process."""
+    global _model, _faces
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    cv2.setNumThreads(threads)
+    from ultralytics import YOLO
+    _model = YOLO(Config.YOLO_MODEL_PATH)
+    _faces = faces
+    if faces:
+        from face_ai import face_recognition
+        import database
+        face_recognition.initialize()
+        database.suspect_db # Built on first use; load it before the first segment
+
+def probe(path):
+    """Returns (frame_count, fps) of a video file."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {path}")
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or Config.FPS
+    cap.release()
+    return frames, fps
+
+def plan_segments(path, frames, fps, segment_seconds, overlap_seconds):
+    """Splits [0, frames) into segments; each carries its warm-up start."""
+    length = max(1, int(round(segment_seconds * fps)))
+    overlap = int(round(overlap_seconds * fps))
+    tasks = []
+    for index, start in enumerate(range(0, frames, length)):
+        tasks.append({"file": path, "segment": index, "fps": fps,
+                      "warm_frame": max(0, start - overlap), "start_frame": start,
+                      "end_frame": min(frames, start + length), "overlap": overlap})
+    return tasks
+
+def process_segment(task, batch_size, stride):
+    """
+    Worker: analyses one segment. Returns its records, track summaries, the
+    tracked boxes of its warm-up (head) and last `overlap` frames (tail) for
+    stitching, and timing.
+    """
+    from tracking import StreamTracker, TRACK_DETECTION_CONF
+    from face_scheduler import FaceCheckScheduler
+
+    fps = task["fps"]
+    warm, start, end = task["warm_frame"], task["start_frame"], task["end_frame"]
+    tail_from = end - task["overlap"]
+    state = OfflineStateManager(record_from=start / fps)
+    tracker = StreamTracker(frame_rate=max(1, round(fps / stride)))
+    scheduler = FaceCheckScheduler(budget_ms=Config.OFFLINE_FACE_BUDGET_MS) if _faces else None
+    if _faces:
+        from main import recognize_people
+    head, tail = {}, {} # {frame: [(track_id, cls, box), ...]}
+
+    cap = cv2.VideoCapture(task["file"])
+    cap.set(cv2.CAP_PROP_POS_FRAMES, warm)
+    t0 = time.perf_counter()
+    index, processed = warm, 0
+    while index < end:
+        # 1. Read a batch (every `stride`-th frame)
+        frames, indexes = [], []
+        while index < end and len(frames) < batch_size:
+            ok = cap.grab()
+            if not ok:
+                end = index # Shorter than the container claimed
+                break
+            if index % stride == 0: # Global grid: neighbouring segments sample the same overlap frames
+                ok, frame = cap.retrieve()
+                if ok:
+                    frames.append(frame)
+                    indexes.append(index)
+            index += 1
+        if not frames:
+            break
+
+        # 2. One batched detector call, then tracking + state per frame in order
+        results = _model.predict(frames, verbose=False, classes=Config.DETECT_CLASSES,
+                                 conf=TRACK_DETECTION_CONF, iou=Config.IOU_THRESHOLD)
+        for frame, frame_index, result in zip(frames, indexes, results):
+            boxes, ids, classes = tracker.update(result.boxes.cpu().numpy(), frame)
+            state.frame_index, state.now = frame_index, frame_index / fps
+            state.update_from_arrays(boxes, ids, classes, state.now)
+
+            if frame_index < start or frame_index >= tail_from:
+                seen = [(int(tid), int(cls), [float(v) for v in box]) for box, tid, cls in zip(boxes, ids, classes)]
+                (head if frame_index < start else tail)[frame_index] = seen
+
+            if scheduler is not None:
+                people = [state.active_tracks[tid] for tid in state.visible_ids]
+                selected = scheduler.select(frame, people, state.now)
+                if selected:
+                    f0 = time.perf_counter()
+                    for person, name, role, score in recognize_people(frame, selected):
+                        state._record("IDENTIFIED", {"track_id": int(person.track_id), "name": name,
+                                                     "role": role, "score": round(float(score), 3)})
+                        if role == "Suspect":
+                            state._alert("SUSPECT_IDENTIFIED", int(person.track_id),
+                                         {"name": name, "score": round(float(score), 3)}, state.now)
+                    scheduler.record(len(selected), (time.perf_counter() - f0) * 1000)
+            processed += 1
+    cap.release()
+    state.close()
+
+    return {"file": task["file"], "segment": task["segment"], "records": state.records,
+            "summaries": state.summaries, "head": head, "tail": tail,
+            "frames": end - start, "processed": processed, "seconds": time.perf_counter() - t0}
+
+def _iou(a, b):
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+def stitch(tail, head, min_iou=None):
+    """
+    Matches track ids of the same class across a segment boundary (greedy on mean IoU over the shared frames).
+    tail/head: {frame: [(id, cls, box)]} from the previous and next segment. Returns {head_id: tail_id}.
+    """
+    min_iou = Config.OFFLINE_STITCH_IOU if min_iou is None else min_iou
+    shared = set(tail) & set(head)
+    if tail and head and not shared:
+        system_logger.logger.warning("Segment overlap has no common frames; track ids not stitched "
+                                     "(OFFLINE_OVERLAP_SECONDS shorter than the frame stride?)")
+    overlap, seen_tail, seen_head = {}, {}, {}
+    for frame in shared:
+        for tid, _, _ in tail[frame]:
+            seen_tail[tid] = seen_tail.get(tid, 0) + 1
+        for hid, _, _ in head[frame]:
+            seen_head[hid] = seen_head.get(hid, 0) + 1
+        for tid, tcls, tbox in tail[frame]:
+            for hid, hcls, hbox in head[frame]:
+                if tcls != hcls:
+                    continue
+                iou = _iou(tbox, hbox)
+                if iou > 0:
+                    overlap[(tid, hid)] = overlap.get((tid, hid), 0.0) + iou
+
+    scored = sorted(((total / max(seen_tail[tid], seen_head[hid]), tid, hid)
+                     for (tid, hid), total in overlap.items()), reverse=True)
+    matches, used = {}, set()
+    for score, tid, hid in scored:
+        if score < min_iou:
+            break
+        if hid in matches or tid in used:
+            continue
+        matches[hid] = tid
+        used.add(tid)
+    return matches
+
+def _merge_summary(into, summary):
+    into["first_t"] = min(into["first_t"], summary["first_t"])
+    into["last_t"] = max(into["last_t"], summary["last_t"])
+    into["dwell_seconds"] = round(into["last_t"] - into["first_t"], 1)
+    into["max_suspicion"] = max(into["max_suspicion"], summary["max_suspicion"])
+    if summary["identified"] and not into["identified"]:
+        into.update(name=summary["name"], role=summary["role"], identified=True)
+    into["alerts"] = sorted(set(into["alerts"]) | set(summary["alerts"]))
+    path = into["path"] + summary["path"]
+    picks = np.unique(np.linspace(0, len(path) - 1, min(len(path), Config.TRACK_PATH_SKETCH_POINTS)).astype(int))
+    into["path"] = [path[i] for i in picks]
+
+def assemble(results, start=None):
+    """
+    Stitches one file's segment results (in segment order) into output records
+    with file-wide track ids. `start` (datetime) adds wall-clock timestamps.
+    """
+    records, summaries = [], {}
+    ids = {} # {(segment, local_id): global_id}
+    next_id = 1
+    once = set() # (event, global_id, name): PERSON_ENTERED / IDENTIFIED across segments
+    previous = None
+
+    def global_id(segment, local):
+        nonlocal next_id
+        if (segment, local) not in ids:
+            ids[(segment, local)] = next_id
+            next_id += 1
+        return ids[(segment, local)]
+
+    for result in results:
+        segment = result["segment"]
+        if previous is not None:
+            for hid, tid in stitch(previous["tail"], result["head"]).items():
+                ids[(segment, hid)] = global_id(previous["segment"], tid)
+
+        for record in result["records"]:
+            details = dict(record["details"])
+            if "track_id" in details:
+                details["track_id"] = global_id(segment, details["track_id"])
+                if record["event"] in ("PERSON_ENTERED", "IDENTIFIED"):
+                    key = (record["event"], details["track_id"], details.get("name"))
+                    if key in once:
+                        continue
+                    once.add(key)
+            records.append(dict(record, details=details, segment=segment))
+
+        for summary in result["summaries"]:
+            gid = global_id(segment, summary["track_id"])
+            summary = dict(summary, track_id=gid)
+            if gid in summaries:
+                _merge_summary(summaries[gid], summary)
+            else:
+                summaries[gid] = summary
+        previous = result
+
+    for summary in summaries.values():
+        records.append({"segment": None, "frame": None, "t": summary["last_t"],
+                        "event": "TRACK_SUMMARY", "details": summary})
+
+    records.sort(key=lambda r: r["t"])
+    for record in records:
+        record["file"] = results[0]["file"] if results else None
+        if start is not None:
+            record["timestamp"] = (start + timedelta(seconds=record["t"])).isoformat()
+    return records
+
+def run(paths, out, workers=None, segment_seconds=None, batch_size=None, stride=1, faces=True, start=None):
+    """Analyses every file and writes the JSONL results. Returns the throughput report."""
+    workers = workers or Config.OFFLINE_WORKERS
+    cores = os.cpu_count() or 1
+    threads = max(1, cores // workers)
+    batch_size = batch_size or Config.OFFLINE_BATCH
+
+    tasks = []
+    for path in paths:
+        frames, fps = probe(path)
+        tasks += plan_segments(path, frames, fps, segment_seconds or Config.OFFLINE_SEGMENT_SECONDS,
+                               Config.OFFLINE_OVERLAP_SECONDS)
+    system_logger.log_event("OFFLINE_START", {"files": len(paths), "segments": len(tasks), "workers": workers})
+
+    t0 = time.perf_counter()
+    by_file = {path: [] for path in paths}
+    # spawn: forked CUDA / torch thread pools are not safe to reuse
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(faces, threads)) as pool:
+        futures = [pool.submit(process_segment, task, batch_size, stride) for task in tasks]
+        for future in futures:
+            result = future.result()
+            by_file[result["file"]].append(result)
+            print(f"{result['file']} segment {result['segment']}: {result['frames']} frames "
+                  f"in {result['seconds']:.1f}s ({result['processed'] / max(result['seconds'], 1e-9):.1f} fps)")
+    wall = time.perf_counter() - t0
+
+    written = 0
+    with open(out, "w") as f:
+        for path in paths:
+            for record in assemble(sorted(by_file[path], key=lambda r: r["segment"]), start):
+                f.write(json.dumps(record, cls=NpEncoder) + "\n")
+                written += 1
+
+    frames = sum(r["frames"] for results in by_file.values() for r in results)
+    fps = frames / max(wall, 1e-9)
+    report = {"files": len(paths), "segments": len(tasks), "frames": frames, "records": written,
+              "wall_seconds": round(wall, 1), "fps": round(fps, 1),
+              "workers": workers, "threads_per_worker": threads,
+              "fps_per_core": round(fps / min(cores, workers * threads), 2), "out": out}
+    system_logger.log_event("OFFLINE_COMPLETE", report)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--out", default="offline_results.jsonl")
+    parser.add_argument("--workers", type=int, default=Config.OFFLINE_WORKERS)
+    parser.add_argument("--segment-seconds", type=float, default=Config.OFFLINE_SEGMENT_SECONDS)
+    parser.add_argument("--batch", type=int, default=Config.OFFLINE_BATCH, help="Frames per detector call")
+    parser.add_argument("--stride", type=int, default=1, help="Analyse every Nth frame")
+    parser.add_argument("--no-faces", action="store_true", help="Skip face recognition")
+    parser.add_argument("--start", help="Recording start (ISO datetime) to add wall-clock timestamps")
+    args = parser.parse_args()
+
+    start = datetime.fromisoformat(args.start) if args.start else None
+    report = run(args.videos, args.out, args.workers, args.segment_seconds, args.batch,
+                 max(1, args.stride), not args.no_faces, start)
+    print(f"{report['frames']} frames in {report['wall_seconds']}s: {report['fps']} fps, "
+          f"{report['fps_per_core']} fps/core ({report['workers']} workers x {report['threads_per_worker']} threads)")
+    print(f"{report['records']} records -> {report['out']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
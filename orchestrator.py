@@ -0,0 +1,286 @@
+import os
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from config import Config
+from logger import system_logger
+from state_manager import StateManager
+from hud_overlay import HUD
+from pipeline import StageQueue, CaptureThread
+from tracking import DetectorPool, StreamTracker
+import database
+from face_scheduler import FaceCheckScheduler
+from main import check_faces, handle_key
+import evidence
+import watchlist
+import alert
+
+def parse_source(source):
+    """'0' -> device index 0; file paths and RTSP URLs are returned unchanged."""
+    return int(source) if str(source).isdigit() else source
+
+def is_live_source(source):
+    return isinstance(source, int) or "://" in str(source)
+
+class CameraStream:
+    """
+    Everything owned by ONE camera: capture thread, ByteTrack state and StateManager.
+    Models and the watchlist are shared through the Orchestrator.
+    """
+    def __init__(self, cam_id, source, fps_target, stop_event):
+        self.cam_id = cam_id
+        self.source = parse_source(source)
+        self.fps_target = float(fps_target)
+
+        self.cap = cv2.VideoCapture(self.source)
+        if isinstance(self.source, int):
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, Config.FRAME_WIDTH)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, Config.FRAME_HEIGHT)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video source for {cam_id}: {source}")
+
+        # Local files stand in for cameras: replay them at their native rate
+        realtime_fps = None if is_live_source(self.source) else (self.cap.get(cv2.CAP_PROP_FPS) or Config.FPS)
+
+        self.latest = StageQueue(f"{cam_id}.capture", 1) # latest-frame policy
+        self.capture = CaptureThread(self.cap, self.latest, stop_event, name=f"capture-{cam_id}", realtime_fps=realtime_fps)
+        self.tracker = StreamTracker(frame_rate=int(round(self.fps_target)))
+        self.state_manager = StateManager(camera_id=cam_id)
+        self.evidence = evidence.start(cam_id) # Pre-/post-event clips for this camera's alerts
+        self.face_scheduler = FaceCheckScheduler() # Per-camera recognition budget
+        self.lock = threading.Lock() # Guards state_manager between worker, face jobs and display
+
+        # Scheduling state (owned by Orchestrator._cond)
+        self.next_due = 0.0
+        self.busy = False
+        self.pending_faces = 0
+
+        # Output / stats
+        self.last_packet = None
+        self.active_ids = []
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def finished(self):
+        return self.latest.closed and self.latest.depth == 0
+
+    def face_done(self, _future=None):
+        with self.lock:
+            self.pending_faces -= 1
+
+class Orchestrator:
+    """Runs many cameras on one node: per-stream trackers and state, shared models and watchlist."""
+    def __init__(self, sources, fps_targets=None, workers=None, detectors=None, face_workers=None):
+        if not sources:
+            raise ValueError("Orchestrator needs at least one camera source")
+
+        fps_targets = list(fps_targets or [Config.CAMERA_FPS_TARGET])
+        if len(fps_targets) == 1:
+            fps_targets = fps_targets * len(sources)
+        if len(fps_targets) != len(sources):
+            raise ValueError("Give one FPS target, or one per source")
+
+        self.stop_event = threading.Event()
+        self.streams = [CameraStream(f"cam{i}", src, fps, self.stop_event)
+                        for i, (src, fps) in enumerate(zip(sources, fps_targets))]
+
+        self.worker_count = workers or Config.ORCH_WORKERS
+        self.detectors = DetectorPool(detectors or Config.ORCH_DETECTORS)
+        self.face_pool = ThreadPoolExecutor(max_workers=face_workers or Config.ORCH_FACE_WORKERS, thread_name_prefix="face")
+        self._cond = threading.Condition()
+        self._workers = []
+        self._last_stats = (time.time(), {s.cam_id: 0 for s in self.streams})
+
+    # --- Scheduling ---
+    def _next_stream(self):
+        """Blocks until an idle stream with a fresh frame is due; earliest deadline first, so overload degrades every camera evenly."""
+        with self._cond:
+            while not self.stop_event.is_set():
+                now = time.time()
+                ready = [s for s in self.streams if not s.busy and s.latest.depth > 0]
+                if ready:
+                    stream = min(ready, key=lambda s: s.next_due)
+                    if stream.next_due <= now:
+                        stream.busy = True
+                        # Don't bank credit while behind: at most one frame of catch-up
+                        stream.next_due = max(stream.next_due + 1.0 / stream.fps_target, now)
+                        return stream
+                    self._cond.wait(min(stream.next_due - now, 0.05))
+                else:
+                    if all(s.finished for s in self.streams):
+                        return None
+                    self._cond.wait(0.01)
+        return None
+
+    def _worker(self):
+        while True:
+            stream = self._next_stream()
+            if stream is None:
+                break
+            try:
+                self._process(stream)
+            except Exception as e:
+                system_logger.logger.error(f"[{stream.cam_id}] Frame processing failed: {e}")
+            finally:
+                with self._cond:
+                    stream.busy = False
+                    self._cond.notify_all()
+
+    def _process(self, stream):
+        packet = stream.latest.get(timeout=0)
+        if packet is None:
+            return
+        t0 = time.perf_counter()
+        if stream.evidence is not None:
+            stream.evidence.push(packet.frame, packet.captured_at)
+
+        # A. Detection on a pooled model, tracking on this stream's own state
+        boxes = self.detectors.detect(packet.frame)
+        xyxy, track_ids, classes = stream.tracker.update(boxes, packet.frame)
+
+        # B/C. State update and face-check selection
+        with stream.lock:
+            stream.state_manager.update_from_arrays(xyxy, track_ids, classes)
+            packet.active_ids = list(stream.state_manager.visible_ids)
+            # One face batch in flight per stream keeps the shared pool fair
+            selected = []
+            if stream.pending_faces == 0:
+                people = [stream.state_manager.active_tracks[tid] for tid in packet.active_ids]
+                selected = stream.face_scheduler.select(packet.frame, people)
+                stream.pending_faces = 1 if selected else 0
+            stream.active_ids = packet.active_ids
+            stream.last_packet = packet
+
+        if selected:
+            future = self.face_pool.submit(check_faces, packet.frame, selected, stream.face_scheduler, stream.cam_id,
+                                           stream.lock)
+            future.add_done_callback(stream.face_done)
+
+        stream.processed += 1
+        stream.busy_seconds += time.perf_counter() - t0
+
+    # --- Lifecycle ---
+    def start(self):
+        for stream in self.streams:
+            stream.capture.start()
+        for i in range(self.worker_count):
+            worker = threading.Thread(target=self._worker, name=f"orch-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        system_logger.log_event("ORCHESTRATOR_START", {
+            "cameras": {s.cam_id: str(s.source) for s in self.streams},
+            "workers": self.worker_count, "detectors": self.detectors.size,
+        })
+
+    def stop(self):
+        self.stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=2)
+        for stream in self.streams:
+            stream.capture.join(timeout=2)
+            stream.cap.release()
+            with stream.lock:
+                stream.state_manager.close()
+        self.face_pool.shutdown(wait=False)
+        evidence.stop_all()
+
+    def stats(self):
+        """Per-camera achieved FPS since the last call, plus drop/backlog counters."""
+        now = time.time()
+        last_time, last_counts = self._last_stats
+        dt = max(now - last_time, 1e-6)
+
+        stats = {}
+        for s in self.streams:
+            stats[s.cam_id] = {
+                "fps": round((s.processed - last_counts[s.cam_id]) / dt, 2),
+                "fps_target": s.fps_target,
+                "frames_read": s.capture.frames_read,
+                "frames_processed": s.processed,
+                "frames_dropped": s.latest.dropped,
+                "avg_ms": round(s.busy_seconds / s.processed * 1000, 2) if s.processed else 0.0,
+                "tracks": len(s.active_ids),
+                "pending_faces": s.pending_faces,
+                "face_scheduler": s.face_scheduler.stats(),
+            }
+        self._last_stats = (now, {s.cam_id: s.processed for s in self.streams})
+        return stats
+
+    def run(self, show=False):
+        """Runs until every source ends, ESC is pressed (show=True) or Ctrl+C."""
+        self.start()
+        last_stats_time = time.time()
+        try:
+            while not self.stop_event.is_set():
+                if all(s.finished for s in self.streams) and not any(w.is_alive() for w in self._workers):
+                    break
+
+                if show:
+                    if self._show_streams() == "quit":
+                        break
+                else:
+                    time.sleep(0.1)
+
+                if time.time() - last_stats_time > Config.PIPELINE_STATS_INTERVAL:
+                    last_stats_time = time.time()
+                    system_logger.log_event("ORCHESTRATOR_STATS", self.stats())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            system_logger.log_event("ORCHESTRATOR_STATS", self.stats())
+
+    def _show_streams(self):
+        for stream in self.streams:
+            packet = stream.last_packet
+            if packet is None:
+                continue
+            frame = packet.frame.copy() # Face jobs may still be cropping the original
+            with stream.lock:
+                HUD.draw(frame, packet.active_ids, stream.state_manager)
+            cv2.imshow(f"{Config.SYSTEM_NAME} [{stream.cam_id}]", frame)
+
+        action = handle_key(cv2.waitKey(1))
+        if action == "reset":
+            for stream in self.streams:
+                with stream.lock:
+                    stream.state_manager.close() # Archives the current tracks
+                    stream.state_manager = StateManager(camera_id=stream.cam_id)
+            print("System Reset")
+        return action
+
+def main():
+    parser = argparse.ArgumentParser(description=f"{Config.SYSTEM_NAME} - multi-camera orchestrator")
+    parser.add_argument("sources", nargs="*", help="Video files, RTSP URLs or device indexes (default: Config.CAMERA_SOURCES)")
+    parser.add_argument("--fps", type=float, nargs="+", help="FPS target: one for all cameras, or one per source")
+    parser.add_argument("--workers", type=int, help="Scheduler threads (default: Config.ORCH_WORKERS)")
+    parser.add_argument("--detectors", type=int, help="Pooled YOLO instances (default: Config.ORCH_DETECTORS)")
+    parser.add_argument("--face-workers", type=int, help="Face recognition threads (default: Config.ORCH_FACE_WORKERS)")
+    parser.add_argument("--show", action="store_true", help="Open one HUD window per camera")
+    args = parser.parse_args()
+
+    sources = args.sources or Config.CAMERA_SOURCES
+    print(f"Starting {Config.SYSTEM_NAME} with {len(sources)} camera(s)...")
+    system_logger.log_event("SYSTEM_START", {"version": Config.VERSION, "mode": "orchestrator"})
+
+    orchestrator = Orchestrator(sources, args.fps, args.workers, args.detectors, args.face_workers)
+    watcher = watchlist.start(database.suspect_db)
+    alert.dispatcher.start()
+    orchestrator.run(show=args.show)
+
+    if args.show:
+        cv2.destroyAllWindows()
+    if watcher is not None:
+        watcher.stop()
+    alert.dispatcher.stop()
+    system_logger.log_event("ALERT_STATS", alert.dispatcher.stats())
+    system_logger.log_event("SYSTEM_SHUTDOWN", {})
+    print("System Shutdown.")
+
+if __name__ == "__main__":
+    main()
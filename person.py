@@ -1,90 +1,163 @@
-import time
-import numpy as np
-from collections import deque
-from config import Config
-
-class Person:
-    def __init__(self, track_id, bbox):
-        self.track_id = track_id
-        self.bbox = bbox  # [x1, y1, x2, y2]
-        self.centroid = self._calculate_centroid(bbox)
-        
-        # Identity
-        self.face_embedding = None
-        self.name = "Unknown"
-        self.role = "Visitor" # Visitor, Staff, Suspect
-        self.is_identified = False
-        self.last_face_check_time = 0
-        
-        # Behavior History
-        self.location_history = deque(maxlen=Config.MAX_HISTORY_POINTS)
-        self.velocity_history = deque(maxlen=30)
-        self.first_seen_time = time.time()
-        self.last_seen_time = time.time()
-        
-        # State
-        self.suspicion_score = 0
-        self.active_alerts = []  # List of strings e.g. ["Loitering", "Pacing"]
-        self.movement_state = "Standing" # Standing, Walking, Running, Pacing
-        
-        # Update history init
-        self.location_history.append((self.centroid, self.last_seen_time))
-
-    def _calculate_centroid(self, bbox):
-        x1, y1, x2, y2 = bbox
-        return (int((x1 + x2) / 2), int((y1 + y2) / 2))
-
-    def update(self, bbox):
-        self.bbox = bbox
-        new_centroid = self._calculate_centroid(bbox)
-        current_time = time.time()
-        
-        # Calculate instant velocity (pixels per second)
-        dt = current_time - self.last_seen_time
-        if dt > 0:
-            dx = np.linalg.norm(np.array(new_centroid) - np.array(self.centroid))
-            velocity = dx / dt
-            self.velocity_history.append(velocity)
-        
-        self.centroid = new_centroid
-        self.last_seen_time = current_time
-        self.location_history.append((self.centroid, current_time))
-        
-        # Decay suspicion slowly if no active alerts
-        if not self.active_alerts and self.suspicion_score > 0:
-            self.suspicion_score *= Config.SUSPICION_DECAY
-
-    def set_identity(self, name, role, score=0):
-        self.name = name
-        self.role = role
-        self.is_identified = True
-        
-        if role == "Suspect":
-            self.suspicion_score = 100
-            if f"Identified Suspect: {name}" not in self.active_alerts:
-                self.active_alerts.append(f"Identified Suspect: {name}")
-        elif role == "Staff":
-            # Reward Staff: Auto-clear many minor suspicions
-            self.suspicion_score = 0
-            self.active_alerts = [a for a in self.active_alerts if "Weapon" in a] # Only keep weapon alerts for staff
-            self.last_staff_check = time.time()
-
-    def add_suspicion(self, points, reason):
-        # Only add points if it's a new alert or significant
-        if reason not in self.active_alerts:
-            self.active_alerts.append(reason)
-            self.suspicion_score = min(100, self.suspicion_score + points)
-        else:
-            # If already alerting, slowly increase (prevent instant 100)
-            self.suspicion_score = min(100, self.suspicion_score + (points * 0.05)) 
-
-    def clear_alerts(self, specific_alert=None):
-        if specific_alert:
-            if specific_alert in self.active_alerts:
-                self.active_alerts.remove(specific_alert)
-        else:
-            self.active_alerts = []
-
-    @property
-    def age_on_camera(self):
-        return time.time() - self.first_seen_time
+import math
+import time
+import numpy as np
+from config import Config
+from history import PointRing, ValueRing
+
+class Person:
+    """One tracked person; movement history lives in fixed-size NumPy rings (history.py)."""
+    __slots__ = (
+        "track_id", "bbox", "centroid",
+        "face_embedding", "face_weight", "face_samples", "face_check_quality", "appearance",
+        "name", "role", "is_identified", "last_face_check_time", "suspicion_at_face_check", "last_staff_check",
+        "history", "velocities", "velocity_xy", "first_seen_time", "last_seen_time",
+        "suspicion_score", "max_suspicion", "active_alerts", "movement_state", "state", "hits",
+    )
+
+    def __init__(self, track_id, bbox, now=None):
+        now = now if now is not None else time.time()
+        self.track_id = track_id
+        self.bbox = bbox  # [x1, y1, x2, y2]
+        self.centroid = self._calculate_centroid(bbox)
+        
+        # Identity
+        self.face_embedding = None # Quality-weighted running mean of face embeddings (unit norm)
+        self.face_weight = 0.0
+        self.face_samples = 0
+        self.face_check_quality = 1.0 # Crop quality when the scheduler picked this track
+        self.appearance = None # Tiny appearance signature at the last recognition
+        self.name = "Unknown"
+        self.role = "Visitor" # Visitor, Staff, Suspect
+        self.is_identified = False
+        self.last_face_check_time = 0
+        self.suspicion_at_face_check = 0 # Score when last checked (rising suspicion => re-check)
+        self.last_staff_check = 0
+        
+        # Behavior History
+        self.history = PointRing(int(Config.HISTORY_SECONDS / Config.HISTORY_SAMPLE_SECONDS) + 1) # Time-based samples
+        self.velocities = ValueRing(Config.VELOCITY_WINDOW) # Per-frame speeds, full rate
+        self.velocity_xy = (0.0, 0.0) # Smoothed centroid velocity (px/s), for predict()
+        self.first_seen_time = now
+        self.last_seen_time = now
+        
+        # State
+        self.suspicion_score = 0
+        self.max_suspicion = 0
+        self.active_alerts = []  # List of strings e.g. ["Loitering", "Pacing"]
+        self.movement_state = "Standing" # Standing, Walking, Running, Pacing
+        self.state = "tentative" # tentative, active, lost (retired tracks leave the StateManager)
+        self.hits = 1
+        
+        # Update history init
+        self.history.push(self.centroid[0], self.centroid[1], now)
+
+    def _calculate_centroid(self, bbox):
+        x1, y1, x2, y2 = bbox
+        return (int((x1 + x2) / 2), int((y1 + y2) / 2))
+
+    def update(self, bbox, now=None):
+        self.bbox = bbox
+        new_centroid = self._calculate_centroid(bbox)
+        current_time = now if now is not None else time.time()
+        
+        # Calculate instant velocity (pixels per second)
+        dt = current_time - self.last_seen_time
+        if dt > 0:
+            vx = (new_centroid[0] - self.centroid[0]) / dt
+            vy = (new_centroid[1] - self.centroid[1]) / dt
+            self.velocities.push(math.hypot(vx, vy))
+            self.velocity_xy = (0.5 * (self.velocity_xy[0] + vx), 0.5 * (self.velocity_xy[1] + vy))
+        
+        self.centroid = new_centroid
+        self.last_seen_time = current_time
+        self.hits += 1
+
+        # Sub-sample into the time-based window and drop what fell out of it
+        if current_time - self.history.last[2] >= Config.HISTORY_SAMPLE_SECONDS - 1e-3: # tolerate frame jitter
+            self.history.push(new_centroid[0], new_centroid[1], current_time)
+        self.history.expire(current_time - Config.HISTORY_SECONDS)
+        
+        # Decay suspicion slowly if no active alerts
+        if not self.active_alerts and self.suspicion_score > 0:
+            self.suspicion_score *= Config.SUSPICION_DECAY
+
+    def predict(self, now):
+        """
+        Moves bbox along velocity_xy from the last detection (constant velocity),
+        for frames where detection was skipped. History, hits and last_seen_time
+        are left alone: only real detections count for behaviour and lifecycle.
+        """
+        dt = min(now - self.last_seen_time, Config.TRACK_LOST_SECONDS)
+        if dt <= 0:
+            return
+        x1, y1, x2, y2 = self.bbox
+        cx = self.centroid[0] + self.velocity_xy[0] * dt
+        cy = self.centroid[1] + self.velocity_xy[1] * dt
+        hw, hh = (x2 - x1) / 2, (y2 - y1) / 2
+        self.bbox = [cx - hw, cy - hh, cx + hw, cy + hh]
+
+    def observe_face(self, embedding, quality=1.0):
+        """Folds one face embedding into the track's running, quality-weighted mean."""
+        emb = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(emb)
+        if norm == 0:
+            return
+        emb = emb / norm
+        weight = max(float(quality), 0.05)
+
+        if self.face_embedding is not None and float(np.dot(self.face_embedding, emb)) < Config.FACE_FUSION_OUTLIER:
+            # Looks like someone else under the same track id: start a fresh aggregate
+            self.face_embedding = None
+            self.face_weight = 0.0
+            self.face_samples = 0
+
+        if self.face_embedding is None:
+            self.face_embedding = emb
+            self.face_weight = weight
+        else:
+            fused = self.face_embedding * self.face_weight + emb * weight
+            self.face_embedding = fused / np.linalg.norm(fused)
+            # Capped so the mean keeps following slow appearance changes
+            self.face_weight = min(self.face_weight + weight, Config.FACE_FUSION_MAX_WEIGHT)
+        self.face_samples += 1
+
+    def set_identity(self, name, role, score=0):
+        self.name = name
+        self.role = role
+        self.is_identified = True
+        
+        if role == "Suspect":
+            self.suspicion_score = 100
+            self.max_suspicion = 100
+            if f"Identified Suspect: {name}" not in self.active_alerts:
+                self.active_alerts.append(f"Identified Suspect: {name}")
+        elif role == "Staff":
+            # Reward Staff: Auto-clear many minor suspicions
+            self.suspicion_score = 0
+            self.active_alerts = [a for a in self.active_alerts if "Weapon" in a] # Only keep weapon alerts for staff
+            self.last_staff_check = time.time()
+
+    def add_suspicion(self, points, reason):
+        # Only add points if it's a new alert or significant
+        if reason not in self.active_alerts:
+            self.active_alerts.append(reason)
+            self.suspicion_score = min(100, self.suspicion_score + points)
+        else:
+            # If already alerting, slowly increase (prevent instant 100)
+            self.suspicion_score = min(100, self.suspicion_score + (points * 0.05)) 
+        self.max_suspicion = max(self.max_suspicion, self.suspicion_score)
+
+    def clear_alerts(self, specific_alert=None):
+        if specific_alert:
+            if specific_alert in self.active_alerts:
+                self.active_alerts.remove(specific_alert)
+        else:
+            self.active_alerts = []
+
+    @property
+    def age_on_camera(self):
+        return self.last_seen_time - self.first_seen_time
+
+    @property
+    def mean_velocity(self):
+        return self.velocities.mean
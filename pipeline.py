@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import deque
+from config import Config
+from metrics import metrics
+
+
+class FramePacket:
+    """A captured frame travelling through the pipeline stages."""
+    __slots__ = ("index", "frame", "captured_at", "results", "active_ids", "stage_seconds")
+
+    def __init__(self, index, frame, captured_at):
+        self.index = index
+        self.frame = frame
+        self.captured_at = captured_at
+        self.results = None
+        self.active_ids = []
+        self.stage_seconds = {} # {stage name: processing time}
+
+
+class StageQueue:
+    """
+    Bounded hand-off between two stages.
+    When full, the OLDEST item is dropped so consumers always see the newest frame.
+    """
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self.passed = 0
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.passed += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Returns the next item, or None on timeout / when closed and drained."""
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    def stats(self):
+        return {"depth": self.depth, "maxsize": self.maxsize, "passed": self.passed, "dropped": self.dropped}
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames as fast as the source delivers them (realtime_fps paces file sources like a live camera)."""
+    def __init__(self, cap, outbox, stop_event, name="capture", realtime_fps=None):
+        super().__init__(name=name, daemon=True)
+        self.cap = cap
+        self.outbox = outbox # Single slot: stale frames are replaced, so the decoder never backs up
+        self.stop_event = stop_event
+        self.frame_interval = (1.0 / realtime_fps) if realtime_fps else 0.0
+        self.frames_read = 0
+
+    def run(self):
+        next_read = time.time()
+        while not self.stop_event.is_set():
+            if self.frame_interval:
+                delay = next_read - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                next_read += self.frame_interval
+
+            with metrics.timer("capture"):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.frames_read += 1
+            self.outbox.put(FramePacket(self.frames_read, frame, time.time()))
+        self.outbox.close()
+
+
+class Stage(threading.Thread):
+    """Worker thread applying `fn(packet) -> packet` between two queues."""
+    def __init__(self, name, fn, inbox, outbox, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop_event = stop_event
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                packet = self.inbox.get(timeout=0.1)
+                if packet is None:
+                    if self.inbox.closed:
+                        break
+                    continue
+
+                t0 = time.perf_counter()
+                packet = self.fn(packet)
+                elapsed = time.perf_counter() - t0
+                self.busy_seconds += elapsed
+                self.processed += 1
+                if packet is not None:
+                    packet.stage_seconds[self.name] = elapsed
+
+                if packet is not None:
+                    self.outbox.put(packet)
+        except Exception as e:
+            # Surface the failure to the consumer instead of hanging the pipeline
+            self.error = e
+            self.stop_event.set()
+        finally:
+            self.outbox.close()
+
+    def stats(self):
+        avg_ms = (self.busy_seconds / self.processed * 1000) if self.processed else 0.0
+        return {"processed": self.processed, "avg_ms": round(avg_ms, 2)}
+
+
+class Pipeline:
+    """
+    capture -> track -> identity -> (render, consumed by the caller)
+
+    Each arrow is a bounded StageQueue. The render stage stays with the caller
+    because cv2.imshow / waitKey must run on the main thread.
+    """
+    def __init__(self, cap, track_fn, identity_fn, queue_size=None):
+        queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self.stop_event = threading.Event()
+
+        self.queues = {
+            "capture": StageQueue("capture", 1),  # latest-frame policy
+            "track": StageQueue("track", queue_size),
+            "identity": StageQueue("identity", queue_size),
+        }
+        self.capture = CaptureThread(cap, self.queues["capture"], self.stop_event)
+        self.stages = [
+            Stage("track", track_fn, self.queues["capture"], self.queues["track"], self.stop_event),
+            Stage("identity", identity_fn, self.queues["track"], self.queues["identity"], self.stop_event),
+        ]
+        self.rendered = 0
+
+    def start(self):
+        self.capture.start()
+        for stage in self.stages:
+            stage.start()
+
+    def frames(self):
+        """Yields fully processed packets ready to be rendered."""
+        render_q = self.queues["identity"]
+        while not self.stop_event.is_set():
+            packet = render_q.get(timeout=0.1)
+            if packet is None:
+                if render_q.closed:
+                    break
+                continue
+            self.rendered += 1
+            yield packet
+
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def stop(self):
+        self.stop_event.set()
+        self.capture.join(timeout=2)
+        for stage in self.stages:
+            stage.join(timeout=2)
+
+    def stats(self):
+        """Per-stage queue depth, drop counts and processing time."""
+        stats = {"capture": dict(self.queues["capture"].stats(), frames_read=self.capture.frames_read)}
+        for stage in self.stages:
+            stats[stage.name] = dict(self.queues[stage.name].stats(), **stage.stats())
+        stats["render"] = {"processed": self.rendered}
+        return stats
@@ -0,0 +1,217 @@
+import time
+import queue
+import threading
+import ipaddress
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import cv2
+from config import Config
+from logger import system_logger
+from hud_overlay import HUD
+
+INDEX_PAGE = b"""<!doctype html><html><head><title>Preview</title></head>
+<body style="margin:0;background:#000"><img src="/stream" style="width:100%"></body></html>"""
+
+class PreviewServer:
+    """On-demand MJPEG live view; a render worker draws and encodes only while someone is watching."""
+    BOUNDARY = "frame"
+
+    def __init__(self, host=None, port=None, fps=None, quality=None):
+        self.host = host or Config.PREVIEW_HOST
+        self.port = port if port is not None else Config.PREVIEW_PORT
+        self.interval = 1.0 / (fps or Config.PREVIEW_FPS)
+        self.quality = quality or Config.PREVIEW_JPEG_QUALITY
+
+        self._latest = None # (frame, active_ids, state_manager, lock)
+        self._latest_lock = threading.Lock()
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._jpeg_cond = threading.Condition()
+        self._viewers = 0
+        self._viewers_lock = threading.Lock()
+        self._snapshot_wanted = threading.Event()
+        self._actions = queue.Queue()
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+        self.counters = {"submitted": 0, "rendered": 0, "render_ms": 0.0}
+
+    # --- Analysis side ---
+    def submit(self, frame, active_ids=None, state_manager=None, lock=None):
+        """
+        Offers the latest frame. With a state_manager the overlay is drawn by the
+        render worker (headless); without one the frame is sent as is (already drawn).
+        """
+        with self._latest_lock:
+            self._latest = (frame, active_ids, state_manager, lock)
+        self.counters["submitted"] += 1
+
+    def poll_action(self):
+        """Returns a pending control action ("quit", "reset") or None."""
+        try:
+            return self._actions.get_nowait()
+        except queue.Empty:
+            return None
+
+    @property
+    def viewers(self):
+        return self._viewers
+
+    # --- Render worker ---
+    def _render_loop(self):
+        next_due = 0.0
+        while not self._stop.is_set():
+            if self._viewers == 0 and not self._snapshot_wanted.is_set():
+                self._snapshot_wanted.wait(0.2) # Nobody watching: no rendering at all
+                continue
+
+            delay = next_due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            next_due = time.time() + self.interval
+
+            with self._latest_lock:
+                latest = self._latest
+            if latest is None:
+                continue
+            frame, active_ids, state_manager, lock = latest
+
+            t0 = time.perf_counter()
+            if state_manager is not None:
+                frame = frame.copy() # The analysis loop keeps its frame clean
+                if lock is not None:
+                    with lock:
+                        HUD.draw(frame, active_ids, state_manager)
+                else:
+                    HUD.draw(frame, active_ids, state_manager)
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            self.counters["rendered"] += 1
+            self.counters["render_ms"] += (time.perf_counter() - t0) * 1000
+
+            with self._jpeg_cond:
+                self._jpeg = buf.tobytes()
+                self._jpeg_seq += 1
+                self._jpeg_cond.notify_all()
+            self._snapshot_wanted.clear()
+
+    def next_jpeg(self, after_seq, timeout=2.0):
+        """Blocks until a frame newer than after_seq is encoded. Returns (seq, bytes) or (after_seq, None)."""
+        with self._jpeg_cond:
+            self._jpeg_cond.wait_for(lambda: self._jpeg_seq > after_seq or self._stop.is_set(), timeout)
+            if self._jpeg_seq > after_seq:
+                return self._jpeg_seq, self._jpeg
+            return after_seq, None
+
+    # --- HTTP side ---
+    def _handler(self):
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass # Keep per-request noise out of the audit log
+
+            def _local_client(self):
+                try:
+                    return ipaddress.ip_address(self.client_address[0]).is_loopback
+                except ValueError:
+                    return False
+
+            def _browser_request(self):
+                # Controls are for curl/scripts on this host. Any browser-set header, or a body a plain
+                # <form> can post, may be a cross-site request from a page open on this machine (CSRF).
+                if any(self.headers.get(h) for h in ("Origin", "Referer", "Sec-Fetch-Site")):
+                    return True
+                return bool(self.headers.get("Content-Type")) or int(self.headers.get("Content-Length") or 0) > 0
+
+            def do_GET(self):
+                # / page, /stream MJPEG, /snapshot.jpg one frame
+                if self.path == "/":
+                    self._send(200, "text/html", INDEX_PAGE)
+                elif self.path == "/snapshot.jpg":
+                    preview._snapshot_wanted.set()
+                    _, jpeg = preview.next_jpeg(preview._jpeg_seq)
+                    if jpeg is None:
+                        self._send(503, "text/plain", b"No frame available\n")
+                    else:
+                        self._send(200, "image/jpeg", jpeg)
+                elif self.path == "/stream":
+                    self._stream()
+                else:
+                    self._send(404, "text/plain", b"Not found\n")
+
+            def do_POST(self):
+                # /control/quit (ESC) and /control/reset ('r'): empty POSTs from this host only
+                action = {"/control/quit": "quit", "/control/reset": "reset"}.get(self.path)
+                if action is None:
+                    self._send(404, "text/plain", b"Not found\n")
+                elif not self._local_client():
+                    self._send(403, "text/plain", b"Controls are only accepted from this host\n")
+                elif self._browser_request():
+                    self._send(403, "text/plain", b"Controls are not accepted from browsers (send an empty POST)\n")
+                else:
+                    preview._actions.put(action)
+                    system_logger.log_event("PREVIEW_CONTROL", {"action": action})
+                    self._send(202, "text/plain", f"{action}\n".encode())
+
+            def _send(self, code, content_type, body):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={PreviewServer.BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                with preview._viewers_lock:
+                    preview._viewers += 1
+                seq = 0
+                try:
+                    while not preview._stop.is_set():
+                        seq, jpeg = preview.next_jpeg(seq)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(f"--{PreviewServer.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                         f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # Viewer went away
+                finally:
+                    with preview._viewers_lock:
+                        preview._viewers -= 1
+
+        return Handler
+
+    # --- Lifecycle ---
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1] # Resolved when port 0 was asked for
+        for name, target in (("preview-http", self._server.serve_forever), ("preview-render", self._render_loop)):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        system_logger.log_event("PREVIEW_START", {"url": f"http://{self.host}:{self.port}/",
+                                                  "fps": round(1.0 / self.interval, 1)})
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._snapshot_wanted.set()
+        with self._jpeg_cond:
+            self._jpeg_cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def stats(self):
+        rendered = self.counters["rendered"]
+        return dict(self.counters, viewers=self._viewers,
+                    render_ms=round(self.counters["render_ms"], 1),
+                    avg_render_ms=round(self.counters["render_ms"] / rendered, 2) if rendered else 0.0)
@@ -0,0 +1,86 @@
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import Config
+from logger import system_logger
+
+class StartupTimeline:
+    """Cold start to first processed frame, logged as one STARTUP event (phases in seconds since import)."""
+    def __init__(self):
+        self.t0 = time.time()
+        self.phases = [] # {"phase", "start_s", "end_s", "thread"}
+        self.done = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.time() - self.t0
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append({"phase": name, "start_s": round(start, 3), "end_s": round(time.time() - self.t0, 3),
+                                    "thread": threading.current_thread().name})
+
+    def first_frame(self):
+        """Closes the timeline on the first processed frame (no-op afterwards)."""
+        if self.done:
+            return
+        self.done = True
+        total = time.time() - self.t0
+        phases = sorted(self.phases, key=lambda p: p["start_s"])
+        system_logger.log_event("STARTUP", {"first_frame_s": round(total, 3), "parallel": Config.STARTUP_PARALLEL,
+                                            "phases": phases})
+        print(f"Startup: first frame after {total:.2f}s")
+        for p in phases:
+            print(f"  {p['start_s']:6.2f}s - {p['end_s']:6.2f}s  {p['phase']} [{p['thread']}]")
+
+timeline = StartupTimeline()
+
+# Independent loaders, run on parallel threads by load_all(); each warm-up runs one dummy inference
+# so the first real frame does not pay for lazy initialisation (CUDA context, kernel selection)
+def load_detector():
+    with timeline.phase("import ultralytics"):
+        from ultralytics import YOLO
+    with timeline.phase("load detector"):
+        model = YOLO(Config.YOLO_MODEL_PATH)
+    if Config.STARTUP_WARMUP:
+        with timeline.phase("warm up detector"):
+            frame = np.zeros((Config.FRAME_HEIGHT, Config.FRAME_WIDTH, 3), dtype=np.uint8)
+            # predict() sets up the same predictor that track() reuses later
+            model.predict(frame, verbose=False, classes=Config.DETECT_CLASSES, imgsz=Config.LOAD_LEVELS[0]["imgsz"])
+    return model
+
+def load_face_models():
+    from face_ai import face_recognition
+    with timeline.phase("load face models"):
+        face_recognition.initialize()
+    if Config.STARTUP_WARMUP:
+        with timeline.phase("warm up face models"):
+            face_recognition.warm_up()
+    return face_recognition
+
+def load_watchlist():
+    with timeline.phase("load watchlist"):
+        import database
+        return database.suspect_db
+
+def open_camera(source=None):
+    import cv2
+    with timeline.phase("open camera"):
+        cap = cv2.VideoCapture(Config.CAMERA_SOURCE if source is None else source)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, Config.FRAME_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, Config.FRAME_HEIGHT)
+    return cap
+
+def load_all(source=None):
+    """Runs the loaders (concurrently unless STARTUP_PARALLEL is off). Returns {"detector", "faces", "watchlist", "camera"}."""
+    tasks = {"detector": load_detector, "faces": load_face_models, "watchlist": load_watchlist,
+             "camera": lambda: open_camera(source)}
+    workers = len(tasks) if Config.STARTUP_PARALLEL else 1
+    with timeline.phase("load all"):
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="startup") as pool:
+            futures = {name: pool.submit(fn) for name, fn in tasks.items()}
+            return {name: future.result() for name, future in futures.items()}
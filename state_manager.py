@@ -1,59 +1,177 @@
-from person import Person
-from behavior_engine import BehaviorEngine
-from logger import system_logger
-from config import Config
-import alert
-
-class StateManager:
-    def __init__(self):
-        self.active_tracks = {} # {track_id: Person}
-        self.detected_weapons = [] # List of tuples (box, label, track_id)
-
-    def update_tracks(self, yolov8_results):
-        """
-        Sync active_tracks with YOLOv8 tracking results.
-        """
-        current_frame_ids = []
-        self.detected_weapons = [] # Reset per frame
-        
-        if yolov8_results[0].boxes.id is not None:
-            # We have tracking IDs
-            boxes = yolov8_results[0].boxes.xyxy.cpu().numpy()
-            track_ids = yolov8_results[0].boxes.id.cpu().numpy().astype(int)
-            classes = yolov8_results[0].boxes.cls.cpu().numpy().astype(int)
-            
-            for box, track_id, cls in zip(boxes, track_ids, classes):
-                
-                # Check for Weapons
-                if cls in Config.WEAPON_CLASSES:
-                    label = "Unidentified Object"
-                    if cls == 43: label = "KNIFE"
-                    elif cls == 76: label = "SCISSORS" # or generic "SHARP OBJECT"
-                    
-                    self.detected_weapons.append((box, label, track_id))
-                    
-                    # TRIGGER ALERT
-                    system_logger.log_event("WEAPON_DETECTED", {"type": label, "track_id": int(track_id)})
-                    alert.red_alert_sound()
-                    continue # Don't treat as a person
-
-                # Only process Persons (Class 0)
-                if cls == 0:
-                    current_frame_ids.append(track_id)
-                    
-                    # Create or Update Person
-                    if track_id not in self.active_tracks:
-                        self.active_tracks[track_id] = Person(track_id, box)
-                        system_logger.log_event("PERSON_ENTERED", {"track_id": int(track_id)})
-                    else:
-                        self.active_tracks[track_id].update(box)
-
-                    # Run Behavior Analysis
-                    BehaviorEngine.analyze(self.active_tracks[track_id])
-                    
-                    # Check for Suspicion Alert
-                    if self.active_tracks[track_id].suspicion_score > 80:
-                         alert.red_alert_sound()
-
-        
-        return self.active_tracks
+import time
+from collections import OrderedDict
+from person import Person
+from behavior_engine import BehaviorEngine, TrackTable
+from logger import system_logger
+from config import Config
+from track_archive import track_archive
+import alert
+import evidence
+
+class StateManager:
+    def __init__(self, camera_id=None):
+        self.camera_id = camera_id # Set when several cameras log to the same audit trail
+        self.active_tracks = OrderedDict() # {track_id: Person}, least recently seen first; no retired tracks
+        self.visible_ids = [] # Person track ids in the latest frame
+        self.archive = track_archive
+        self.detected_weapons = [] # List of tuples (box, label, track_id)
+        self.batch_behavior = Config.BEHAVIOR_BATCH
+        self.table = TrackTable() # Column statistics for BehaviorEngine.analyze_batch
+
+    def _event(self, event_type, details):
+        if self.camera_id is not None:
+            details["camera"] = self.camera_id
+        system_logger.log_event(event_type, details)
+
+    def update_tracks(self, yolov8_results, now=None):
+        """
+        Sync active_tracks with YOLOv8 tracking results.
+        :param now: frame timestamp (default: time.time())
+        """
+        if yolov8_results[0].boxes.id is not None:
+            # We have tracking IDs
+            boxes = yolov8_results[0].boxes.xyxy.cpu().numpy()
+            track_ids = yolov8_results[0].boxes.id.cpu().numpy().astype(int)
+            classes = yolov8_results[0].boxes.cls.cpu().numpy().astype(int)
+            return self.update_from_arrays(boxes, track_ids, classes, now)
+
+        self.detected_weapons = [] # Reset per frame
+        self.visible_ids = []
+        self._expire(now if now is not None else time.time())
+        return self.active_tracks
+
+    def update_from_arrays(self, boxes, track_ids, classes, now=None):
+        """
+        Same as update_tracks, from plain arrays (xyxy boxes, int ids, int classes).
+        Used when detection and tracking are decoupled (see tracking.py).
+        :param now: frame timestamp (default: time.time()), e.g. for replays
+        """
+        now = now if now is not None else time.time()
+        current_frame_ids = []
+        self.detected_weapons = [] # Reset per frame
+        seen, seen_slots = [], [] # Batch mode: analysed together after the loop
+
+        if len(track_ids):
+            for box, track_id, cls in zip(boxes, track_ids, classes):
+                
+                # Check for Weapons
+                if cls in Config.WEAPON_CLASSES:
+                    label = "Unidentified Object"
+                    if cls == 43: label = "KNIFE"
+                    elif cls == 76: label = "SCISSORS" # or generic "SHARP OBJECT"
+                    
+                    self.detected_weapons.append((box, label, track_id))
+                    
+                    # TRIGGER ALERT
+                    details = {"type": label, "track_id": int(track_id)}
+                    recorder = evidence.recorder(self.camera_id)
+                    if recorder is not None:
+                        details["clip"] = recorder.trigger("WEAPON_DETECTED", track_id, box, label, now)
+                    self._event("WEAPON_DETECTED", details)
+                    self._alert("WEAPON_DETECTED", int(track_id), {"type": label, "clip": details.get("clip")}, now)
+                    continue # Don't treat as a person
+
+                # Only process Persons (Class 0)
+                if cls == 0:
+                    current_frame_ids.append(track_id)
+                    
+                    # Create or Update Person
+                    if track_id not in self.active_tracks:
+                        self.active_tracks[track_id] = Person(track_id, box, now)
+                    else:
+                        self.active_tracks[track_id].update(box, now)
+                        self.active_tracks.move_to_end(track_id)
+
+                    person = self.active_tracks[track_id]
+                    if person.state != "active" and person.hits >= Config.TRACK_CONFIRM_HITS:
+                        if person.state == "tentative":
+                            self._event("PERSON_ENTERED", {"track_id": int(track_id)})
+                        person.state = "active"
+                    if self.batch_behavior:
+                        slot = self.table.acquire(track_id)
+                        self.table.store(slot, person)
+                        seen.append(person)
+                        seen_slots.append(slot)
+                        continue
+
+                    # Run Behavior Analysis
+                    BehaviorEngine.analyze(person)
+                    
+                    # Check for Suspicion Alert
+                    if person.suspicion_score > 80:
+                         self._suspicion_alert(person, now)
+
+        if seen:
+            BehaviorEngine.analyze_batch(self.table, seen_slots, seen)
+            # One alarm per suspicious track, exactly like the per-person path
+            for person in seen:
+                if person.suspicion_score > 80:
+                    self._suspicion_alert(person, now)
+
+        self.visible_ids = current_frame_ids
+        self._expire(now)
+        return self.active_tracks
+
+    def propagate(self, now=None):
+        """
+        Frame without detection (load shedding): visible tracks move on their
+        last velocity. Nothing is logged or expired, weapons keep their boxes.
+        """
+        now = now if now is not None else time.time()
+        for track_id in self.visible_ids:
+            self.active_tracks[track_id].predict(now)
+        return self.active_tracks
+
+    def hold(self, now=None):
+        """
+        Still frame (motion gate idle, detector skipped): nobody moved, so every
+        visible track is re-observed at its last box. History sampling and the
+        behaviour checks (loitering) keep running without the detector.
+        """
+        ids = [tid for tid in self.visible_ids if tid in self.active_tracks]
+        weapons = self.detected_weapons
+        self.update_from_arrays([self.active_tracks[tid].bbox for tid in ids], ids, [0] * len(ids), now)
+        self.detected_weapons = weapons # Still where they were
+        return self.active_tracks
+
+    def _alert(self, kind, track_id, details, now):
+        alert.raise_alert(kind, track_id, self.camera_id, details, now)
+
+    def _suspicion_alert(self, person, now):
+        self._alert("HIGH_SUSPICION", int(person.track_id),
+                    {"score": round(person.suspicion_score, 1), "alerts": list(person.active_alerts)}, now)
+
+    def _expire(self, now):
+        """
+        Lifecycle sweep. active_tracks is ordered by last sighting, so only the
+        tracks missing from this frame are visited (cost ~ lost tracks, not history).
+        """
+        lost_before = now - Config.TRACK_LOST_SECONDS
+        retire_before = now - Config.TRACK_TTL_SECONDS
+        retired = []
+        for person in self.active_tracks.values():
+            if person.last_seen_time >= lost_before:
+                break
+            if person.state == "tentative" or person.last_seen_time < retire_before:
+                retired.append(person) # Unconfirmed ids are dropped once they vanish
+            elif person.state == "active":
+                person.state = "lost"
+
+        for person in retired:
+            self._retire(person)
+
+    def _retire(self, person):
+        del self.active_tracks[person.track_id]
+        self.table.release(person.track_id)
+        if person.state != "tentative":
+            self._archive(person)
+
+    def _archive(self, person):
+        self.archive.add(self.archive.summarize(person, self.camera_id))
+
+    def close(self):
+        """Archives every remaining track (shutdown / reset)."""
+        for person in list(self.active_tracks.values()):
+            self._retire(person)
+        self.visible_ids = []
+        self.archive.flush()
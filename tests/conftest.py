@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config resolves data/, logs/ and snapshots/ against the working directory at import: keep them out of the checkout
+os.chdir(tempfile.mkdtemp(prefix="guard-vision-tests-"))
+
+from config import Config
+
+@pytest.fixture
+def data_dirs(tmp_path, monkeypatch):
+    """Watchlist folders and embedding store under tmp_path."""
+    from database import Database
+    suspects, authorized = str(tmp_path / "suspects"), str(tmp_path / "authorized")
+    monkeypatch.setattr(Config, "FACE_DB_PATH", suspects)
+    monkeypatch.setattr(Config, "AUTHORIZED_DB_PATH", authorized)
+    monkeypatch.setattr(Config, "EMBEDDING_STORE_DIR", str(tmp_path / "gallery"))
+    monkeypatch.setattr(Config, "FACE_INDEX_PATH", str(tmp_path / "face_index.npz"))
+    monkeypatch.setattr(Database, "CATEGORIES", [(suspects, "Suspect"), (authorized, "Staff")])
+    return tmp_path
@@ -0,0 +1,37 @@
+import numpy as np
+from ann_index import IVFIndex
+from gallery import FaceGallery
+
+def _clustered(n, dim=64, centers=40, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, dim))
+    points = means[rng.integers(centers, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    return FaceGallery.normalize(points)
+
+def test_recall_against_exact_scan():
+    matrix = _clustered(4000)
+    index = IVFIndex(nlist=64, nprobe=8)
+    index.train(matrix)
+
+    queries = FaceGallery.normalize(matrix[:200] + 0.05 * np.random.default_rng(1).normal(size=(200, 64)))
+    exact = np.argmax(queries @ matrix.T, axis=1)
+    _, rows = index.search(matrix, queries, 1)
+    assert np.mean(rows[:, 0] == exact) >= 0.9
+
+def test_probing_every_list_is_exact():
+    matrix = _clustered(500)
+    index = IVFIndex(nlist=16)
+    index.train(matrix)
+    queries = matrix[:50]
+    _, rows = index.search(matrix, queries, 5, nprobe=16)
+    exact = np.argsort(-(queries @ matrix.T), axis=1, kind="stable")[:, :5]
+    assert np.array_equal(rows, exact)
+
+def test_removed_row_is_not_returned():
+    matrix = _clustered(300)
+    index = IVFIndex(nlist=8)
+    index.train(matrix)
+    index.remove(0)
+    _, rows = index.search(matrix, matrix[:1], 3, nprobe=8)
+    assert 0 not in rows[0]
+    assert len(index) == 299
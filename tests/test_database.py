@@ -0,0 +1,13 @@
+import numpy as np
+from database import Database
+
+def test_match_after_reload_with_tombstones(data_dirs):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(100, 16))
+    db = Database()
+    db.add_people([(f"p{i}", vec, "Suspect", None) for i, vec in enumerate(vectors)])
+    db.remove_person("p0")
+
+    reloaded = Database() # Row 0 is a tombstone in the manifest
+    assert reloaded.match_face(vectors[0])[0] != "p0"
+    assert reloaded.match_face(vectors[99])[0] == "p99"
@@ -0,0 +1,50 @@
+import numpy as np
+from embedding_store import EmbeddingStore
+
+def _vec(seed, dim=16):
+    return np.random.default_rng(seed).normal(size=dim)
+
+def test_delete_is_a_tombstone_until_compact(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.append([("a", _vec(0), "Suspect", "High", None), ("b", _vec(1), "Staff", "None", "h1")])
+    store.delete(["a"])
+
+    reopened = EmbeddingStore(str(tmp_path))
+    assert reopened.count == 2
+    assert len(reopened) == 1
+    assert reopened.find("a") is None
+    assert reopened.hashes() == {"h1": "b"}
+
+    assert reopened.compact() == 1
+    assert reopened.count == 1
+    expected = _vec(1) / np.linalg.norm(_vec(1))
+    assert np.allclose(reopened.open_matrix()[0], expected, atol=1e-6)
+
+def test_reenrolment_tombstones_previous_row(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.append([("a", _vec(0), "Suspect", "High", None)])
+    assert store.append([("a", _vec(1), "Staff", "None", None)]) == [1]
+    assert store.find("a") == 1
+    assert [e[store.DELETED] for e in store.entries] == [True, False]
+
+def test_torn_append_is_ignored_and_overwritten(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.append([("a", _vec(0), "Suspect", "High", None)])
+    # Crash after the rows were written but before the manifest (commit point) was replaced
+    with open(store.matrix_path, "ab") as f:
+        f.write(np.ones(16, dtype=np.float32).tobytes() * 3)
+
+    reopened = EmbeddingStore(str(tmp_path))
+    assert reopened.count == 1
+    assert reopened.open_matrix().shape == (1, 16)
+
+    reopened.append([("b", _vec(1), "Suspect", "High", None)])
+    matrix = EmbeddingStore(str(tmp_path)).open_matrix()
+    assert matrix.shape == (2, 16)
+    assert np.allclose(matrix[1], _vec(1) / np.linalg.norm(_vec(1)), atol=1e-6)
+
+def test_missing_manifest_means_empty_store(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "none"))
+    assert not store.exists()
+    assert store.count == 0
+    assert store.open_matrix().shape == (0, 0)
@@ -0,0 +1,56 @@
+import numpy as np
+from gallery import FaceGallery
+
+def test_equal_scores_keep_lower_row_first():
+    gallery = FaceGallery()
+    vec = np.ones(8, dtype=np.float32)
+    for name in ("a", "b", "c"):
+        gallery.add(name, vec, "Suspect")
+    gallery.add("far", -vec, "Suspect")
+
+    scores, rows = gallery.search(vec, k=3)
+    assert rows[0].tolist() == [0, 1, 2]
+    assert np.allclose(scores[0], 1.0)
+    assert gallery.search(vec, k=1)[1][0].tolist() == [0]
+
+def test_removed_rows_never_match():
+    gallery = FaceGallery()
+    vec = np.ones(8, dtype=np.float32)
+    gallery.add("a", vec, "Suspect")
+    gallery.add("b", vec, "Suspect")
+    gallery.remove("a")
+
+    _, rows = gallery.search(vec, k=5)
+    assert rows[0].tolist() == [1]
+
+def test_reenrolment_keeps_row():
+    gallery = FaceGallery()
+    rng = np.random.default_rng(0)
+    gallery.add("a", rng.normal(size=8), "Suspect")
+    gallery.add("b", rng.normal(size=8), "Suspect")
+    vec = rng.normal(size=8)
+    assert gallery.add("a", vec, "Staff") == 0
+    assert gallery.search(vec, k=1)[1][0].tolist() == [0]
+    assert gallery.roles[0] == "Staff"
+
+def test_copy_does_not_affect_original():
+    gallery = FaceGallery()
+    gallery.add("a", np.ones(8), "Suspect")
+    copy = gallery.copy()
+    copy.add("b", -np.ones(8), "Suspect")
+    copy.remove("a")
+    assert list(gallery.rows) == ["a"]
+    assert gallery.search(np.ones(8), k=1)[1][0].tolist() == [0]
+
+def test_rows_added_after_a_delete_are_searchable():
+    gallery = FaceGallery()
+    gallery.add("gone", np.ones(8), "Suspect")
+    gallery.remove("gone")
+    rng = np.random.default_rng(0)
+    for i in range(100): # Past the size the deleted-row mask was first allocated with
+        gallery.add(f"p{i}", rng.normal(size=8), "Suspect")
+
+    target = rng.normal(size=8)
+    gallery.add("target", target, "Suspect")
+    assert gallery.names[gallery.search(target, k=3)[1][0][0]] == "target"
+    assert len(gallery.live_rows()) == 101
@@ -0,0 +1,42 @@
+import pytest
+from config import Config
+from load_control import LoadController
+
+LEVELS = [{"stride": 1, "imgsz": 640, "face_budget_ms": 8.0},
+          {"stride": 2, "imgsz": 480, "face_budget_ms": 4.0}]
+T0 = 1000.0
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(Config, "LOAD_EWMA_ALPHA", 1.0) # No smoothing: each sample is the latency
+    monkeypatch.setattr(Config, "LOAD_DOWN_HOLD_SECONDS", 1.0)
+    monkeypatch.setattr(Config, "LOAD_UP_HOLD_SECONDS", 5.0)
+    return LoadController(target_ms=100, levels=LEVELS, enabled=True)
+
+def test_degrades_only_after_sustained_overload(controller):
+    assert not controller.observe(200, now=T0)
+    assert not controller.observe(200, now=T0 + 0.9)
+    assert controller.observe(200, now=T0 + 1.0)
+    assert controller.level == 1
+    assert controller.stride == 2
+    assert not controller.observe(500, now=T0 + 10.0) # Already the cheapest level
+
+def test_in_band_latency_resets_the_hold(controller):
+    controller.observe(200, now=T0)
+    controller.observe(100, now=T0 + 0.5) # Between LOAD_LOW and LOAD_HIGH
+    assert not controller.observe(200, now=T0 + 1.2)
+    assert controller.level == 0
+
+def test_recovers_only_after_longer_headroom(controller):
+    controller.observe(200, now=T0)
+    controller.observe(200, now=T0 + 1.0)
+    assert not controller.observe(50, now=T0 + 2.0)
+    assert not controller.observe(50, now=T0 + 6.9)
+    assert controller.observe(50, now=T0 + 7.0)
+    assert controller.level == 0
+
+def test_disabled_controller_never_moves():
+    controller = LoadController(target_ms=100, levels=LEVELS, enabled=False)
+    assert not controller.observe(10000, now=T0)
+    assert not controller.observe(10000, now=T0 + 100.0)
+    assert controller.level == 0
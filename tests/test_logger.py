@@ -0,0 +1,24 @@
+from logger import system_logger
+
+def _event(ts, **details):
+    return {"timestamp": ts, "event": "TEST_COALESCE", "details": dict(details, track_id=4242)}
+
+def test_summary_describes_the_suppressed_repeats():
+    written, summaries = [], []
+    with system_logger._io_lock: # Same lock the writer thread holds around coalescing
+        for ts in ("t1", "t2", "t3"):
+            payload = system_logger._coalesce(_event(ts, kind="knife"), now=0.0)
+            if payload is not None:
+                written.append(payload["timestamp"])
+        key = next(k for k in system_logger._coalescing if k[0] == "TEST_COALESCE")
+        payload, count, first_seen, _ = system_logger._coalescing.pop(key)
+    assert written == ["t1"]
+    assert (count, first_seen, payload["timestamp"]) == (2, "t2", "t3")
+
+def test_different_details_are_not_folded():
+    with system_logger._io_lock:
+        first = system_logger._coalesce(_event("t1", name="A"), now=0.0)
+        second = system_logger._coalesce(_event("t2", name="B"), now=0.0)
+        for key in [k for k in system_logger._coalescing if k[0] == "TEST_COALESCE"]:
+            del system_logger._coalescing[key]
+    assert first is not None and second is not None
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from config import Config
+from motion_gate import MotionGate
+
+@pytest.fixture
+def gate(monkeypatch):
+    monkeypatch.setattr(Config, "MOTION_BG_ALPHA", 0.0) # Fixed background: the same frame always differs the same way
+    monkeypatch.setattr(Config, "MOTION_HOLD_SECONDS", 3.0)
+    monkeypatch.setattr(Config, "MOTION_REFRESH_SECONDS", 5.0)
+    return MotionGate()
+
+def _frame(square=0):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    if square:
+        frame[100:100 + square, 100:100 + square] = 255
+    return frame
+
+def test_wakes_on_one_frame_and_idles_after_hold(gate):
+    still = _frame()
+    assert gate.check(still, now=0.0) == (True, None) # First frame: everything is new
+    assert gate.active
+
+    for now in (1.0, 2.0, 3.9):
+        gate.check(still, now=now)
+        assert gate.active # Quiet, but not for MOTION_HOLD_SECONDS yet
+    assert gate.check(still, now=4.0) == (False, None)
+    assert not gate.active
+
+    detect, roi = gate.check(_frame(square=40), now=4.1)
+    assert detect and gate.active
+    assert roi is not None and roi[0] <= 100 and roi[2] >= 140
+
+def test_idle_gate_still_refreshes(gate):
+    still = _frame()
+    gate.check(still, now=0.0)
+    gate.check(still, now=1.0)
+    gate.check(still, now=4.0) # Idle from here; last detection at 1.0
+    assert gate.check(still, now=5.9) == (False, None)
+    assert gate.check(still, now=6.0) == (True, None) # MOTION_REFRESH_SECONDS since the last detection
+    assert gate.check(still, now=6.1) == (False, None)
+
+def test_between_thresholds_keeps_active(gate, monkeypatch):
+    monkeypatch.setattr(Config, "MOTION_ON_FRACTION", 0.5)
+    monkeypatch.setattr(Config, "MOTION_OFF_FRACTION", 0.0001)
+    gate.check(_frame(), now=0.0)
+    for now in (1.0, 5.0, 10.0):
+        assert gate.check(_frame(square=20), now=now)[0] # Some motion: below ON but above OFF
+    assert gate.active
@@ -0,0 +1,41 @@
+import pytest
+import orchestrator
+from pipeline import StageQueue
+
+class FakeStream:
+    """Scheduling surface of CameraStream, without a camera or a tracker."""
+    def __init__(self, cam_id, source, fps_target, stop_event):
+        self.cam_id = cam_id
+        self.fps_target = float(fps_target)
+        self.latest = StageQueue(f"{cam_id}.capture", 1)
+        self.next_due = 0.0
+        self.busy = False
+
+    @property
+    def finished(self):
+        return self.latest.closed and self.latest.depth == 0
+
+class FakeDetectorPool:
+    def __init__(self, size):
+        self.size = size
+
+@pytest.fixture
+def orch(monkeypatch):
+    monkeypatch.setattr(orchestrator, "CameraStream", FakeStream)
+    monkeypatch.setattr(orchestrator, "DetectorPool", FakeDetectorPool)
+    orch = orchestrator.Orchestrator(["a.mp4", "b.mp4"], fps_targets=[10], workers=1, detectors=1, face_workers=1)
+    yield orch
+    orch.stop_event.set()
+    orch.face_pool.shutdown()
+
+def test_next_stream_picks_the_stream_with_a_frame(orch):
+    cam0, cam1 = orch.streams
+    cam1.latest.put("frame")
+    assert orch._next_stream() is cam1
+    assert cam1.busy and not cam0.busy
+    assert cam1.next_due > 0
+
+def test_next_stream_returns_none_when_all_sources_ended(orch):
+    for stream in orch.streams:
+        stream.latest.close()
+    assert orch._next_stream() is None
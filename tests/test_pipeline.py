@@ -0,0 +1,17 @@
+from pipeline import StageQueue
+
+def test_full_queue_drops_oldest():
+    q = StageQueue("track", 2)
+    for item in (1, 2, 3):
+        q.put(item)
+    assert q.dropped == 1
+    assert q.passed == 3
+    assert [q.get(0), q.get(0)] == [2, 3]
+
+def test_get_returns_none_when_empty_or_closed():
+    q = StageQueue("render", 1)
+    assert q.get(0.01) is None
+    q.put("last")
+    q.close()
+    assert q.get() == "last" # Drained before reporting closed
+    assert q.get() is None
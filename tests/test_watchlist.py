@@ -0,0 +1,71 @@
+import os
+import time
+import numpy as np
+from database import Database
+from watchlist import WatchlistWatcher
+
+LATER = time.time() + 60 # Past WATCHLIST_SETTLE_SECONDS for every file written here
+
+def _write(path, seed):
+    np.save(path, np.random.default_rng(seed).normal(size=16).astype(np.float32))
+    return np.load(path)
+
+def _watcher(data_dirs):
+    db = Database()
+    watcher = WatchlistWatcher(db)
+    watcher.reconcile()
+    return db, watcher
+
+def test_added_changed_removed(data_dirs):
+    db, watcher = _watcher(data_dirs)
+    suspects = data_dirs / "suspects"
+
+    vec = _write(suspects / "a.npy", 0)
+    assert watcher.poll(LATER) == {"added": 1, "changed": 0, "removed": 0}
+    name, meta, score = db.match_face(vec)
+    assert (name, meta["role"]) == ("a", "Suspect") and score > 0.99
+
+    vec = _write(suspects / "a.npy", 1)
+    os.utime(suspects / "a.npy", ns=(1, time.time_ns() + 10**9)) # Same size: only the mtime tells
+    assert watcher.poll(LATER) == {"added": 0, "changed": 1, "removed": 0}
+    assert db.match_face(vec)[0] == "a"
+    assert len(db.gallery) == 1
+
+    os.remove(suspects / "a.npy")
+    assert watcher.poll(LATER) == {"added": 0, "changed": 0, "removed": 1}
+    assert "a" not in db.metadata
+    assert db.match_face(vec)[0] is None
+
+def test_unchanged_folder_is_a_no_op(data_dirs):
+    db, watcher = _watcher(data_dirs)
+    _write(data_dirs / "suspects" / "a.npy", 0)
+    watcher.poll(LATER)
+    gallery = db.gallery
+    assert watcher.poll(LATER) == {"added": 0, "changed": 0, "removed": 0}
+    assert db.gallery is gallery
+
+def test_file_still_being_written_waits(data_dirs):
+    db, watcher = _watcher(data_dirs)
+    _write(data_dirs / "suspects" / "a.npy", 0)
+    assert watcher.poll(time.time())["added"] == 0
+    assert watcher.poll(LATER)["added"] == 1
+
+def test_move_to_other_folder_changes_role(data_dirs):
+    db, watcher = _watcher(data_dirs)
+    vec = _write(data_dirs / "suspects" / "a.npy", 0)
+    watcher.poll(LATER)
+
+    os.replace(data_dirs / "suspects" / "a.npy", data_dirs / "authorized" / "a.npy")
+    assert watcher.poll(LATER) == {"added": 1, "changed": 0, "removed": 1}
+    assert db.metadata["a"]["role"] == "Staff"
+    assert db.match_face(vec)[0] == "a"
+
+def test_deleted_image_drops_identity_despite_legacy_npy(data_dirs):
+    db, watcher = _watcher(data_dirs)
+    _write(data_dirs / "suspects" / "a.npy", 0)
+    watcher.poll(LATER)
+    # As if a.jpg had been enrolled earlier and is now deleted, with the legacy a.npy left beside it
+    watcher.known[str(data_dirs / "suspects" / "a.jpg")] = (0, 0)
+
+    assert watcher.poll(LATER)["removed"] == 1
+    assert "a" not in db.metadata
@@ -0,0 +1,70 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+from datetime import datetime
+from config import Config
+from logger import system_logger
+
+class TrackArchive:
+    """
+    Compact summaries of retired tracks, appended to a daily JSONL file
+    (TRACK_ARCHIVE_DIR/tracks_YYYYMMDD.jsonl) in batches, so a long shift
+    keeps one line per visitor on disk instead of a Person in memory.
+    """
+    def __init__(self, directory=None, batch_size=None):
+        self.directory = directory or Config.TRACK_ARCHIVE_DIR
+        self.batch_size = batch_size or Config.TRACK_ARCHIVE_BATCH
+        self._pending = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock() # Several cameras may share one archive
+        self.archived = 0
+
+    @staticmethod
+    def summarize(person, camera_id=None):
+        points = person.history.points()
+        # Evenly spaced positions over the window, first and last included
+        picks = np.unique(np.linspace(0, len(points) - 1, min(len(points), Config.TRACK_PATH_SKETCH_POINTS)).astype(int))
+        sketch = points[picks, :2]
+        if len(sketch) > 1: # Standing still: repeated positions add nothing
+            sketch = sketch[np.r_[True, np.any(np.diff(sketch, axis=0) != 0, axis=1)]]
+        return {
+            "track_id": int(person.track_id),
+            "camera": camera_id,
+            "first_seen": datetime.fromtimestamp(person.first_seen_time).isoformat(),
+            "last_seen": datetime.fromtimestamp(person.last_seen_time).isoformat(),
+            "dwell_seconds": round(person.age_on_camera, 1),
+            "max_suspicion": round(float(person.max_suspicion), 1),
+            "name": person.name,
+            "role": person.role,
+            "identified": person.is_identified,
+            "alerts": list(person.active_alerts),
+            "path": [[int(x), int(y)] for x, y in sketch],
+        }
+
+    def add(self, summary):
+        with self._lock:
+            self._pending.append(summary)
+            due = (len(self._pending) >= self.batch_size
+                   or time.time() - self._last_flush > Config.TRACK_ARCHIVE_FLUSH_SECONDS)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._last_flush = time.time()
+        if not batch:
+            return
+        path = os.path.join(self.directory, f"tracks_{datetime.now().strftime('%Y%m%d')}.jsonl")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "a") as f:
+                f.write("".join(json.dumps(s) + "\n" for s in batch))
+            self.archived += len(batch)
+        except OSError as e:
+            system_logger.logger.error(f"Track archive write failed ({len(batch)} summaries lost): {e}")
+
+# Shared by every StateManager
+track_archive = TrackArchive()
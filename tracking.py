@@ -0,0 +1,55 @@
+import queue
+import numpy as np
+from config import Config
+
+# model.track() lowers the detection threshold to 0.1 so ByteTrack can use
+# its low-score association pass; keep the same behaviour when decoupled.
+TRACK_DETECTION_CONF = 0.1
+
+class DetectorPool:
+    """
+    A fixed set of YOLO instances shared by every camera stream.
+    detect() borrows a free instance, so at most `size` inferences run at once.
+    """
+    def __init__(self, size, model_path=None):
+        from ultralytics import YOLO
+
+        self.size = max(1, int(size))
+        self._free = queue.Queue()
+        for _ in range(self.size):
+            self._free.put(YOLO(model_path or Config.YOLO_MODEL_PATH))
+
+    def detect(self, frame):
+        """Returns the frame's detections as ultralytics Boxes (numpy)."""
+        model = self._free.get()
+        try:
+            results = model.predict(frame, verbose=False, classes=Config.DETECT_CLASSES,
+                                    conf=TRACK_DETECTION_CONF, iou=Config.IOU_THRESHOLD)
+            return results[0].boxes.cpu().numpy()
+        finally:
+            self._free.put(model)
+
+class StreamTracker:
+    """
+    ByteTrack state for ONE stream, independent of the model that produced the boxes.
+    Equivalent to model.track(persist=True) but lets many streams share one detector pool.
+    """
+    def __init__(self, frame_rate=None):
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.utils import IterableSimpleNamespace, yaml_load
+        from ultralytics.utils.checks import check_yaml
+
+        args = IterableSimpleNamespace(**yaml_load(check_yaml(f"{Config.TRACKER_ALGORITHM}.yaml")))
+        self.tracker = BYTETracker(args=args, frame_rate=frame_rate or Config.FPS)
+
+    def update(self, boxes, frame):
+        """
+        boxes: detections from DetectorPool.detect().
+        Returns (xyxy, track_ids, classes) arrays, ready for StateManager.update_from_arrays.
+        """
+        tracks = self.tracker.update(boxes, frame)
+        if len(tracks) == 0:
+            return np.empty((0, 4)), np.empty((0,), dtype=int), np.empty((0,), dtype=int)
+
+        # Rows: x1, y1, x2, y2, track_id, score, cls, det_index
+        return tracks[:, :4], tracks[:, 4].astype(int), tracks[:, 6].astype(int)
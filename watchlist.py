@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+import numpy as np
+from config import Config
+from logger import system_logger
+from enrollment import EnrollmentPipeline, IMAGE_EXTENSIONS, make_pool
+
+class WatchlistWatcher:
+    """Hot reload of the watchlist folders: polls (mtime, size) signatures and applies only what changed."""
+    EXTENSIONS = IMAGE_EXTENSIONS + (".npy",)
+
+    def __init__(self, db, interval=None, workers=None):
+        self.db = db
+        self.interval = interval or Config.WATCHLIST_POLL_SECONDS
+        self.workers = workers or Config.ENROLL_BACKGROUND_WORKERS
+        self.known = {} # {path: (mtime_ns, size)} already applied
+        self._pool = None # Embedding workers, kept while changes keep coming
+        self._last_change = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.counters = {"polls": 0, "reloads": 0, "added": 0, "changed": 0, "removed": 0}
+
+    def snapshot(self):
+        """{path: ((mtime_ns, size), role)} for every watchlist file."""
+        files = {}
+        for folder, role in self.db.CATEGORIES:
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.name.lower().endswith(self.EXTENSIONS):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files[entry.path] = ((stat.st_mtime_ns, stat.st_size), role)
+        return files
+
+    def poll(self, now=None):
+        """One incremental pass. Returns {"added", "changed", "removed"} counts (all 0 when nothing changed)."""
+        now = now if now is not None else time.time()
+        self.counters["polls"] += 1
+        current = self.snapshot()
+
+        added, changed = [], []
+        for path, (signature, role) in current.items():
+            if self.known.get(path) == signature:
+                continue
+            if now - signature[0] / 1e9 < Config.WATCHLIST_SETTLE_SECONDS:
+                continue # Still being copied: next poll
+            (changed if path in self.known else added).append((path, role))
+        removed = [path for path in self.known if path not in current]
+
+        counts = {"added": len(added), "changed": len(changed), "removed": len(removed)}
+        if added or changed or removed:
+            t0 = time.time()
+            self._apply(added + changed, removed, current)
+            for path, _ in added + changed:
+                self.known[path] = current[path][0]
+            for path in removed:
+                del self.known[path]
+            self._last_change = now
+            self.counters["reloads"] += 1
+            for key, value in counts.items():
+                self.counters[key] += value
+            system_logger.log_event("WATCHLIST_RELOADED", dict(counts, identities=len(self.db.gallery),
+                                                               seconds=round(time.time() - t0, 2)))
+        elif self._pool is not None and now - self._last_change > Config.WATCHLIST_POOL_IDLE_SECONDS:
+            # Quiet for a while: give the face models in the workers their memory back
+            self._pool.shutdown()
+            self._pool = None
+        return counts
+
+    def _apply(self, updated, removed, current):
+        # Images go through EnrollmentPipeline on a long-lived pool, .npy files are enrolled as is
+        images = [(path, role) for path, role in updated if self._is_image(path)]
+        if images:
+            if self._pool is None:
+                self._pool = make_pool(self.workers)
+            EnrollmentPipeline(self.db, self.workers, pool=self._pool).run(images)
+
+        vectors = []
+        for path, role in updated:
+            if path.endswith(".npy"):
+                try:
+                    vectors.append((self._name(path), np.load(path), role, None))
+                except (OSError, ValueError) as e:
+                    system_logger.logger.warning(f"Skipping unreadable embedding {path}: {e}")
+        self.db.add_people(vectors)
+
+        # Deleting the source image drops the identity, even if a legacy <name>.npy is left beside it;
+        # a deleted .npy only does when no image of that name remains (a.jpg -> a.png is a change).
+        # Runs after the additions: a file moved to the other folder was just re-enrolled under the new
+        # role, so the role check keeps it.
+        images_left = {(os.path.dirname(path), self._name(path)) for path in current if self._is_image(path)}
+        files_left = {(os.path.dirname(path), self._name(path)) for path in current}
+        gone = []
+        for path in removed:
+            key = (os.path.dirname(path), self._name(path))
+            still_there = key in images_left if self._is_image(path) else key in files_left
+            if not still_there and self.db.metadata.get(key[1], {}).get("role") == self._role_of_folder(key[0]):
+                gone.append(key[1])
+        self.db.remove_people(gone)
+
+    def reconcile(self):
+        """Startup pass: enrolls new images and drops identities whose images were deleted while down."""
+        current = self.snapshot()
+        EnrollmentPipeline(self.db, self.workers).run()
+
+        # Entries with a source hash were enrolled from an image: only an image keeps them
+        present = {(self._role_of_folder(os.path.dirname(path)), self._name(path))
+                   for path in current if self._is_image(path)}
+        store = self.db.store
+        gone = [entry[store.NAME] for _, entry in store.live()
+                if entry[store.HASH] and (entry[store.ROLE], entry[store.NAME]) not in present]
+        self.db.remove_people(gone)
+        # Changes made during this pass show up as differences on the first poll
+        self.known = {path: signature for path, (signature, _) in current.items()}
+
+    @staticmethod
+    def _name(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    @staticmethod
+    def _is_image(path):
+        return path.lower().endswith(IMAGE_EXTENSIONS)
+
+    def _role_of_folder(self, folder):
+        for category_folder, role in self.db.CATEGORIES:
+            if os.path.normpath(category_folder) == os.path.normpath(folder):
+                return role
+        return None
+
+    # --- Lifecycle ---
+    def _run(self):
+        try:
+            self.reconcile()
+        except Exception as e:
+            system_logger.logger.error(f"Watchlist startup pass failed: {e}")
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                system_logger.logger.error(f"Watchlist reload failed: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="watchlist", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+def start(db):
+    """Hot reload when Config.WATCHLIST_WATCH, else the one-shot background enrollment of enrollment.py."""
+    if Config.WATCHLIST_WATCH:
+        return WatchlistWatcher(db).start()
+    from enrollment import start_background
+    start_background(db)
+    return None